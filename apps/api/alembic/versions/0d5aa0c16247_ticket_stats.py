@@ -0,0 +1,52 @@
+"""ticket_stats: per-org ticket counts by status / priority"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy import inspect
+
+revision = "0d5aa0c16247"
+down_revision = "2c0493207fde"
+branch_labels = None
+depends_on = None
+
+
+def table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if table_exists("ticket_stats"):
+        return
+
+    op.create_table(
+        "ticket_stats",
+        sa.Column("org_id", sa.Integer(), sa.ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column(
+            "status",
+            postgresql.ENUM("open", "pending", "closed", name="ticket_status", create_type=False),
+            primary_key=True,
+        ),
+        sa.Column(
+            "priority",
+            postgresql.ENUM("low", "medium", "high", name="ticket_priority", create_type=False),
+            primary_key=True,
+        ),
+        sa.Column("count", sa.Integer(), server_default="0", nullable=False),
+    )
+
+    # initial fill; afterwards maintained by the write paths + reconciliation job
+    op.execute(
+        """
+        INSERT INTO ticket_stats (org_id, status, priority, count)
+        SELECT org_id, status, priority, COUNT(*) FROM tickets GROUP BY org_id, status, priority
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ticket_stats")
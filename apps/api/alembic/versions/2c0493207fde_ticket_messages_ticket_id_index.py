@@ -0,0 +1,41 @@
+"""ticket_messages (ticket_id, id) index for paginated threads"""
+
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import inspect
+
+revision = "2c0493207fde"
+down_revision = "8ce8dae2aa57"
+branch_labels = None
+depends_on = None
+
+
+def index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return False
+    return any(ix["name"] == index_name for ix in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    if index_exists("ticket_messages", "ix_ticket_messages_ticket_id_id"):
+        return
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_ticket_messages_ticket_id_id",
+            "ticket_messages",
+            ["ticket_id", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_ticket_messages_ticket_id_id",
+            table_name="ticket_messages",
+            postgresql_concurrently=True,
+        )
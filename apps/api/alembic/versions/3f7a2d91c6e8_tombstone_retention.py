@@ -0,0 +1,52 @@
+"""ticket_tombstones retention: orgs.tombstones_pruned_seq + deleted_at index for the sweep"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import inspect
+
+revision = "3f7a2d91c6e8"
+down_revision = "5b3e0c7d9a41"
+branch_labels = None
+depends_on = None
+
+
+def column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return any(c["name"] == column_name for c in inspector.get_columns(table_name))
+
+
+def index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return False
+    return any(ix["name"] == index_name for ix in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    if not column_exists("orgs", "tombstones_pruned_seq"):
+        op.add_column(
+            "orgs", sa.Column("tombstones_pruned_seq", sa.BigInteger(), server_default="0", nullable=False)
+        )
+
+    with op.get_context().autocommit_block():
+        if not index_exists("ticket_tombstones", "ix_ticket_tombstones_deleted_at"):
+            op.create_index(
+                "ix_ticket_tombstones_deleted_at",
+                "ticket_tombstones",
+                ["deleted_at"],
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        if index_exists("ticket_tombstones", "ix_ticket_tombstones_deleted_at"):
+            op.drop_index(
+                "ix_ticket_tombstones_deleted_at", table_name="ticket_tombstones", postgresql_concurrently=True
+            )
+    if column_exists("orgs", "tombstones_pruned_seq"):
+        op.drop_column("orgs", "tombstones_pruned_seq")
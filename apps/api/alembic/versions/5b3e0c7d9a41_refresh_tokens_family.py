@@ -0,0 +1,58 @@
+"""refresh_tokens.family: token families for reuse detection in the postgres session store"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import inspect
+
+revision = "5b3e0c7d9a41"
+down_revision = "ff0e595dc023"
+branch_labels = None
+depends_on = None
+
+
+def table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    return table_name in inspect(bind).get_table_names()
+
+
+def column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return any(c["name"] == column_name for c in inspector.get_columns(table_name))
+
+
+def index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return False
+    return any(ix["name"] == index_name for ix in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    # refresh_tokens is created by create_all on fresh installs
+    if not table_exists("refresh_tokens"):
+        return
+
+    # nullable: tokens issued before this have no family and just can't take one down
+    if not column_exists("refresh_tokens", "family"):
+        op.add_column("refresh_tokens", sa.Column("family", sa.String(32), nullable=True))
+
+    with op.get_context().autocommit_block():
+        if not index_exists("refresh_tokens", "ix_refresh_tokens_family"):
+            op.create_index(
+                "ix_refresh_tokens_family",
+                "refresh_tokens",
+                ["family"],
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        if index_exists("refresh_tokens", "ix_refresh_tokens_family"):
+            op.drop_index("ix_refresh_tokens_family", table_name="refresh_tokens", postgresql_concurrently=True)
+    if table_exists("refresh_tokens") and column_exists("refresh_tokens", "family"):
+        op.drop_column("refresh_tokens", "family")
@@ -0,0 +1,60 @@
+"""tickets filter / sort indexes for GET /tickets (status, priority, created_at, open queue, subject prefix)"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "8e84a1b7a7d2"
+down_revision = "0d5aa0c16247"
+branch_labels = None
+depends_on = None
+
+# name -> (columns, WHERE of a partial index)
+INDEXES = {
+    "ix_tickets_org_status_updated_id": (["org_id", "status", "updated_at", "id"], None),
+    "ix_tickets_org_priority_updated_id": (["org_id", "priority", "updated_at", "id"], None),
+    "ix_tickets_org_created_id": (["org_id", "created_at", "id"], None),
+    "ix_tickets_open_org_updated_id": (["org_id", "updated_at", "id"], "status = 'open'"),
+}
+
+
+def index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return False
+    return any(ix["name"] == index_name for ix in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    # CONCURRENTLY: don't lock writes on big tenants while the indexes build.
+    with op.get_context().autocommit_block():
+        for name, (columns, where) in INDEXES.items():
+            if index_exists("tickets", name):
+                continue
+            op.create_index(
+                name,
+                "tickets",
+                columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                sqlite_where=sa.text(where) if where else None,
+            )
+
+        if not index_exists("tickets", "ix_tickets_org_subject_lower"):
+            if op.get_bind().dialect.name == "postgresql":
+                # text_pattern_ops: LIKE 'prefix%' can use the index under any collation
+                op.execute(
+                    "CREATE INDEX CONCURRENTLY ix_tickets_org_subject_lower "
+                    "ON tickets (org_id, lower(subject) text_pattern_ops)"
+                )
+            else:
+                op.execute("CREATE INDEX ix_tickets_org_subject_lower ON tickets (org_id, lower(subject))")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in ["ix_tickets_org_subject_lower", *INDEXES]:
+            op.drop_index(name, table_name="tickets", postgresql_concurrently=True)
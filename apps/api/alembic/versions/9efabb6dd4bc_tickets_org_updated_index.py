@@ -0,0 +1,42 @@
+"""tickets (org_id, updated_at, id) index for keyset pagination"""
+
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import inspect
+
+revision = "9efabb6dd4bc"
+down_revision = "90dd10fa8956"
+branch_labels = None
+depends_on = None
+
+
+def index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return False
+    return any(ix["name"] == index_name for ix in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    if index_exists("tickets", "ix_tickets_org_updated_id"):
+        return
+
+    # CONCURRENTLY: don't lock writes on big tenants while the index builds.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tickets_org_updated_id",
+            "tickets",
+            ["org_id", "updated_at", "id"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tickets_org_updated_id",
+            table_name="tickets",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,37 @@
+"""tickets / ticket_messages external_id for idempotent bulk import"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "a1f645482fd4"
+down_revision = "d9c91f029e57"
+branch_labels = None
+depends_on = None
+
+
+def column_exists(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return any(c["name"] == column_name for c in inspector.get_columns(table_name))
+
+
+def upgrade() -> None:
+    if not column_exists("tickets", "external_id"):
+        op.add_column("tickets", sa.Column("external_id", sa.String(128), nullable=True))
+        op.create_unique_constraint("uq_tickets_org_external_id", "tickets", ["org_id", "external_id"])
+
+    if not column_exists("ticket_messages", "external_id"):
+        op.add_column("ticket_messages", sa.Column("external_id", sa.String(128), nullable=True))
+        op.create_unique_constraint(
+            "uq_ticket_messages_ticket_external_id", "ticket_messages", ["ticket_id", "external_id"]
+        )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_ticket_messages_ticket_external_id", "ticket_messages", type_="unique")
+    op.drop_column("ticket_messages", "external_id")
+    op.drop_constraint("uq_tickets_org_external_id", "tickets", type_="unique")
+    op.drop_column("tickets", "external_id")
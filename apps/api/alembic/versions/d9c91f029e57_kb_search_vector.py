@@ -0,0 +1,46 @@
+"""kb_articles search_vector (generated tsvector) + GIN index"""
+
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import inspect
+
+revision = "d9c91f029e57"
+down_revision = "9efabb6dd4bc"
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(tags_csv, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(body, '')), 'C')"
+)
+
+
+def table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    return table_name in inspector.get_table_names()
+
+
+def upgrade() -> None:
+    if not table_exists("kb_articles"):
+        return
+
+    op.execute(
+        "ALTER TABLE kb_articles ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_kb_articles_search_vector "
+            "ON kb_articles USING gin (search_vector)"
+        )
+
+
+def downgrade() -> None:
+    if not table_exists("kb_articles"):
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_kb_articles_search_vector")
+    op.execute("ALTER TABLE kb_articles DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,56 @@
+"""refresh_tokens indexes for the expiry / revoked sweeper"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import inspect
+
+revision = "ff0e595dc023"
+down_revision = "8e84a1b7a7d2"
+branch_labels = None
+depends_on = None
+
+
+def table_exists(table_name: str) -> bool:
+    bind = op.get_bind()
+    return table_name in inspect(bind).get_table_names()
+
+
+def index_exists(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if table_name not in inspector.get_table_names():
+        return False
+    return any(ix["name"] == index_name for ix in inspector.get_indexes(table_name))
+
+
+def upgrade() -> None:
+    # refresh_tokens is created by create_all on fresh installs; nothing to index yet
+    if not table_exists("refresh_tokens"):
+        return
+
+    with op.get_context().autocommit_block():
+        if not index_exists("refresh_tokens", "ix_refresh_tokens_expires_at"):
+            op.create_index(
+                "ix_refresh_tokens_expires_at",
+                "refresh_tokens",
+                ["expires_at"],
+                postgresql_concurrently=True,
+            )
+        if not index_exists("refresh_tokens", "ix_refresh_tokens_revoked_id"):
+            op.create_index(
+                "ix_refresh_tokens_revoked_id",
+                "refresh_tokens",
+                ["id"],
+                postgresql_where=sa.text("revoked"),
+                sqlite_where=sa.text("revoked = 1"),
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in ("ix_refresh_tokens_revoked_id", "ix_refresh_tokens_expires_at"):
+            if index_exists("refresh_tokens", name):
+                op.drop_index(name, table_name="refresh_tokens", postgresql_concurrently=True)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from typing import List
 
-from pydantic import Field, AliasChoices, field_validator
+from pydantic import Field, AliasChoices, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -20,6 +20,15 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str
 
+    # DB pool / async
+    DB_ASYNC: bool = False  # True => routers روی AsyncSession سوار میشن (psycopg async / asyncpg)
+    DATABASE_ASYNC_URL: str | None = None  # پیش‌فرض: از DATABASE_URL ساخته میشه
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 = disabled
+
     # JWT / Cookies
     SECRET_KEY: str = Field(
         default="dev-secret-change-me",
@@ -28,6 +37,32 @@ class Settings(BaseSettings):
     JWT_ALG: str = Field(default="HS256", validation_alias=AliasChoices("JWT_ALG", "JWT_ALGORITHM"))
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REFRESH_TOKENS_PER_USER: int = 10  # active sessions per user; the oldest are evicted
+    # a just-rotated refresh token presented again within this window (two tabs refreshing at
+    # once) gets the same successor back instead of counting as reuse; 0 = any reuse revokes
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS: int = 10
+    REFRESH_TOKEN_SWEEP_SECONDS: int = 600  # delete expired/revoked rows; 0 = off
+    REFRESH_TOKEN_SWEEP_BATCH: int = 5000  # rows per DELETE / transaction
+    # ticket_tombstones behind /tickets/changes; a cursor older than the retention must resync
+    TICKET_TOMBSTONE_RETENTION_DAYS: int = 30
+    TICKET_TOMBSTONE_SWEEP_SECONDS: int = 3600  # 0 = off
+    TICKET_TOMBSTONE_SWEEP_BATCH: int = 5000  # rows per DELETE / transaction
+    # refresh-token sessions (app.services.session_store); switching logs everyone out once
+    SESSION_STORE_BACKEND: str = "postgres"  # "postgres" | "redis" (refresh without touching the DB)
+
+    # bcrypt: cost و pool اختصاصی (خارج از threadpool اصلی FastAPI)
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_POOL_WORKERS: int = 4
+    BCRYPT_POOL_MAX_QUEUE: int = 32  # بیشتر از این => 503 سریع
+
+    # access token حامل org_id/role هم هست؛ اگر True باشه request ها بدون query به users احراز میشن
+    # Trade-off: a demotion, org move or deleted user only takes effect when the access
+    # token expires, so turning this on requires ACCESS_TOKEN_EXPIRE_MINUTES <= the cap below.
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+    AUTH_TRUST_CLAIMS_MAX_TOKEN_MINUTES: int = 15
+    # fallback برای توکن‌های قدیمی (بدون claim): cache درون‌پروسه‌ای
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10_000
 
     ACCESS_COOKIE_NAME: str = "access_token"
     REFRESH_COOKIE_NAME: str = "refresh_token"
@@ -38,7 +73,69 @@ class Settings(BaseSettings):
     CORS_ORIGINS: List[str] = Field(default_factory=lambda: ["http://localhost:3000"])
 
     REDIS_URL: str = "redis://redis:6379/0"
+    REDIS_SOCKET_TIMEOUT: float = 0.5
+
+    # Instrumentation (app.core.metrics): /metrics, Server-Timing, slow-query log
+    METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True  # db / app durations per response (visible in browser devtools)
+    SLOW_QUERY_MS: float = 200  # 0 = off
+    # per-route SQL statement budgets (app.core.query_budget); for dev / CI, not prod
+    QUERY_BUDGET_MODE: str = "off"  # "off" | "warn" | "raise"
+    QUERY_BUDGET_DEFAULT: int = 0  # budget for routes without @route_budget; 0 = unchecked
+
+    # Rate limiting (sliding window, per minute)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "redis"  # "redis" | "memory" (tests / single node)
     RATE_LIMIT_AI_PER_MINUTE: int = 20
+    RATE_LIMIT_LOGIN_PER_MINUTE: int = 10  # per IP
+    RATE_LIMIT_TICKET_CREATE_PER_MINUTE: int = 60
+
+    # AI provider: "mock" | "fake-stream" (mock text with model-like latency)
+    AI_PROVIDER: str = "mock"
+    AI_FAKE_FIRST_TOKEN_MS: int = 150
+    AI_FAKE_TOKEN_MS: int = 20
+
+    # Background jobs (app.services.jobs / python -m app.worker)
+    JOBS_BACKEND: str = "redis"  # "redis" | "memory" (in-process worker thread)
+    JOB_TTL_SECONDS: int = 24 * 3600
+    JOB_TIMEOUT_SECONDS: int = 120  # per attempt; enforced in worker processes (SIGALRM)
+    JOB_LEASE_GRACE_SECONDS: int = 30  # a worker silent for timeout + grace is presumed dead; its job is re-queued
+    JOB_MAX_ATTEMPTS: int = 4
+    JOB_RETRY_BASE_SECONDS: float = 2.0
+    JOB_RETRY_MAX_SECONDS: float = 60.0
+    JOBS_PER_ORG_CONCURRENCY: int = 2
+    JOB_ORG_CAP_DEFER_SECONDS: float = 1.0
+    AI_PREGENERATE_ON_MESSAGE: bool = True  # new user message => enqueue a draft job
+    AI_PREGENERATE_TONE: str = "friendly"
+    STATS_RECONCILE_SECONDS: int = 3600  # ticket_stats recount; 0 = off
+
+    # Draft cache: per-process LRU + (optional) Redis tier
+    DRAFT_CACHE_BACKEND: str = "redis"  # "redis" | "memory"
+    DRAFT_CACHE_TTL_SECONDS: int = 3600
+    DRAFT_CACHE_LOCAL_MAX: int = 1024
+
+    # Ticket detail cache (GET /tickets/{id}): per-process LRU + (optional) Redis tier, keyed by change_seq
+    TICKET_CACHE_BACKEND: str = "redis"  # "redis" | "memory" | "off"
+    TICKET_CACHE_TTL_SECONDS: int = 600
+    TICKET_CACHE_LOCAL_MAX: int = 10_000
+    TICKET_CACHE_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024  # per process
+
+    # Real-time events (/events/stream SSE, /events/ws)
+    EVENTS_BACKEND: str = "redis"  # "redis" (pub/sub fan-out across nodes) | "memory" (single node)
+    EVENTS_QUEUE_MAX: int = 256  # per connection; a slower client gets a "resync" instead
+    EVENTS_HEARTBEAT_SECONDS: int = 20
+    EVENTS_MAX_CONNECTIONS: int = 10_000  # per process
+
+    # Bulk import (/tickets/bulk, /tickets/messages/bulk)
+    IMPORT_BATCH_SIZE: int = 1000  # rows per INSERT ... RETURNING / transaction
+    IMPORT_MAX_ITEMS: int = 50_000  # per request
+
+    # KB semantic retrieval (app.services.kb_index)
+    KB_INDEX_PATH: str = "./data/kb_index"  # node-local; every process syncs it from kb_articles
+    KB_INDEX_SYNC_SECONDS: int = 60  # 0 = only once at startup
+    KB_EMBED_DIM: int = 384
+    KB_RETRIEVAL_TOP_K: int = 3
+    KB_RETRIEVAL_MIN_SCORE: float = 0.1
 
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
@@ -63,5 +160,15 @@ class Settings(BaseSettings):
             return [x.strip() for x in s.split(",") if x.strip()]
         return v
 
+    @model_validator(mode="after")
+    def check_trusted_claims_ttl(self):
+        if self.AUTH_TRUST_TOKEN_CLAIMS and self.ACCESS_TOKEN_EXPIRE_MINUTES > self.AUTH_TRUST_CLAIMS_MAX_TOKEN_MINUTES:
+            raise ValueError(
+                "AUTH_TRUST_TOKEN_CLAIMS needs short-lived access tokens: "
+                f"ACCESS_TOKEN_EXPIRE_MINUTES={self.ACCESS_TOKEN_EXPIRE_MINUTES} > "
+                f"AUTH_TRUST_CLAIMS_MAX_TOKEN_MINUTES={self.AUTH_TRUST_CLAIMS_MAX_TOKEN_MINUTES}"
+            )
+        return self
+
 
 settings = Settings()
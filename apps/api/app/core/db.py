@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+from typing import Any, AsyncIterator
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 from app.core.config import settings
@@ -10,7 +14,41 @@ class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+def _async_url(url: str) -> str:
+    """
+    Same database, async driver:
+    postgresql / postgresql+psycopg2 -> postgresql+psycopg (psycopg3 async), sqlite -> sqlite+aiosqlite.
+    """
+    u = make_url(url)
+    if u.get_backend_name() == "postgresql" and u.get_driver_name() in ("psycopg2", "psycopg2cffi"):
+        u = u.set(drivername="postgresql+psycopg")
+    elif u.drivername == "sqlite":
+        u = u.set(drivername="sqlite+aiosqlite")
+    return u.render_as_string(hide_password=False)
+
+
+def _engine_kwargs(url: str) -> dict[str, Any]:
+    u = make_url(url)
+    kwargs: dict[str, Any] = {"pool_pre_ping": True}
+    if u.get_backend_name() == "sqlite":
+        return kwargs
+
+    kwargs.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if u.get_driver_name() == "asyncpg":
+            kwargs["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            kwargs["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return kwargs
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs(settings.DATABASE_URL))
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 
@@ -20,3 +58,25 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ---- Async (settings.DB_ASYNC) ----
+# Only built when enabled so the sync-only setup doesn't need an async driver installed.
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DB_ASYNC:
+    _ASYNC_URL = settings.DATABASE_ASYNC_URL or _async_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(_ASYNC_URL, **_engine_kwargs(_ASYNC_URL))
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,  # no implicit (sync) lazy loads after commit
+    )
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    if AsyncSessionLocal is None:
+        raise RuntimeError("DB_ASYNC is disabled")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+import bcrypt
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class HashingPool:
+    """
+    Dedicated, bounded pool for bcrypt.
+
+    bcrypt releases the GIL, so threads give real parallelism without pickling
+    overhead. At most `workers + max_queue` calls may be in flight; anything
+    beyond that is rejected immediately with 503 instead of queueing behind a
+    credential-stuffing burst and starving the rest of the API.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+
+    def _submit(self, fn: Callable[..., T], *args) -> "Future[T]":
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication is busy, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            fut = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _: self._slots.release())
+        return fut
+
+    def run(self, fn: Callable[..., T], *args) -> T:
+        """From sync code (threadpool routes)."""
+        return self._submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable[..., T], *args) -> T:
+        """From async code: awaits without blocking the event loop."""
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+hashing_pool = HashingPool(settings.BCRYPT_POOL_WORKERS, settings.BCRYPT_POOL_MAX_QUEUE)
+
+
+# ---- raw bcrypt (run inside the pool) ----
+def bcrypt_hash(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def bcrypt_verify(password: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    except Exception:
+        return False
+
+
+def bcrypt_rounds(hashed: str) -> int | None:
+    # "$2b$12$<salt+hash>"
+    parts = (hashed or "").split("$")
+    if len(parts) < 4:
+        return None
+    try:
+        return int(parts[2])
+    except ValueError:
+        return None
+
+
+def needs_rehash(hashed: str) -> bool:
+    return bcrypt_rounds(hashed) != settings.BCRYPT_ROUNDS
@@ -0,0 +1,188 @@
+"""
+Per-request instrumentation: Prometheus metrics, SQL query counting, slow-query log.
+
+- MetricsMiddleware (pure ASGI, so streaming responses stay streaming) times each
+  HTTP request and labels it with the route template ("/tickets/{ticket_id}"),
+  never the raw path. Unmatched paths share one "unmatched" label.
+- before/after_cursor_execute hooks on every Engine (sync and async) add each
+  statement to the current request's RequestStats, found through a ContextVar:
+  it follows sync endpoints into the threadpool and AsyncSession into its greenlet.
+  Statements outside a request (jobs, startup) are only checked for slowness.
+- Responses get `Server-Timing: db;dur=<ms>;desc="<n> queries", app;dur=<ms>`,
+  and http_request_db_queries is a per-route histogram of queries per request,
+  so an N+1 shows up as a jump in that route's buckets.
+- GET /metrics serves the default registry (or PROMETHEUS_MULTIPROC_DIR's
+  aggregate when running several worker processes).
+
+The hot path is two perf_counter() calls and a few integer adds per statement,
+and one histogram observation per metric per request.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Counter as TypingCounter, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency (until the response body is sent)",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per HTTP request",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS", ["route"])
+
+
+@dataclass
+class RequestStats:
+    scope: Optional[Scope] = None
+    queries: int = 0
+    db_seconds: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+    # statement text -> executions; only kept when someone asks (app.core.query_budget)
+    statements: Optional[TypingCounter[str]] = None
+
+    @property
+    def route(self) -> str:
+        return route_template(self.scope) if self.scope is not None else "-"
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.db_seconds += elapsed
+        if self.statements is not None:
+            self.statements[statement] += 1
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+# process-wide recorders (every thread / request), e.g. query_budget() around a TestClient call
+_recorders: list[RequestStats] = []
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def use_stats(stats: RequestStats) -> Token:
+    """Make `stats` the current request's stats; undo with reset_stats(token)."""
+    return _current.set(stats)
+
+
+def reset_stats(token: Token) -> None:
+    _current.reset(token)
+
+
+def add_recorder(stats: RequestStats) -> None:
+    _recorders.append(stats)
+
+
+def remove_recorder(stats: RequestStats) -> None:
+    _recorders.remove(stats)
+
+
+def route_template(scope: Scope) -> str:
+    route = scope.get("route")  # set by FastAPI's router once the path matched
+    return getattr(route, "path", None) or "unmatched"
+
+
+# ---- SQLAlchemy ----
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    for recorder in _recorders:
+        recorder.record(statement, elapsed)
+
+    if settings.SLOW_QUERY_MS > 0 and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        route = stats.route if stats is not None else "-"
+        SLOW_QUERIES.labels(route).inc()
+        log.warning("slow query %.1f ms route=%s: %s", elapsed * 1000, route, " ".join(statement.split())[:1000])
+
+
+# ---- ASGI ----
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope=scope)
+        token = use_stats(stats)
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    app_ms = (time.perf_counter() - stats.started) * 1000
+                    value = (
+                        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", '
+                        f"app;dur={app_ms:.1f}"
+                    )
+                    message["headers"] = [*message.get("headers", ()), (b"server-timing", value.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_stats(token)
+            method, route = scope["method"], stats.route
+            REQUEST_LATENCY.labels(method, route).observe(time.perf_counter() - stats.started)
+            REQUESTS.labels(method, route, str(status)).inc()
+            REQUEST_DB_QUERIES.labels(method, route).observe(stats.queries)
+            REQUEST_DB_SECONDS.labels(method, route).observe(stats.db_seconds)
+
+
+def metrics_response() -> Response:
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
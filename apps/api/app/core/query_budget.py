@@ -0,0 +1,160 @@
+"""
+Query budgets: lock in how many SQL statements a block or a route may run.
+
+In tests (the block counts statements from every thread, so TestClient calls work):
+
+    with query_budget(2):
+        client.get(f"/tickets/{ticket_id}")
+
+On routes, declared next to the endpoint and checked per request by
+QueryBudgetMiddleware when QUERY_BUDGET_MODE is "warn" (log + X-Query-Budget
+header) or "raise" (the response is replaced by a 500 naming the statements):
+
+    @router.get("/{ticket_id}")
+    @route_budget(2)
+    def get_ticket(...): ...
+
+Failure reports list repeated statement shapes (same SQL, different parameters),
+which is what an N+1 looks like. Statements are counted the way
+app.core.metrics counts them (cursor executions; an executemany is one).
+"""
+from __future__ import annotations
+
+import json
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import (
+    RequestStats,
+    add_recorder,
+    current_stats,
+    remove_recorder,
+    reset_stats,
+    route_template,
+    use_stats,
+)
+
+log = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """AssertionError, so pytest reports it as a plain test failure."""
+
+
+def duplicate_statements(stats: RequestStats, min_count: int = 2) -> list[tuple[str, int]]:
+    """Statement shapes executed at least min_count times, most frequent first."""
+    if not stats.statements:
+        return []
+    return [(sql, n) for sql, n in stats.statements.most_common() if n >= min_count]
+
+
+def budget_report(stats: RequestStats, budget: int, label: str) -> str:
+    lines = [f"{label}: {stats.queries} SQL statements, budget {budget}"]
+    dupes = duplicate_statements(stats)
+    if dupes:
+        lines.append("repeated statements (N+1?):")
+        lines += [f"  {n}x {' '.join(sql.split())[:300]}" for sql, n in dupes]
+    return "\n".join(lines)
+
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "block") -> Iterator[RequestStats]:
+    """Fail with QueryBudgetExceeded if the block runs more than max_queries statements."""
+    stats = RequestStats(statements=Counter())
+    add_recorder(stats)
+    try:
+        yield stats
+    finally:
+        remove_recorder(stats)
+    if stats.queries > max_queries:
+        raise QueryBudgetExceeded(budget_report(stats, max_queries, label))
+
+
+# the users row get_auth_user_from_request loads on a user-cache miss, unless token claims are trusted
+AUTH_LOOKUP = 0 if settings.AUTH_TRUST_TOKEN_CLAIMS else 1
+
+
+def route_budget(max_queries: int, *, auth_lookup: bool = False) -> Callable[[F], F]:
+    """
+    Declare an endpoint's statement budget (read by QueryBudgetMiddleware).
+    auth_lookup: max_queries excludes the auth users lookup; AUTH_LOOKUP is added for it.
+    """
+    budget = max_queries + (AUTH_LOOKUP if auth_lookup else 0)
+
+    def decorate(fn: F) -> F:
+        fn.__query_budget__ = budget  # type: ignore[attr-defined]
+        return fn
+
+    return decorate
+
+
+def _budget_for(scope: Scope) -> Optional[int]:
+    budget = getattr(scope.get("endpoint"), "__query_budget__", None)
+    if budget is None and settings.QUERY_BUDGET_DEFAULT > 0:
+        budget = settings.QUERY_BUDGET_DEFAULT
+    return budget
+
+
+class QueryBudgetMiddleware:
+    """Dev / CI only: keeps every statement's text per request. Add it inside MetricsMiddleware."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = current_stats()
+        token = None
+        if stats is None:
+            stats = RequestStats(scope=scope)
+            token = use_stats(stats)
+        stats.statements = Counter()
+        replaced = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal replaced
+            if replaced:
+                return  # swallow the original body
+            if message["type"] == "http.response.start":
+                budget = _budget_for(scope)
+                if budget is not None and stats.queries > budget:
+                    label = f"{scope['method']} {route_template(scope)}"
+                    report = budget_report(stats, budget, label)
+                    if settings.QUERY_BUDGET_MODE == "raise":
+                        replaced = True
+                        await _send_error(send, report)
+                        return
+                    log.warning("query budget exceeded\n%s", report)
+                    message["headers"] = [
+                        *message.get("headers", ()),
+                        (b"x-query-budget", f"exceeded {stats.queries}/{budget}".encode("latin-1")),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                reset_stats(token)
+
+
+async def _send_error(send: Send, report: str) -> None:
+    body = json.dumps({"detail": "Query budget exceeded", "report": report.splitlines()}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 500,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
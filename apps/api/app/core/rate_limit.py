@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Literal, Protocol, Union
+
+from fastapi import HTTPException, Request
+from jose import JWTError, jwt
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.redis import get_async_redis
+
+log = logging.getLogger(__name__)
+
+KeyBy = Literal["user", "org", "ip"]
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_seconds: int
+
+
+class RateLimitBackend(Protocol):
+    async def hit(self, key: str, limit: int, window_seconds: int) -> RateLimitResult: ...
+
+
+# Sliding-window counter: the previous fixed window is weighted by how much of it
+# still overlaps the sliding window. Two small keys per identity, one round-trip.
+_SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local elapsed_ms = tonumber(ARGV[3])
+local cur = tonumber(redis.call('GET', KEYS[1]) or '0')
+local prev = tonumber(redis.call('GET', KEYS[2]) or '0')
+local weighted = prev * (window_ms - elapsed_ms) / window_ms + cur
+if weighted + 1 > limit then
+  return {0, math.floor(weighted)}
+end
+cur = redis.call('INCR', KEYS[1])
+if cur == 1 then
+  redis.call('PEXPIRE', KEYS[1], window_ms * 2)
+end
+return {1, math.floor(weighted + 1)}
+"""
+
+
+def _window(window_seconds: int) -> tuple[int, int, int]:
+    """-> (window index, elapsed ms inside it, window ms)"""
+    window_ms = window_seconds * 1000
+    now_ms = int(time.time() * 1000)
+    return now_ms // window_ms, now_ms % window_ms, window_ms
+
+
+def _result(allowed: bool, used: int, limit: int, elapsed_ms: int, window_ms: int) -> RateLimitResult:
+    return RateLimitResult(
+        allowed=allowed,
+        limit=limit,
+        remaining=max(limit - used, 0),
+        reset_seconds=max(math.ceil((window_ms - elapsed_ms) / 1000), 1),
+    )
+
+
+class RedisRateLimiter:
+    def __init__(self):
+        self._script = None
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> RateLimitResult:
+        idx, elapsed_ms, window_ms = _window(window_seconds)
+        if self._script is None:
+            self._script = get_async_redis().register_script(_SLIDING_WINDOW_LUA)  # EVALSHA after first call
+        allowed, used = await self._script(
+            keys=[f"rl:{key}:{idx}", f"rl:{key}:{idx - 1}"],
+            args=[limit, window_ms, elapsed_ms],
+        )
+        return _result(bool(allowed), int(used), limit, elapsed_ms, window_ms)
+
+
+class MemoryRateLimiter:
+    """Same algorithm, per-process. For tests and single-node runs."""
+
+    def __init__(self):
+        self._counts: dict[tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> RateLimitResult:
+        idx, elapsed_ms, window_ms = _window(window_seconds)
+        with self._lock:
+            cur = self._counts.get((key, idx), 0)
+            prev = self._counts.get((key, idx - 1), 0)
+            weighted = prev * (window_ms - elapsed_ms) / window_ms + cur
+            if weighted + 1 > limit:
+                return _result(False, int(weighted), limit, elapsed_ms, window_ms)
+            self._counts[(key, idx)] = cur + 1
+            if len(self._counts) > 100_000:
+                self._counts = {k: v for k, v in self._counts.items() if k[1] >= idx - 1}
+        return _result(True, int(weighted + 1), limit, elapsed_ms, window_ms)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+def _make_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return MemoryRateLimiter()
+    return RedisRateLimiter()
+
+
+backend: RateLimitBackend = _make_backend()
+
+
+def _token_claims(request: Request) -> dict:
+    """
+    Claims are only used to pick the bucket; the route's own dependency still authenticates.
+    """
+    token = request.cookies.get(settings.ACCESS_COOKIE_NAME)
+    if not token:
+        auth = request.headers.get("Authorization") or ""
+        if auth.lower().startswith("bearer "):
+            token = auth.split(" ", 1)[1].strip()
+    if not token:
+        return {}
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALG])
+    except JWTError:
+        return {}
+
+
+def _identity(request: Request, key_by: KeyBy) -> str:
+    # Behind a proxy this is the proxy's address unless uvicorn rewrites it from
+    # X-Forwarded-For: run with --proxy-headers and FORWARDED_ALLOW_IPS set to the
+    # proxy's address(es), never "*" on a port clients can reach directly.
+    ip = request.client.host if request.client else "unknown"
+    if key_by == "ip":
+        return f"ip:{ip}"
+    claims = _token_claims(request)
+    if key_by == "org" and claims.get("org_id"):
+        return f"org:{claims['org_id']}"
+    if claims.get("sub"):
+        return f"user:{claims['sub']}"
+    return f"ip:{ip}"
+
+
+def rate_limit(
+    scope: str,
+    limit: Union[int, Callable[[], int]],
+    window_seconds: int = 60,
+    key_by: KeyBy = "user",
+):
+    """
+    Route dependency:
+        @router.post("/x", dependencies=[Depends(rate_limit("x", lambda: settings.X_PER_MINUTE))])
+    Sets RateLimit-Limit / RateLimit-Remaining / RateLimit-Reset; 429 + Retry-After when exceeded.
+    Fails open (logs) if the backend is unreachable.
+    The headers are left in request.state for RateLimitHeadersMiddleware, so they
+    also reach routes that build their own response (StreamingResponse, ...).
+    """
+
+    async def _dependency(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        budget = limit() if callable(limit) else limit
+        key = f"{scope}:{_identity(request, key_by)}"
+        try:
+            res = await backend.hit(key, budget, window_seconds)
+        except Exception:
+            log.warning("rate limiter backend unavailable; allowing %s", scope, exc_info=True)
+            return
+
+        headers = {
+            "RateLimit-Limit": str(res.limit),
+            "RateLimit-Remaining": str(res.remaining),
+            "RateLimit-Reset": str(res.reset_seconds),
+        }
+        if not res.allowed:
+            headers["Retry-After"] = str(res.reset_seconds)
+            raise HTTPException(status_code=429, detail="Rate limit exceeded", headers=headers)
+        request.state.rate_limit_headers = headers
+
+    return _dependency
+
+
+class RateLimitHeadersMiddleware:
+    """Copies the headers rate_limit() left in request.state onto whatever response goes out."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = scope.get("state", {}).get("rate_limit_headers")
+                if headers:
+                    present = {k.lower() for k, _ in message.get("headers", ())}
+                    message["headers"] = [
+                        *message.get("headers", ()),
+                        *(
+                            (k.lower().encode("latin-1"), v.encode("latin-1"))
+                            for k, v in headers.items()
+                            if k.lower().encode("latin-1") not in present
+                        ),
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> redis.Redis:
+    """Process-wide sync client (connection-pooled); for threadpool routes and workers."""
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_blocking_redis() -> redis.Redis:
+    """Sync client for blocking pops (job queue): no read timeout, or the socket would give up
+    before BLMOVE/BRPOP returns and drop a reply Redis has already committed to."""
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        health_check_interval=30,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_async_redis() -> aioredis.Redis:
+    """Process-wide asyncio client; for async routes / dependencies."""
+    return aioredis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_async_pubsub_redis() -> aioredis.Redis:
+    """Asyncio client for long-lived subscriptions: no read timeout (a quiet channel isn't an error)."""
+    return aioredis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        health_check_interval=30,
+    )
@@ -1,31 +1,40 @@
 from __future__ import annotations
 
 import hashlib
+import hmac
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
 from uuid import uuid4
 
-import bcrypt
 from fastapi import HTTPException, Request, Depends
 from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.requests import HTTPConnection
 
 from app.core.config import settings
-from app.core.db import get_db
+from app.core.db import get_async_db, get_db
+from app.core.hashing import bcrypt_hash, bcrypt_verify, hashing_pool, needs_rehash  # noqa: F401
+from app.core.user_cache import AuthUser, user_cache
 from app.models.user import User
 
 
 # ---- Password ----
+# bcrypt runs on the bounded hashing pool (app.core.hashing); raises 503 when saturated.
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+    return hashing_pool.run(bcrypt_hash, password)
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    try:
-        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
-    except Exception:
-        return False
+    return hashing_pool.run(bcrypt_verify, password, hashed)
+
+
+async def hash_password_async(password: str) -> str:
+    return await hashing_pool.run_async(bcrypt_hash, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await hashing_pool.run_async(bcrypt_verify, password, hashed)
 
 
 # ---- JWT ----
@@ -40,10 +49,22 @@ def create_access_token(claims: Dict[str, Any]) -> str:
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.JWT_ALG)
 
 
-def create_refresh_token(claims: Dict[str, Any]) -> tuple[str, str]:
+def access_token_claims(user: User) -> Dict[str, Any]:
+    """
+    Claims for create_access_token. org_id/role let request dependencies skip the
+    users lookup (see AUTH_TRUST_TOKEN_CLAIMS); they stay valid until the token expires,
+    which is why that flag is off by default and requires short-lived access tokens.
+    """
+    return {"sub": str(user.id), "org_id": user.org_id, "role": user.role}
+
+
+def create_refresh_token(
+    claims: Dict[str, Any], jti: Optional[str] = None, expires_at: Optional[datetime] = None
+) -> tuple[str, str]:
+    """jti / expires_at: re-encode a known token (rotation grace window); default a fresh one."""
     to_encode = dict(claims)
-    expire = _now() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    jti = uuid4().hex
+    expire = expires_at or _now() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    jti = jti or uuid4().hex
     to_encode.update({"exp": expire, "typ": "refresh", "jti": jti})
     token = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.JWT_ALG)
     return token, jti
@@ -60,6 +81,12 @@ def hash_jti(jti: str) -> str:
     return hashlib.sha256(jti.encode("utf-8")).hexdigest()
 
 
+def successor_jti(jti: str) -> str:
+    """jti of the token a rotation hands out for `jti`: derived, so a concurrent refresh with
+    the old token can be given the same successor without storing it anywhere."""
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), f"rotate:{jti}".encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+
 # ---- Cookies ----
 def set_auth_cookies(response, access_token: str, refresh_token: str) -> None:
     response.set_cookie(
@@ -93,7 +120,7 @@ def _get_bearer(request: Request) -> Optional[str]:
     return None
 
 
-def get_current_user_from_request(request: Request, db: Session) -> User:
+def _access_payload(request: Request) -> Dict[str, Any]:
     token = request.cookies.get(settings.ACCESS_COOKIE_NAME) or _get_bearer(request)
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -102,15 +129,95 @@ def get_current_user_from_request(request: Request, db: Session) -> User:
     if payload.get("typ") != "access":
         raise HTTPException(status_code=401, detail="Invalid access token")
 
-    sub = payload.get("sub")
-    if not sub:
+    if not payload.get("sub"):
         raise HTTPException(status_code=401, detail="Invalid token")
+    return payload
+
 
-    user = db.get(User, int(sub))
+def get_current_user_from_request(request: Request, db: Session) -> User:
+    payload = _access_payload(request)
+
+    user = db.get(User, int(payload["sub"]))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
 
+def auth_user_from_claims(payload: Dict[str, Any]) -> Optional[AuthUser]:
+    if not settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return None
+    if "org_id" not in payload or "role" not in payload:
+        return None  # token issued before claims were embedded
+    org_id = payload["org_id"]
+    return AuthUser(id=int(payload["sub"]), org_id=int(org_id) if org_id else None, role=str(payload["role"]))
+
+
+def _auth_user_without_db(payload: Dict[str, Any]) -> Optional[AuthUser]:
+    return auth_user_from_claims(payload) or user_cache.get(int(payload["sub"]))
+
+
+def auth_user_from_token(conn: HTTPConnection) -> Optional[AuthUser]:
+    """
+    The caller from its access token alone (claims, then the per-process user cache);
+    None means a users lookup is needed (get_auth_user_from_request). 401 on a bad token.
+    For long-lived connections that must not hold a DB session.
+    """
+    return _auth_user_without_db(_access_payload(conn))
+
+
+def get_auth_user_from_request(request: Request, db: Session) -> AuthUser:
+    """
+    Hot-path auth: token claims -> per-process cache -> users table.
+    Use get_current_user_from_request when the full User row is needed.
+    """
+    payload = _access_payload(request)
+    auth_user = _auth_user_without_db(payload)
+    if auth_user:
+        return auth_user
+
+    user = db.get(User, int(payload["sub"]))
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    auth_user = AuthUser.from_user(user)
+    user_cache.put(auth_user)
+    return auth_user
+
+
+async def get_current_user_from_request_async(request: Request, db: AsyncSession) -> User:
+    payload = _access_payload(request)
+
+    user = await db.get(User, int(payload["sub"]))
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+
+async def get_auth_user_from_request_async(request: Request, db: AsyncSession) -> AuthUser:
+    payload = _access_payload(request)
+    auth_user = _auth_user_without_db(payload)
+    if auth_user:
+        return auth_user
+
+    user = await db.get(User, int(payload["sub"]))
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    auth_user = AuthUser.from_user(user)
+    user_cache.put(auth_user)
+    return auth_user
+
+
 def require_user(request: Request, db: Session = Depends(get_db)) -> User:
     return get_current_user_from_request(request, db)
+
+
+def require_auth_user(request: Request, db: Session = Depends(get_db)) -> AuthUser:
+    return get_auth_user_from_request(request, db)
+
+
+async def require_auth_user_async(request: Request, db: AsyncSession = Depends(get_async_db)) -> AuthUser:
+    return await get_auth_user_from_request_async(request, db)
+
+
+def require_roles(user: User | AuthUser, roles: Iterable[str]) -> None:
+    if getattr(user, "role", None) not in set(roles):
+        raise HTTPException(status_code=403, detail="Insufficient role")
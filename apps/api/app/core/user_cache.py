@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event, inspect
+
+from app.core.config import settings
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    """
+    What request dependencies need to know about the caller (no email / password hash).
+    Built from access-token claims or from the users table.
+    """
+
+    id: int
+    org_id: Optional[int]
+    role: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthUser":
+        return cls(id=user.id, org_id=user.org_id, role=user.role)
+
+
+class UserCache:
+    """
+    Small per-process TTL + LRU cache: user_id -> AuthUser.
+    Only a fallback for tokens without org_id/role claims; entries are dropped
+    as soon as a User's role/org_id is updated through the ORM.
+    """
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._data: "OrderedDict[int, tuple[float, AuthUser]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[AuthUser]:
+        if self.ttl_seconds <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            hit = self._data.get(user_id)
+            if hit is None:
+                return None
+            expires, auth_user = hit
+            if expires < now:
+                del self._data[user_id]
+                return None
+            self._data.move_to_end(user_id)
+            return auth_user
+
+    def put(self, auth_user: AuthUser) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._data[auth_user.id] = (time.monotonic() + self.ttl_seconds, auth_user)
+            self._data.move_to_end(auth_user.id)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+user_cache = UserCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_SIZE)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_user_update(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if state.attrs.role.history.has_changes() or state.attrs.org_id.history.has_changes():
+        user_cache.invalidate(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_user_delete(mapper, connection, target: User) -> None:
+    user_cache.invalidate(target.id)
@@ -4,14 +4,35 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.core.db import Base, engine
+from app.core.db import Base, async_engine, engine
+from app.core.hashing import hashing_pool
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.core.query_budget import QueryBudgetMiddleware
+from app.core.rate_limit import RateLimitHeadersMiddleware
+from app.services.events import broker as event_broker
+from app.services.jobs import start_local_worker, stop_local_worker
+from app.services.kb_index import start_sync_thread, stop_sync_thread
 
 # import models to register mappers
 from app import models  # noqa: F401
 
-from app.routers.auth import router as auth_router
-from app.routers.orgs import router as orgs_router
-from app.routers.tickets import router as tickets_router
+from app.routers.ai import router as ai_router
+from app.routers.events import router as events_router
+from app.routers.tickets_bulk import router as tickets_bulk_router
+from app.routers.tickets_changes import router as tickets_changes_router
+from app.routers.tickets_stats import router as tickets_stats_router
+from app.routers.tickets_export import router as tickets_export_router
+
+if settings.DB_ASYNC:
+    from app.routers.auth_async import router as auth_router
+    from app.routers.kb_async import router as kb_router
+    from app.routers.orgs_async import router as orgs_router
+    from app.routers.tickets_async import router as tickets_router
+else:
+    from app.routers.auth import router as auth_router
+    from app.routers.kb import router as kb_router
+    from app.routers.orgs import router as orgs_router
+    from app.routers.tickets import router as tickets_router
 
 
 def _cors_origins() -> list[str]:
@@ -37,12 +58,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor",
+        "X-Messages-Cursor",
+        "RateLimit-Limit",
+        "RateLimit-Remaining",
+        "RateLimit-Reset",
+        "Retry-After",
+        "Server-Timing",
+        "X-Query-Budget",
+        "ETag",
+    ],
 )
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitHeadersMiddleware)
+if settings.QUERY_BUDGET_MODE != "off":
+    app.add_middleware(QueryBudgetMiddleware)
+# outermost, so the time CORS spends is counted too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Routers
 app.include_router(auth_router)
 app.include_router(orgs_router)
+# before tickets: /tickets/bulk, /tickets/changes, /tickets/stats, /tickets/export vs /tickets/{ticket_id}
+app.include_router(tickets_bulk_router)
+app.include_router(tickets_changes_router)
+app.include_router(tickets_stats_router)
+app.include_router(tickets_export_router)
 app.include_router(tickets_router)
+app.include_router(kb_router, prefix="/kb", tags=["kb"])
+app.include_router(ai_router, prefix="/ai", tags=["ai"])
+app.include_router(events_router)
 
 
 @app.on_event("startup")
@@ -55,7 +102,29 @@ def _startup():
     if getattr(settings, "ENV", "dev") == "dev":
         Base.metadata.create_all(bind=engine)
 
+    # memory job backend: no separate worker process, drain the queue in-process
+    if settings.JOBS_BACKEND == "memory":
+        start_local_worker()
+    # node-local KB vector index: build / catch up in the background, not in a request
+    start_sync_thread()
+
+
+@app.on_event("shutdown")
+async def _shutdown():
+    hashing_pool.shutdown()
+    stop_local_worker()
+    stop_sync_thread()
+    await event_broker.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 
 @app.get("/health")
 def health():
     return {"ok": True}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text format; keep it off the public ingress (no auth)."""
+    return metrics_response()
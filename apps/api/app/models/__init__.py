@@ -2,4 +2,7 @@ from app.models.user import User  # noqa
 from app.models.org import Org  # noqa
 from app.models.ticket import Ticket  # noqa
 from app.models.ticket_message import TicketMessage  # noqa
+from app.models.ticket_tombstone import TicketTombstone  # noqa
+from app.models.ticket_stats import TicketStats  # noqa
 from app.models.refresh_token import RefreshToken  # noqa
+from app.models.kb import KBArticle  # noqa
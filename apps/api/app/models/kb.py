@@ -1,7 +1,16 @@
-from sqlalchemy import String, DateTime, func
+from sqlalchemy import DDL, String, DateTime, event, func
 from sqlalchemy.orm import Mapped, mapped_column
 from app.core.db import Base
 
+# Postgres-only generated column + GIN index used by ranked KB search.
+# Not mapped on the model (SQLite has no tsvector); queried via literal_column.
+# Keep in sync with alembic/versions/d9c91f029e57_kb_search_vector.py
+KB_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(tags_csv, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(body, '')), 'C')"
+)
+
 class KBArticle(Base):
     __tablename__ = "kb_articles"
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -9,3 +18,21 @@ class KBArticle(Base):
     body: Mapped[str] = mapped_column(String(20000))
     tags_csv: Mapped[str] = mapped_column(String(1000), default="")
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+# dev create_all on Postgres gets the same column/index the migration creates
+event.listen(
+    KBArticle.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE kb_articles ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({KB_SEARCH_VECTOR_SQL}) STORED"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    KBArticle.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_kb_articles_search_vector ON kb_articles USING gin (search_vector)"
+    ).execute_if(dialect="postgresql"),
+)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Integer, String
+from sqlalchemy import BigInteger, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
@@ -12,6 +12,11 @@ class Org(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
 
+    # last change sequence handed out for this org (app.services.changes)
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+    # highest change_seq of a pruned tombstone: a /tickets/changes cursor below it must resync
+    tombstones_pruned_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+
     users = relationship("User", back_populates="org")
     # اگر Ticket model داری، این باید باشه تا back_populates="tickets" نخوره به دیوار:
     tickets = relationship("Ticket", back_populates="org", cascade="all, delete-orphan")
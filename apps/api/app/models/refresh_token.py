@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 
 from app.core.db import Base
@@ -13,12 +13,25 @@ def utcnow() -> datetime:
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        # sweeper (app.services.refresh_tokens): expired rows by range, revoked rows via a small partial index
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+        Index(
+            "ix_refresh_tokens_revoked_id",
+            "id",
+            postgresql_where=text("revoked"),
+            sqlite_where=text("revoked = 1"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
 
     jti_hash = Column(String(64), nullable=False, unique=True, index=True)
 
+    # one family per login; every rotation's token joins it, reuse of a rotated one revokes it all
+    family = Column(String(32), nullable=True, index=True)
+
     # مهم: timezone-aware
     expires_at = Column(DateTime(timezone=True), nullable=False)
 
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import DateTime, Enum as SAEnum, ForeignKey, Integer, String
+from sqlalchemy import BigInteger, DateTime, Enum as SAEnum, ForeignKey, Index, Integer, String, UniqueConstraint, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
@@ -23,6 +23,34 @@ class TicketPriority(str, Enum):
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # keyset pagination of GET /tickets: WHERE org_id = ? ORDER BY updated_at DESC, id DESC
+        Index("ix_tickets_org_updated_id", "org_id", "updated_at", "id"),
+        # idempotent bulk import (NULLs never conflict)
+        UniqueConstraint("org_id", "external_id", name="uq_tickets_org_external_id"),
+        # GET /tickets/changes: WHERE org_id = ? AND change_seq > ?
+        Index("ix_tickets_org_change_seq", "org_id", "change_seq"),
+        # GET /tickets filters / sorts (keep in sync with alembic 8e84a1b7a7d2)
+        Index("ix_tickets_org_status_updated_id", "org_id", "status", "updated_at", "id"),
+        Index("ix_tickets_org_priority_updated_id", "org_id", "priority", "updated_at", "id"),
+        Index("ix_tickets_org_created_id", "org_id", "created_at", "id"),
+        # the agent queue: open tickets only, a fraction of the table
+        Index(
+            "ix_tickets_open_org_updated_id",
+            "org_id",
+            "updated_at",
+            "id",
+            postgresql_where=text("status = 'open'"),
+            sqlite_where=text("status = 'open'"),
+        ),
+        # subject prefix search on lower(subject)
+        Index(
+            "ix_tickets_org_subject_lower",
+            "org_id",
+            func.lower(text("subject")).label("subject_lower"),
+            postgresql_ops={"subject_lower": "text_pattern_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
@@ -34,6 +62,9 @@ class Ticket(Base):
 
     subject: Mapped[str] = mapped_column(String(200), nullable=False)
 
+    # client-supplied id (email Message-ID, helpdesk id...) for imports
+    external_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
+
     status: Mapped[TicketStatus] = mapped_column(
         SAEnum(TicketStatus, name="ticket_status"),
         default=TicketStatus.open,
@@ -51,6 +82,9 @@ class Ticket(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
+    # per-org change sequence of the last write (>= change_seq of each of its messages)
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+
     # relationships
     org = relationship("Org", back_populates="tickets")
     messages = relationship(
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import DateTime, Enum as SAEnum, ForeignKey, Integer, Text
+from sqlalchemy import BigInteger, DateTime, Enum as SAEnum, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
@@ -17,6 +17,12 @@ class MessageRole(str, Enum):
 
 class TicketMessage(Base):
     __tablename__ = "ticket_messages"
+    __table_args__ = (
+        UniqueConstraint("ticket_id", "external_id", name="uq_ticket_messages_ticket_external_id"),
+        Index("ix_ticket_messages_ticket_change_seq", "ticket_id", "change_seq"),
+        # newest-first thread pages: WHERE ticket_id = ? AND id < ? ORDER BY id DESC
+        Index("ix_ticket_messages_ticket_id_id", "ticket_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
@@ -34,6 +40,8 @@ class TicketMessage(Base):
     )
 
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    external_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
 
     ticket = relationship("Ticket", back_populates="messages")
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from sqlalchemy import Enum as SAEnum, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+from app.models.ticket import TicketPriority, TicketStatus
+
+
+class TicketStats(Base):
+    """
+    Ticket counts per (org, status, priority), kept in step with tickets by the
+    write paths (app.services.ticket_stats) and reconciled periodically.
+    At most 9 rows per org, so dashboard reads don't depend on ticket volume.
+    """
+
+    __tablename__ = "ticket_stats"
+
+    org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="CASCADE"), primary_key=True)
+    status: Mapped[TicketStatus] = mapped_column(SAEnum(TicketStatus, name="ticket_status"), primary_key=True)
+    priority: Mapped[TicketPriority] = mapped_column(SAEnum(TicketPriority, name="ticket_priority"), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
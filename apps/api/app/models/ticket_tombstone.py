@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class TicketTombstone(Base):
+    """Deleted ticket, kept so GET /tickets/changes can tell clients to drop it."""
+
+    __tablename__ = "ticket_tombstones"
+    __table_args__ = (
+        Index("ix_ticket_tombstones_org_change_seq", "org_id", "change_seq"),
+        # retention sweep (app.services.changes.sweep_tombstones)
+        Index("ix_ticket_tombstones_deleted_at", "deleted_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    org_id: Mapped[int] = mapped_column(ForeignKey("orgs.id", ondelete="CASCADE"), nullable=False)
+    # no FK: the ticket row is gone
+    ticket_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -2,20 +2,20 @@ from fastapi import Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
-from app.core.security import get_current_user_from_request, require_roles
-from app.models.user import User
+from app.core.security import get_auth_user_from_request, require_roles
+from app.core.user_cache import AuthUser
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
-    return get_current_user_from_request(request, db)
+def get_current_user(request: Request, db: Session = Depends(get_db)) -> AuthUser:
+    return get_auth_user_from_request(request, db)
 
 
-def require_org_user(user: User = Depends(get_current_user)) -> User:
+def require_org_user(user: AuthUser = Depends(get_current_user)) -> AuthUser:
     if not getattr(user, "org_id", None):
         raise HTTPException(status_code=403, detail="User has no org")
     return user
 
 
-def require_admin(user: User = Depends(require_org_user)) -> User:
+def require_admin(user: AuthUser = Depends(require_org_user)) -> AuthUser:
     require_roles(user, roles=["owner", "admin"])
     return user
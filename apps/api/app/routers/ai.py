@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from pydantic import BaseModel, Field
-from typing import Literal
+from pydantic import BaseModel
+from typing import Literal, Optional
 
+from app.core.config import settings
 from app.core.db import get_db
-from app.core.security import require_user
+from app.core.rate_limit import rate_limit
+from app.core.security import require_auth_user
 from app.models.ticket import Ticket
-from app.models.ticket_message import TicketMessage
+from app.services.ai_provider import get_ai_provider
+from app.services.draft_cache import draft_cache
+from app.services.drafting import prepare_draft
+from app.services.jobs import Job, enqueue_draft, job_queue
 
 router = APIRouter()
 
-
 class DraftReplyIn(BaseModel):
     ticket_id: int
     tone: Literal["friendly", "professional", "short"] = "friendly"
@@ -20,42 +29,117 @@ class DraftReplyOut(BaseModel):
     draft: str
 
 
-@router.post("/draft-reply", response_model=DraftReplyOut)
-def draft_reply(payload: DraftReplyIn, db: Session = Depends(get_db), user=Depends(require_user)):
-    ticket = db.query(Ticket).filter(Ticket.id == payload.ticket_id).first()
-    if not ticket:
-        raise HTTPException(status_code=404, detail="ticket not found")
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str
+    attempts: int
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+
+def _job_out(job: Job) -> dict:
+    return JobOut.model_validate(job, from_attributes=True).model_dump()
 
-    msgs = (
-        db.query(TicketMessage)
-        .filter(TicketMessage.ticket_id == payload.ticket_id)
-        .order_by(TicketMessage.id.asc())
-        .all()
-    )
 
-    last_user = None
-    for m in reversed(msgs):
-        if m.author_type == "user":
-            last_user = m.body
-            break
-
-    if not last_user:
-        last_user = "Customer asked for help."
-
-    if payload.tone == "short":
-        draft = f"Thanks for reaching out. We’re looking into it and will get back to you soon.\n\nRef: {ticket.subject}"
-    elif payload.tone == "professional":
-        draft = (
-            f"Hello,\n\nThank you for contacting support regarding: {ticket.subject}.\n"
-            f"We’ve received your message and will investigate.\n\n"
-            f"Last message: {last_user}\n\nBest regards,\nSupport Team"
-        )
-    else:
-        draft = (
-            f"Hey! Thanks for reaching out 💙\n\n"
-            f"I saw your message about “{ticket.subject}”.\n"
-            f"Last thing you said: {last_user}\n\n"
-            f"I’m on it and I’ll update you soon."
-        )
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
+
+@router.post(
+    "/draft-reply",
+    response_model=DraftReplyOut,
+    dependencies=[Depends(rate_limit("ai:draft", lambda: settings.RATE_LIMIT_AI_PER_MINUTE))],
+)
+async def draft_reply(
+    payload: DraftReplyIn,
+    response: Response,
+    db: Session = Depends(get_db),
+    user=Depends(require_auth_user),
+):
+    ctx, key, cached = await run_in_threadpool(prepare_draft, db, payload.ticket_id, user.org_id, payload.tone)
+    if cached is not None:
+        response.headers["X-Draft-Cache"] = "hit"
+        return {"draft": cached}
+
+    draft = await get_ai_provider().draft(ctx)
+    await run_in_threadpool(draft_cache.set, payload.ticket_id, key, draft)
+    response.headers["X-Draft-Cache"] = "miss"
     return {"draft": draft}
+
+
+@router.post(
+    "/draft-reply/stream",
+    dependencies=[Depends(rate_limit("ai:draft", lambda: settings.RATE_LIMIT_AI_PER_MINUTE))],
+)
+async def draft_reply_stream(
+    payload: DraftReplyIn,
+    request: Request,
+    db: Session = Depends(get_db),
+    user=Depends(require_auth_user),
+):
+    """
+    Server-Sent Events: `token` events ({"t": "..."}) as the provider produces them, then `done`.
+    Generation stops as soon as the client goes away.
+    """
+    # DB work happens before streaming starts (the session is closed once the response begins)
+    ctx, key, cached = await run_in_threadpool(prepare_draft, db, payload.ticket_id, user.org_id, payload.tone)
+
+    async def cached_events():
+        yield _sse("token", {"t": cached})
+        yield _sse("done", {"cached": True})
+
+    async def events():
+        tokens = get_ai_provider().stream_draft(ctx)
+        parts: list[str] = []
+        try:
+            async for token in tokens:
+                if await request.is_disconnected():
+                    break
+                parts.append(token)
+                yield _sse("token", {"t": token})
+            else:
+                # only complete drafts are cached
+                await run_in_threadpool(draft_cache.set, payload.ticket_id, key, "".join(parts))
+                yield _sse("done", {})
+        finally:
+            await tokens.aclose()  # cancels the provider call on disconnect
+
+    return StreamingResponse(
+        cached_events() if cached is not None else events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Draft-Cache": "hit" if cached is not None else "miss",
+        },
+    )
+
+
+@router.get("/draft-cache/stats")
+def draft_cache_stats(user=Depends(require_auth_user)):
+    """Hit/miss counters of this worker process."""
+    return draft_cache.stats()
+
+
+@router.post(
+    "/jobs",
+    response_model=JobOut,
+    status_code=202,
+    dependencies=[Depends(rate_limit("ai:draft", lambda: settings.RATE_LIMIT_AI_PER_MINUTE))],
+)
+def create_draft_job(payload: DraftReplyIn, db: Session = Depends(get_db), user=Depends(require_auth_user)):
+    """Queue a draft; poll GET /ai/jobs/{id}. The result also lands in the draft cache."""
+    if not db.scalar(select(Ticket.id).where(Ticket.id == payload.ticket_id, Ticket.org_id == user.org_id)):
+        raise HTTPException(status_code=404, detail="ticket not found")
+    return _job_out(enqueue_draft(user.org_id, payload.ticket_id, payload.tone))
+
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+def get_draft_job(job_id: str, user=Depends(require_auth_user)):
+    job = job_queue.get(job_id)
+    if not job or job.org_id != user.org_id:
+        raise HTTPException(status_code=404, detail="job not found")
+    return _job_out(job)
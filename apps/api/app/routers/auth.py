@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
-
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel, EmailStr, Field
 from sqlalchemy import select
@@ -9,36 +7,26 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.db import get_db
+from app.core.query_budget import route_budget
+from app.core.rate_limit import rate_limit
 from app.core.security import (
+    access_token_claims,
     clear_auth_cookies,
     create_access_token,
-    create_refresh_token,
     decode_token,
     get_current_user_from_request,
-    hash_jti,
     hash_password,
+    needs_rehash,
     set_auth_cookies,
     verify_password,
 )
 from app.models.org import Org
-from app.models.refresh_token import RefreshToken
 from app.models.user import User
+from app.services.session_store import session_store
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-def _utcnow() -> datetime:
-    return datetime.now(timezone.utc)
-
-
-def _as_utc_aware(dt: datetime) -> datetime:
-    if dt is None:
-        return None  # type: ignore[return-value]
-    if dt.tzinfo is None:
-        return dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(timezone.utc)
-
-
 # -------- schemas (inline) --------
 
 class SignupIn(BaseModel):
@@ -74,14 +62,14 @@ def _ensure_user_has_org(db: Session, user: User) -> User:
 
     user.org_id = org.id  # type: ignore[attr-defined]
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    db.flush()  # the caller's commit (with the new refresh token) makes it stick
     return user
 
 
 # -------- routes --------
 
 @router.post("/signup", response_model=MeOut)
+@route_budget(6)
 def signup(payload: SignupIn, response: Response, db: Session = Depends(get_db)):
     existing = db.scalar(select(User).where(User.email == payload.email))
     if existing:
@@ -99,44 +87,36 @@ def signup(payload: SignupIn, response: Response, db: Session = Depends(get_db))
         org_id=org.id,  # <-- critical
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
-
-    access = create_access_token({"sub": str(user.id)})
-    refresh, jti = create_refresh_token({"sub": str(user.id)})
+    db.flush()  # user.id; org, user and refresh token commit together
 
-    rt = RefreshToken(
-        user_id=user.id,
-        jti_hash=hash_jti(jti),
-        expires_at=_utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-        revoked=False,
-    )
-    db.add(rt)
+    access = create_access_token(access_token_claims(user))
+    refresh = session_store.issue(db, user)
     db.commit()
 
     set_auth_cookies(response, access, refresh)
     return user
 
 
-@router.post("/login", response_model=MeOut)
+@router.post(
+    "/login",
+    response_model=MeOut,
+    dependencies=[Depends(rate_limit("auth:login", lambda: settings.RATE_LIMIT_LOGIN_PER_MINUTE, key_by="ip"))],
+)
+@route_budget(4)
 def login(payload: LoginIn, response: Response, db: Session = Depends(get_db)):
     user = db.scalar(select(User).where(User.email == payload.email))
     if not user or not verify_password(payload.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    # BCRYPT_ROUNDS changed since this hash was made: upgrade it while we have the plaintext
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(payload.password)
+
     # ensure org_id exists (fix for previously-created users)
     user = _ensure_user_has_org(db, user)
 
-    access = create_access_token({"sub": str(user.id)})
-    refresh, jti = create_refresh_token({"sub": str(user.id)})
-
-    rt = RefreshToken(
-        user_id=user.id,
-        jti_hash=hash_jti(jti),
-        expires_at=_utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-        revoked=False,
-    )
-    db.add(rt)
+    access = create_access_token(access_token_claims(user))
+    refresh = session_store.issue(db, user)
     db.commit()
 
     set_auth_cookies(response, access, refresh)
@@ -149,13 +129,8 @@ def logout(request: Request, response: Response, db: Session = Depends(get_db)):
     if token:
         try:
             payload = decode_token(token)
-            jti = payload.get("jti")
-            if jti:
-                jh = hash_jti(jti)
-                rt = db.scalar(select(RefreshToken).where(RefreshToken.jti_hash == jh))
-                if rt:
-                    rt.revoked = True
-                    db.commit()
+            if payload.get("jti"):
+                session_store.revoke(db, payload)
         except Exception:
             pass
 
@@ -164,11 +139,13 @@ def logout(request: Request, response: Response, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=MeOut)
+@route_budget(1)
 def me(request: Request, db: Session = Depends(get_db)):
     return get_current_user_from_request(request, db)
 
 
 @router.post("/refresh")
+@route_budget(5)
 def refresh(request: Request, response: Response, db: Session = Depends(get_db)):
     token = request.cookies.get(settings.REFRESH_COOKIE_NAME)
     if not token:
@@ -183,36 +160,20 @@ def refresh(request: Request, response: Response, db: Session = Depends(get_db))
     if not sub or not jti:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-    jh = hash_jti(jti)
-    rt = db.scalar(select(RefreshToken).where(RefreshToken.jti_hash == jh))
-
-    now = _utcnow()
-    expires_at = _as_utc_aware(rt.expires_at) if rt else None
-
-    if (not rt) or rt.revoked or (expires_at is not None and expires_at < now):
-        raise HTTPException(status_code=401, detail="Refresh token revoked/expired")
-
-    rt.revoked = True
+    # postgres store: rotates in this transaction; redis store: one Lua call, db untouched
+    session = session_store.rotate(db, payload)
+    claims = session.claims
+    if claims is None:
+        user = db.query(User).filter(User.id == session.user_id).first()
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid user")
 
-    user = db.query(User).filter(User.id == int(sub)).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid user")
-
-    # ensure org_id exists even on refresh
-    user = _ensure_user_has_org(db, user)
-
-    access = create_access_token({"sub": str(user.id)})
-    new_refresh, new_jti = create_refresh_token({"sub": str(user.id)})
-
-    new_rt = RefreshToken(
-        user_id=user.id,
-        jti_hash=hash_jti(new_jti),
-        expires_at=_utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-        revoked=False,
-    )
+        # ensure org_id exists even on refresh
+        user = _ensure_user_has_org(db, user)
+        claims = access_token_claims(user)
 
-    db.add(new_rt)
+    access = create_access_token(claims)
     db.commit()
 
-    set_auth_cookies(response, access, new_refresh)
+    set_auth_cookies(response, access, session.token)
     return {"ok": True}
@@ -0,0 +1,153 @@
+"""
+AsyncSession version of app.routers.auth (settings.DB_ASYNC).
+"""
+from __future__ import annotations
+
+from typing import Callable, Optional, TypeVar
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import get_async_db
+from app.core.query_budget import route_budget
+from app.core.rate_limit import rate_limit
+from app.core.security import (
+    access_token_claims,
+    clear_auth_cookies,
+    create_access_token,
+    decode_token,
+    get_current_user_from_request_async,
+    hash_password_async,
+    needs_rehash,
+    set_auth_cookies,
+    verify_password_async,
+)
+from app.models.org import Org
+from app.models.user import User
+from app.routers.auth import (
+    LoginIn,
+    MeOut,
+    SignupIn,
+    _ensure_user_has_org,
+)
+from app.services.session_store import session_store
+
+router = APIRouter(prefix="/auth", tags=["auth"])
+
+T = TypeVar("T")
+
+
+async def _in_store(db: AsyncSession, fn: Callable[[Optional[Session]], T]) -> T:
+    """Run a session_store call: on the request's session if the store uses the DB, else in the threadpool."""
+    if session_store.uses_db:
+        return await db.run_sync(fn)
+    return await run_in_threadpool(fn, None)
+
+
+@router.post("/signup", response_model=MeOut)
+@route_budget(6)
+async def signup(payload: SignupIn, response: Response, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(User).where(User.email == payload.email))
+    if existing:
+        raise HTTPException(status_code=400, detail="Email already in use")
+
+    org = Org(name=f"{payload.email.split('@')[0]}'s org")
+    db.add(org)
+    await db.flush()
+
+    user = User(
+        email=payload.email,
+        password_hash=await hash_password_async(payload.password),
+        org_id=org.id,
+    )
+    db.add(user)
+    await db.flush()  # user.id; org, user and refresh token commit together
+
+    access = create_access_token(access_token_claims(user))
+    refresh = await _in_store(db, lambda s: session_store.issue(s, user))
+    await db.commit()
+
+    set_auth_cookies(response, access, refresh)
+    return user
+
+
+@router.post(
+    "/login",
+    response_model=MeOut,
+    dependencies=[Depends(rate_limit("auth:login", lambda: settings.RATE_LIMIT_LOGIN_PER_MINUTE, key_by="ip"))],
+)
+@route_budget(4)
+async def login(payload: LoginIn, response: Response, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == payload.email))
+    if not user or not await verify_password_async(payload.password, user.password_hash):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    if needs_rehash(user.password_hash):
+        user.password_hash = await hash_password_async(payload.password)
+
+    user = await db.run_sync(lambda s: _ensure_user_has_org(s, user))
+
+    access = create_access_token(access_token_claims(user))
+    refresh = await _in_store(db, lambda s: session_store.issue(s, user))
+    await db.commit()
+
+    set_auth_cookies(response, access, refresh)
+    return user
+
+
+@router.post("/logout")
+async def logout(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    token = request.cookies.get(settings.REFRESH_COOKIE_NAME)
+    if token:
+        try:
+            payload = decode_token(token)
+            if payload.get("jti"):
+                await _in_store(db, lambda s: session_store.revoke(s, payload))
+        except Exception:
+            pass
+
+    clear_auth_cookies(response)
+    return {"ok": True}
+
+
+@router.get("/me", response_model=MeOut)
+@route_budget(1)
+async def me(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await get_current_user_from_request_async(request, db)
+
+
+@router.post("/refresh")
+@route_budget(5)
+async def refresh(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    token = request.cookies.get(settings.REFRESH_COOKIE_NAME)
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing refresh token")
+
+    payload = decode_token(token)
+    if payload.get("typ") != "refresh":
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    sub = payload.get("sub")
+    jti = payload.get("jti")
+    if not sub or not jti:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    session = await _in_store(db, lambda s: session_store.rotate(s, payload))
+    claims = session.claims
+    if claims is None:
+        user = await db.get(User, session.user_id)
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid user")
+
+        user = await db.run_sync(lambda s: _ensure_user_has_org(s, user))
+        claims = access_token_claims(user)
+
+    access = create_access_token(claims)
+    await db.commit()
+
+    set_auth_cookies(response, access, session.token)
+    return {"ok": True}
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.security import auth_user_from_token, get_auth_user_from_request
+from app.core.user_cache import AuthUser
+from app.services.events import Subscription, broker
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+async def _authenticate(conn: HTTPConnection) -> AuthUser:
+    """
+    Token claims / user cache first; a DB lookup only for old tokens, on a session
+    that is closed right away (long-lived connections must not pin DB connections).
+    """
+    user = auth_user_from_token(conn)
+    if user is None:
+
+        def _lookup() -> AuthUser:
+            with SessionLocal() as db:
+                return get_auth_user_from_request(conn, db)
+
+        user = await run_in_threadpool(_lookup)
+    if not user.org_id:
+        raise HTTPException(status_code=403, detail="User has no org")
+    return user
+
+
+def _subscribe(user: AuthUser) -> Subscription:
+    sub = broker.subscribe(user.org_id)
+    if sub is None:
+        raise HTTPException(status_code=503, detail="Too many event connections", headers={"Retry-After": "5"})
+    return sub
+
+
+@router.get("/stream")
+async def event_stream(request: Request):
+    """
+    Server-Sent Events for the caller's org: `ticket` events (JSON in data), comment
+    heartbeats, and `resync` when the client fell behind (catch up via /tickets/changes).
+    """
+    user = await _authenticate(request)
+    sub = _subscribe(user)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    data = await asyncio.wait_for(sub.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {data}\n\n"
+        finally:
+            broker.unsubscribe(sub)
+
+    # the generator's finally never runs if the client leaves before the first chunk;
+    # the background task does (unsubscribe is idempotent)
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(broker.unsubscribe, sub),
+    )
+
+
+@router.websocket("/ws")
+async def event_socket(ws: WebSocket):
+    """Same events as /events/stream, one JSON text frame each."""
+    try:
+        user = await _authenticate(ws)
+        sub = _subscribe(user)
+    except HTTPException as e:
+        code = status.WS_1013_TRY_AGAIN_LATER if e.status_code == 503 else status.WS_1008_POLICY_VIOLATION
+        await ws.close(code=code, reason=str(e.detail))
+        return
+
+    await ws.accept()
+
+    async def _drain_client() -> None:
+        # clients don't send anything meaningful; reading is how a close is noticed
+        while True:
+            await ws.receive_text()
+
+    reader = asyncio.create_task(_drain_client())
+    getter: asyncio.Future | None = None
+    try:
+        while not reader.done():
+            getter = asyncio.ensure_future(sub.get())
+            done, _ = await asyncio.wait(
+                {getter, reader}, timeout=settings.EVENTS_HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter in done:
+                await ws.send_text(getter.result())
+            else:
+                getter.cancel()
+                if not done:
+                    await ws.send_text('{"type":"ping"}')
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if getter is not None:
+            getter.cancel()
+        reader.cancel()
+        # retrieve the reader's WebSocketDisconnect (or CancelledError) so it isn't logged as never retrieved
+        await asyncio.gather(reader, return_exceptions=True)
+        broker.unsubscribe(sub)
@@ -5,45 +5,42 @@ from sqlalchemy import select
 from app.core.db import get_db
 from app.models.kb import KBArticle
 from app.schemas.kb import KBCreateIn
+from app.services.kb_index import kb_index
+from app.services.kb_search import search_articles
 from app.routers._deps import get_current_user
+from app.utils.fastjson import LeanJSONResponse
+from app.utils.tags import csv_to_tags, tags_to_csv
 
 router = APIRouter()
 
-def _tags_to_csv(tags: list[str]) -> str:
-    clean = []
-    for t in tags:
-        x = (t or "").strip()
-        if x:
-            clean.append(x)
-    return ",".join(clean)
-
-def _csv_to_tags(s: str) -> list[str]:
-    if not s:
-        return []
-    return [x for x in (p.strip() for p in s.split(",")) if x]
-
 @router.post("")
 def create_article(payload: KBCreateIn, db: Session = Depends(get_db), _=Depends(get_current_user)):
-    a = KBArticle(title=payload.title.strip(), body=payload.body, tags_csv=_tags_to_csv(payload.tags))
+    a = KBArticle(title=payload.title.strip(), body=payload.body, tags_csv=tags_to_csv(payload.tags))
     db.add(a)
     db.commit()
     db.refresh(a)
-    return {"id": a.id, "title": a.title, "body": a.body, "tags": _csv_to_tags(a.tags_csv)}
+    kb_index.add_article(a.id, a.title, a.body)
+    return {"id": a.id, "title": a.title, "body": a.body, "tags": csv_to_tags(a.tags_csv)}
+
+def _list_articles_query():
+    # columns only: no ORM objects for a read-only listing
+    return select(KBArticle.id, KBArticle.title, KBArticle.body, KBArticle.tags_csv).order_by(KBArticle.id.desc())
+
+def _article_items(rows) -> list[dict]:
+    return [{"id": i, "title": title, "body": body, "tags": csv_to_tags(tags)} for i, title, body, tags in rows]
 
 @router.get("")
 def list_articles(db: Session = Depends(get_db), _=Depends(get_current_user)):
-    items = db.scalars(select(KBArticle).order_by(KBArticle.id.desc())).all()
-    return {"items": [{"id": a.id, "title": a.title, "body": a.body, "tags": _csv_to_tags(a.tags_csv)} for a in items]}
+    return LeanJSONResponse({"items": _article_items(db.execute(_list_articles_query()))})
 
 @router.get("/search")
-def search(q: str, db: Session = Depends(get_db), _=Depends(get_current_user)):
-    q2 = f"%{q.strip()}%"
-    items = db.scalars(select(KBArticle).where(KBArticle.title.ilike(q2)).order_by(KBArticle.id.desc())).all()
-    return {"items": [{"id": a.id, "title": a.title, "body": a.body, "tags": _csv_to_tags(a.tags_csv)} for a in items]}
+def search(q: str, limit: int = 10, db: Session = Depends(get_db), _=Depends(get_current_user)):
+    # ranked full-text search over title/tags/body; items carry a snippet instead of the body
+    return {"items": search_articles(db, q, limit)}
 
 @router.get("/{article_id}")
 def get_article(article_id: int, db: Session = Depends(get_db), _=Depends(get_current_user)):
     a = db.scalar(select(KBArticle).where(KBArticle.id == article_id))
     if not a:
         raise HTTPException(status_code=404, detail="Article not found")
-    return {"id": a.id, "title": a.title, "body": a.body, "tags": _csv_to_tags(a.tags_csv)}
+    return {"id": a.id, "title": a.title, "body": a.body, "tags": csv_to_tags(a.tags_csv)}
@@ -0,0 +1,47 @@
+"""
+AsyncSession version of app.routers.kb (settings.DB_ASYNC).
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_async_db
+from app.core.security import require_auth_user_async
+from app.models.kb import KBArticle
+from app.routers.kb import _article_items, _list_articles_query
+from app.schemas.kb import KBCreateIn
+from app.services.kb_index import kb_index
+from app.services.kb_search import search_articles
+from app.utils.fastjson import LeanJSONResponse
+from app.utils.tags import csv_to_tags, tags_to_csv
+
+router = APIRouter()
+
+
+@router.post("")
+async def create_article(payload: KBCreateIn, db: AsyncSession = Depends(get_async_db), _=Depends(require_auth_user_async)):
+    a = KBArticle(title=payload.title.strip(), body=payload.body, tags_csv=tags_to_csv(payload.tags))
+    db.add(a)
+    await db.commit()
+    await db.refresh(a)
+    await run_in_threadpool(kb_index.add_article, a.id, a.title, a.body)
+    return {"id": a.id, "title": a.title, "body": a.body, "tags": csv_to_tags(a.tags_csv)}
+
+
+@router.get("")
+async def list_articles(db: AsyncSession = Depends(get_async_db), _=Depends(require_auth_user_async)):
+    return LeanJSONResponse({"items": _article_items(await db.execute(_list_articles_query()))})
+
+
+@router.get("/search")
+async def search(q: str, limit: int = 10, db: AsyncSession = Depends(get_async_db), _=Depends(require_auth_user_async)):
+    return {"items": await db.run_sync(lambda s: search_articles(s, q, limit))}
+
+
+@router.get("/{article_id}")
+async def get_article(article_id: int, db: AsyncSession = Depends(get_async_db), _=Depends(require_auth_user_async)):
+    a = await db.scalar(select(KBArticle).where(KBArticle.id == article_id))
+    if not a:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return {"id": a.id, "title": a.title, "body": a.body, "tags": csv_to_tags(a.tags_csv)}
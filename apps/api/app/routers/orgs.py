@@ -1,10 +1,17 @@
+from typing import List, Optional
+
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
 from app.core.db import get_db
-from app.core.security import require_user
+from app.core.query_budget import route_budget
+from app.core.security import require_auth_user
+from app.core.user_cache import AuthUser
 from app.models.org import Org
+from app.utils.cursor import InvalidCursor, decode_int_cursor, encode_cursor
+from app.utils.fastjson import LeanJSONResponse, row_dicts
 
 router = APIRouter(prefix="/orgs", tags=["orgs"])
 
@@ -21,14 +28,47 @@ class OrgOut(BaseModel):
         from_attributes = True
 
 
-@router.get("", response_model=dict)
-def list_orgs(db: Session = Depends(get_db), user=Depends(require_user)):
-    items = db.query(Org).order_by(Org.id.desc()).all()
-    return {"items": items}
+class OrgListOut(BaseModel):
+    items: List[OrgOut]
+    next_cursor: Optional[str] = None
+
+
+def _list_orgs_query(org_ids: list[int], limit: int, cursor: str | None):
+    # columns only: no Org entities, so nothing can lazy-load users / tickets
+    q = select(Org.id, Org.name).where(Org.id.in_(org_ids)).order_by(Org.id.desc()).limit(limit)
+    if cursor:
+        try:
+            q = q.where(Org.id < decode_int_cursor(cursor))
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return q
+
+
+def _caller_org_ids(user: AuthUser) -> list[int]:
+    return [user.org_id] if user.org_id else []
+
+
+def _org_page(items: list[dict], limit: int) -> dict:
+    return {"items": items, "next_cursor": encode_cursor(items[-1]["id"]) if len(items) == limit else None}
+
+
+@router.get("", response_model=OrgListOut)
+@route_budget(1, auth_lookup=True)
+def list_orgs(
+    db: Session = Depends(get_db),
+    user: AuthUser = Depends(require_auth_user),
+    limit: int = 50,
+    cursor: str | None = None,
+):
+    """The caller's orgs, newest first; `?cursor=` takes the previous page's next_cursor."""
+    limit = min(max(limit, 1), 100)
+    org_ids = _caller_org_ids(user)
+    items = row_dicts(db.execute(_list_orgs_query(org_ids, limit, cursor))) if org_ids else []
+    return LeanJSONResponse(_org_page(items, limit))
 
 
 @router.post("", response_model=OrgOut)
-def create_org(payload: OrgCreate, db: Session = Depends(get_db), user=Depends(require_user)):
+def create_org(payload: OrgCreate, db: Session = Depends(get_db), user=Depends(require_auth_user)):
     existing = db.query(Org).filter(Org.name == payload.name).first()
     if existing:
         raise HTTPException(status_code=400, detail="Org name already exists")
@@ -0,0 +1,43 @@
+"""
+AsyncSession version of app.routers.orgs (settings.DB_ASYNC).
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_async_db
+from app.core.query_budget import route_budget
+from app.core.security import require_auth_user_async
+from app.core.user_cache import AuthUser
+from app.models.org import Org
+from app.routers.orgs import OrgCreate, OrgListOut, OrgOut, _caller_org_ids, _list_orgs_query, _org_page
+from app.utils.fastjson import LeanJSONResponse, row_dicts
+
+router = APIRouter(prefix="/orgs", tags=["orgs"])
+
+
+@router.get("", response_model=OrgListOut)
+@route_budget(1, auth_lookup=True)
+async def list_orgs(
+    db: AsyncSession = Depends(get_async_db),
+    user: AuthUser = Depends(require_auth_user_async),
+    limit: int = 50,
+    cursor: str | None = None,
+):
+    limit = min(max(limit, 1), 100)
+    org_ids = _caller_org_ids(user)
+    items = row_dicts(await db.execute(_list_orgs_query(org_ids, limit, cursor))) if org_ids else []
+    return LeanJSONResponse(_org_page(items, limit))
+
+
+@router.post("", response_model=OrgOut)
+async def create_org(payload: OrgCreate, db: AsyncSession = Depends(get_async_db), user=Depends(require_auth_user_async)):
+    existing = await db.scalar(select(Org).where(Org.name == payload.name))
+    if existing:
+        raise HTTPException(status_code=400, detail="Org name already exists")
+
+    org = Org(name=payload.name)
+    db.add(org)
+    await db.commit()
+    await db.refresh(org)
+    return org
@@ -1,19 +1,34 @@
 from __future__ import annotations
 
+import logging
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
-from sqlalchemy import select, desc
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, select, desc, tuple_
+from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.db import get_db
-from app.core.security import get_current_user_from_request
+from app.core.query_budget import route_budget
+from app.core.rate_limit import rate_limit
+from app.core.security import get_auth_user_from_request, require_roles
 from app.models.ticket import Ticket, TicketPriority, TicketStatus
 from app.models.ticket_message import TicketMessage, MessageRole
+from app.models.ticket_tombstone import TicketTombstone
+from app.services.changes import next_change_seq
+from app.services.draft_cache import draft_cache
+from app.services.ticket_stats import bump_stats, ticket_moved
+from app.services.events import publish, ticket_event
+from app.services.jobs import enqueue_draft
+from app.services.ticket_cache import detail_etag, etag_matches, ticket_cache
+from app.utils.cursor import InvalidCursor, decode_datetime_id_cursor, decode_int_cursor, encode_cursor
+from app.utils.fastjson import LeanJSONResponse, dumps, row_dicts
 
 router = APIRouter(prefix="/tickets", tags=["tickets"])
+log = logging.getLogger(__name__)
 
 
 def _utcnow() -> datetime:
@@ -65,18 +80,222 @@ class TicketUpdateIn(BaseModel):
     subject: str | None = Field(default=None, min_length=3, max_length=200)
 
 
+def _update_changes_anything(payload: TicketUpdateIn) -> bool:
+    return payload.subject is not None or payload.status is not None or payload.priority is not None
+
+
+def _apply_update(t: Ticket, payload: TicketUpdateIn) -> tuple[TicketStatus, TicketPriority]:
+    """-> the (status, priority) the ticket had before."""
+    before = (t.status, t.priority)
+    if payload.subject is not None:
+        t.subject = payload.subject
+    if payload.status is not None:
+        t.status = payload.status
+    if payload.priority is not None:
+        t.priority = payload.priority
+    t.updated_at = _utcnow()
+    return before
+
+
+def _pregenerate_draft(org_id: int, ticket_id: int) -> None:
+    """Best effort: have a draft waiting (in the draft cache) by the time an agent opens the ticket."""
+    if not settings.AI_PREGENERATE_ON_MESSAGE:
+        return
+    try:
+        enqueue_draft(org_id, ticket_id, settings.AI_PREGENERATE_TONE)
+    except Exception:
+        log.warning("could not enqueue draft pre-generation for ticket %s", ticket_id, exc_info=True)
+
+
+def _ticket_event(kind: str, t: Ticket) -> dict:
+    return ticket_event(
+        kind,
+        t.org_id,
+        t.id,
+        t.change_seq,
+        status=t.status.value,
+        priority=t.priority.value,
+        updated_at=t.updated_at.isoformat(),
+    )
+
+
+def _message_event(org_id: int, msg: TicketMessage) -> dict:
+    return ticket_event("message.created", org_id, msg.ticket_id, msg.change_seq, message_id=msg.id, role=msg.role.value)
+
+
+MESSAGES_PAGE_MAX = 200
+
+
+def _decode_before(before: str | None) -> int | None:
+    if not before:
+        return None
+    try:
+        return decode_int_cursor(before)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# lean read path (app.utils.fastjson): exactly the TicketOut / MessageOut fields
+TICKET_COLUMNS = (
+    Ticket.id,
+    Ticket.org_id,
+    Ticket.subject,
+    Ticket.status,
+    Ticket.priority,
+    Ticket.created_at,
+    Ticket.updated_at,
+)
+MESSAGE_COLUMNS = (
+    TicketMessage.id,
+    TicketMessage.ticket_id,
+    TicketMessage.role,
+    TicketMessage.content,
+    TicketMessage.created_at,
+)
+
+
+TicketSort = Literal["-updated_at", "updated_at", "-created_at", "created_at"]
+
+
+@dataclass(frozen=True)
+class TicketListFilters:
+    status: TicketStatus | None = None
+    priority: TicketPriority | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    updated_from: datetime | None = None
+    updated_to: datetime | None = None
+    subject_prefix: str | None = None
+    sort: TicketSort = "-updated_at"
+
+
+def ticket_list_filters(
+    status: TicketStatus | None = None,
+    priority: TicketPriority | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    updated_from: datetime | None = None,
+    updated_to: datetime | None = None,
+    subject_prefix: str | None = Query(default=None, min_length=1, max_length=200),
+    sort: TicketSort = "-updated_at",
+) -> TicketListFilters:
+    """Query params of GET /tickets (ranges: *_from inclusive, *_to exclusive)."""
+    return TicketListFilters(status, priority, created_from, created_to, updated_from, updated_to, subject_prefix, sort)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _list_tickets_query(org_id: int, limit: int, offset: int, cursor: str | None, f: TicketListFilters):
+    """
+    Every filter combination is served by an (org_id, ...) index (see Ticket.__table_args__
+    and bench/explain_ticket_filters.py); keyset paging follows the chosen sort column.
+    """
+    sort_col = Ticket.created_at if f.sort.endswith("created_at") else Ticket.updated_at
+    descending = f.sort.startswith("-")
+
+    q = select(*TICKET_COLUMNS).where(Ticket.org_id == org_id)
+    if f.status is not None:
+        q = q.where(Ticket.status == f.status)
+    if f.priority is not None:
+        q = q.where(Ticket.priority == f.priority)
+    if f.created_from is not None:
+        q = q.where(Ticket.created_at >= f.created_from)
+    if f.created_to is not None:
+        q = q.where(Ticket.created_at < f.created_to)
+    if f.updated_from is not None:
+        q = q.where(Ticket.updated_at >= f.updated_from)
+    if f.updated_to is not None:
+        q = q.where(Ticket.updated_at < f.updated_to)
+    if f.subject_prefix:
+        # case-insensitive prefix: ix_tickets_org_subject_lower (text_pattern_ops on Postgres)
+        q = q.where(func.lower(Ticket.subject).like(_escape_like(f.subject_prefix.lower()) + "%", escape="\\"))
+
+    if descending:
+        q = q.order_by(desc(sort_col), desc(Ticket.id))
+    else:
+        q = q.order_by(sort_col, Ticket.id)
+    q = q.limit(limit)
+
+    if cursor:
+        try:
+            value, ticket_id = decode_datetime_id_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        key, after = tuple_(sort_col, Ticket.id), tuple_(value, ticket_id)
+        return q.where(key < after if descending else key > after)
+    return q.offset(max(offset, 0))
+
+
+def _next_cursor_headers(items: list[dict], limit: int, sort: TicketSort = "-updated_at") -> dict[str, str]:
+    if len(items) < limit:
+        return {}
+    last = items[-1]
+    return {"X-Next-Cursor": encode_cursor(last[sort.lstrip("-")], last["id"])}
+
+
+def _ticket_query(ticket_id: int, org_id: int):
+    """TICKET_COLUMNS plus change_seq: the detail's version (cache key and ETag)."""
+    return select(*TICKET_COLUMNS, Ticket.change_seq).where(Ticket.id == ticket_id, Ticket.org_id == org_id)
+
+
+def _thread_query(ticket_id: int, as_of: int | None = None):
+    q = select(*MESSAGE_COLUMNS).where(TicketMessage.ticket_id == ticket_id).order_by(TicketMessage.id)
+    if as_of is not None:
+        q = q.where(TicketMessage.change_seq <= as_of)
+    return q
+
+
+def _messages_page_query(ticket_id: int, before: int | None, limit: int, as_of: int | None = None):
+    """Newest first, one extra row to know whether an older page exists (ix_ticket_messages_ticket_id_id)."""
+    q = (
+        select(*MESSAGE_COLUMNS)
+        .where(TicketMessage.ticket_id == ticket_id)
+        .order_by(desc(TicketMessage.id))
+        .limit(limit + 1)
+    )
+    if before is not None:
+        q = q.where(TicketMessage.id < before)
+    if as_of is not None:
+        q = q.where(TicketMessage.change_seq <= as_of)
+    return q
+
+
+def _detail_response(body: bytes | None, etag: str, cursor: str | None = None) -> Response:
+    """body None: 304 Not Modified. no-cache: clients may keep it but must revalidate."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if cursor:
+        headers["X-Messages-Cursor"] = cursor
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _messages_page(rows: list[dict], limit: int) -> tuple[list[dict], str | None]:
+    """-> (page in thread order, cursor for the next older page or None)."""
+    page = rows[:limit][::-1]
+    return page, encode_cursor(page[0]["id"]) if len(rows) > limit else None
+
+
 def _require_org_user(request: Request, db: Session):
-    user = get_current_user_from_request(request, db)
+    user = get_auth_user_from_request(request, db)
     org_id = getattr(user, "org_id", None)
     if not org_id:
         raise HTTPException(status_code=400, detail="User has no org_id assigned")
     return user, org_id
 
 
-@router.post("", response_model=TicketOut)
+@router.post(
+    "",
+    response_model=TicketOut,
+    dependencies=[Depends(rate_limit("tickets:create", lambda: settings.RATE_LIMIT_TICKET_CREATE_PER_MINUTE, key_by="org"))],
+)
+@route_budget(5, auth_lookup=True)
 def create_ticket(payload: TicketCreateIn, request: Request, db: Session = Depends(get_db)):
     _, org_id = _require_org_user(request, db)
     now = _utcnow()
+    seq = next_change_seq(db, org_id, 2)
 
     t = Ticket(
         org_id=org_id,
@@ -85,6 +304,7 @@ def create_ticket(payload: TicketCreateIn, request: Request, db: Session = Depen
         priority=payload.priority,
         created_at=now,
         updated_at=now,
+        change_seq=seq + 1,
     )
     db.add(t)
     db.flush()
@@ -94,43 +314,117 @@ def create_ticket(payload: TicketCreateIn, request: Request, db: Session = Depen
         role=MessageRole.user,
         content=payload.message,
         created_at=now,
+        change_seq=seq,
     )
     db.add(m)
+    bump_stats(db, org_id, {(t.status, t.priority): 1})
     db.commit()
     db.refresh(t)
+    publish(org_id, _ticket_event("ticket.created", t))
     return t
 
 
 @router.get("", response_model=List[TicketOut])
-def list_tickets(request: Request, db: Session = Depends(get_db), limit: int = 20, offset: int = 0):
+@route_budget(1, auth_lookup=True)
+def list_tickets(
+    request: Request,
+    db: Session = Depends(get_db),
+    limit: int = 20,
+    offset: int = 0,
+    cursor: str | None = None,
+    filters: TicketListFilters = Depends(ticket_list_filters),
+):
+    """
+    Two paging modes:
+    - offset (legacy): `?limit=&offset=`
+    - keyset: `?cursor=` with the value of the previous page's `X-Next-Cursor` header.
+      Ordered by (updated_at, id) DESC and served by ix_tickets_org_updated_id, so
+      page N costs the same as page 1. A ticket bumped by add_message while paging
+      moves to the front; it is never returned twice and no other row is skipped.
+
+    Filters: status, priority, created_from/created_to, updated_from/updated_to,
+    subject_prefix (case-insensitive). sort: -updated_at (default), updated_at,
+    -created_at, created_at. Keep filters and sort unchanged while following a cursor.
+    """
     _, org_id = _require_org_user(request, db)
+    limit = min(max(limit, 1), 100)
 
-    q = (
-        select(Ticket)
-        .where(Ticket.org_id == org_id)
-        .order_by(desc(Ticket.updated_at))
-        .limit(min(max(limit, 1), 100))
-        .offset(max(offset, 0))
-    )
-    return list(db.scalars(q).all())
+    items = row_dicts(db.execute(_list_tickets_query(org_id, limit, offset, cursor, filters)))
+    return LeanJSONResponse(items, headers=_next_cursor_headers(items, limit, filters.sort))
 
 
 @router.get("/{ticket_id}", response_model=TicketDetailOut)
-def get_ticket(ticket_id: int, request: Request, db: Session = Depends(get_db)):
+@route_budget(2, auth_lookup=True)
+def get_ticket(
+    ticket_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    messages_limit: int | None = None,
+):
+    """
+    Whole thread by default. With `?messages_limit=N` only the newest N messages
+    (oldest first); `X-Messages-Cursor` then points at older ones, see
+    GET /tickets/{id}/messages?before=.
+
+    The body is cached per ticket version (app.services.ticket_cache): a hit costs
+    the one ticket-row lookup, and `If-None-Match` with the current ETag gets a 304.
+    """
     _, org_id = _require_org_user(request, db)
 
-    q = (
-        select(Ticket)
-        .where(Ticket.id == ticket_id, Ticket.org_id == org_id)
-        .options(selectinload(Ticket.messages))
-    )
-    t = db.scalar(q)
-    if not t:
+    found = row_dicts(db.execute(_ticket_query(ticket_id, org_id)))
+    if not found:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    return t
+    ticket = found[0]
+    version = ticket.pop("change_seq")
+    limit = None if messages_limit is None else min(max(messages_limit, 1), MESSAGES_PAGE_MAX)
+
+    etag = detail_etag(ticket_id, version, limit)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return _detail_response(None, etag)
+    cached = ticket_cache.get(ticket_id, version, limit)
+    if cached is not None:
+        return _detail_response(cached[0], etag, cached[1])
+
+    # messages as of `version`: one committed after the ticket row was read belongs to the next version
+    cursor = None
+    if limit is None:
+        ticket["messages"] = row_dicts(db.execute(_thread_query(ticket_id, version)))
+    else:
+        rows = row_dicts(db.execute(_messages_page_query(ticket_id, None, limit, version)))
+        ticket["messages"], cursor = _messages_page(rows, limit)
+    body = dumps(ticket)
+    ticket_cache.set(ticket_id, version, limit, body, cursor)
+    return _detail_response(body, etag, cursor)
+
+
+@router.get("/{ticket_id}/messages", response_model=List[MessageOut])
+@route_budget(2, auth_lookup=True)
+def list_messages(
+    ticket_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    before: str | None = None,
+    limit: int = 50,
+):
+    """
+    Older messages of a thread, `limit` per page, each page in thread order.
+    Start from `X-Messages-Cursor` of the ticket detail (or without `before` for
+    the newest page); `X-Next-Cursor` is set while older messages remain.
+    """
+    _, org_id = _require_org_user(request, db)
+    before_id = _decode_before(before)
+
+    if not db.scalar(select(Ticket.id).where(Ticket.id == ticket_id, Ticket.org_id == org_id)):
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    limit = min(max(limit, 1), MESSAGES_PAGE_MAX)
+    rows = row_dicts(db.execute(_messages_page_query(ticket_id, before_id, limit)))
+    page, cursor = _messages_page(rows, limit)
+    return LeanJSONResponse(page, headers={"X-Next-Cursor": cursor} if cursor else None)
 
 
 @router.post("/{ticket_id}/messages", response_model=MessageOut)
+@route_budget(6, auth_lookup=True)
 def add_message(ticket_id: int, payload: AddMessageIn, request: Request, db: Session = Depends(get_db)):
     _, org_id = _require_org_user(request, db)
 
@@ -139,42 +433,75 @@ def add_message(ticket_id: int, payload: AddMessageIn, request: Request, db: Ses
         raise HTTPException(status_code=404, detail="Ticket not found")
 
     now = _utcnow()
+    seq = next_change_seq(db, org_id)
     msg = TicketMessage(
         ticket_id=t.id,
         role=payload.role,
         content=payload.content,
         created_at=now,
+        change_seq=seq,
     )
     t.updated_at = now
+    t.change_seq = seq
 
     db.add(msg)
     db.commit()
     db.refresh(msg)
+    draft_cache.invalidate_ticket(t.id)
+    ticket_cache.invalidate_ticket(t.id)
+    publish(org_id, _message_event(org_id, msg))
+    if msg.role == MessageRole.user:
+        _pregenerate_draft(org_id, t.id)
     return msg
 
 
 @router.patch("/{ticket_id}", response_model=TicketOut)
+@route_budget(5, auth_lookup=True)
 def update_ticket(ticket_id: int, payload: TicketUpdateIn, request: Request, db: Session = Depends(get_db)):
     _, org_id = _require_org_user(request, db)
-
-    t = db.scalar(select(Ticket).where(Ticket.id == ticket_id, Ticket.org_id == org_id))
+    query = select(Ticket).where(Ticket.id == ticket_id, Ticket.org_id == org_id)
+
+    if not _update_changes_anything(payload):
+        t = db.scalar(query)
+        if not t:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        return t
+
+    # org row first, ticket_stats last: the lock order of every other ticket writer.
+    # The ticket is locked too, so `before` is the bucket the stats actually count it in.
+    seq = next_change_seq(db, org_id)
+    t = db.scalar(query.with_for_update())
     if not t:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    changed = False
-    if payload.subject is not None:
-        t.subject = payload.subject
-        changed = True
-    if payload.status is not None:
-        t.status = payload.status
-        changed = True
-    if payload.priority is not None:
-        t.priority = payload.priority
-        changed = True
+    before = _apply_update(t, payload)
+    t.change_seq = seq
+    bump_stats(db, org_id, ticket_moved(before, (t.status, t.priority)))
+    db.commit()
+    db.refresh(t)
+    draft_cache.invalidate_ticket(t.id)
+    ticket_cache.invalidate_ticket(t.id)
+    publish(org_id, _ticket_event("ticket.updated", t))
+    return t
 
-    if changed:
-        t.updated_at = _utcnow()
-        db.commit()
-        db.refresh(t)
 
-    return t
+@router.delete("/{ticket_id}", status_code=204)
+@route_budget(7, auth_lookup=True)
+def delete_ticket(ticket_id: int, request: Request, db: Session = Depends(get_db)):
+    """Owner/admin only. Leaves a tombstone so /tickets/changes reports the deletion."""
+    user, org_id = _require_org_user(request, db)
+    require_roles(user, roles=["owner", "admin"])
+
+    t = db.scalar(select(Ticket).where(Ticket.id == ticket_id, Ticket.org_id == org_id))
+    if not t:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    seq = next_change_seq(db, org_id)
+    db.add(TicketTombstone(org_id=org_id, ticket_id=t.id, change_seq=seq, deleted_at=_utcnow()))
+    bump_stats(db, org_id, {(t.status, t.priority): -1})
+    db.delete(t)
+    db.commit()
+    draft_cache.invalidate_ticket(ticket_id)
+    ticket_cache.invalidate_ticket(ticket_id)
+    publish(org_id, ticket_event("ticket.deleted", org_id, ticket_id, seq))
+    return Response(status_code=204)
@@ -0,0 +1,265 @@
+"""
+AsyncSession version of app.routers.tickets (settings.DB_ASYNC).
+Schemas and helpers are shared with the sync router; only the I/O differs.
+"""
+from __future__ import annotations
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import get_async_db
+from app.core.query_budget import route_budget
+from app.core.rate_limit import rate_limit
+from app.core.security import get_auth_user_from_request_async, require_roles
+from app.models.ticket import Ticket, TicketStatus
+from app.models.ticket_message import TicketMessage, MessageRole
+from app.models.ticket_tombstone import TicketTombstone
+from app.services.changes import next_change_seq
+from app.services.draft_cache import draft_cache
+from app.services.ticket_stats import bump_stats, ticket_moved
+from app.services.events import publish, ticket_event
+from app.services.ticket_cache import detail_etag, etag_matches, ticket_cache
+from app.routers.tickets import (
+    AddMessageIn,
+    MessageOut,
+    TicketCreateIn,
+    TicketDetailOut,
+    TicketListFilters,
+    TicketOut,
+    TicketUpdateIn,
+    MESSAGES_PAGE_MAX,
+    _apply_update,
+    _decode_before,
+    _detail_response,
+    _list_tickets_query,
+    _message_event,
+    _messages_page,
+    _messages_page_query,
+    _next_cursor_headers,
+    _pregenerate_draft,
+    _thread_query,
+    _ticket_event,
+    _ticket_query,
+    _update_changes_anything,
+    ticket_list_filters,
+    _utcnow,
+)
+from app.utils.fastjson import LeanJSONResponse, dumps, row_dicts
+
+router = APIRouter(prefix="/tickets", tags=["tickets"])
+
+
+async def _require_org_user(request: Request, db: AsyncSession):
+    user = await get_auth_user_from_request_async(request, db)
+    org_id = getattr(user, "org_id", None)
+    if not org_id:
+        raise HTTPException(status_code=400, detail="User has no org_id assigned")
+    return user, org_id
+
+
+@router.post(
+    "",
+    response_model=TicketOut,
+    dependencies=[Depends(rate_limit("tickets:create", lambda: settings.RATE_LIMIT_TICKET_CREATE_PER_MINUTE, key_by="org"))],
+)
+@route_budget(5, auth_lookup=True)
+async def create_ticket(payload: TicketCreateIn, request: Request, db: AsyncSession = Depends(get_async_db)):
+    _, org_id = await _require_org_user(request, db)
+    now = _utcnow()
+    seq = await db.run_sync(lambda s: next_change_seq(s, org_id, 2))
+
+    t = Ticket(
+        org_id=org_id,
+        subject=payload.subject,
+        status=TicketStatus.open,
+        priority=payload.priority,
+        created_at=now,
+        updated_at=now,
+        change_seq=seq + 1,
+    )
+    db.add(t)
+    await db.flush()
+
+    m = TicketMessage(
+        ticket_id=t.id,
+        role=MessageRole.user,
+        content=payload.message,
+        created_at=now,
+        change_seq=seq,
+    )
+    db.add(m)
+    await db.run_sync(lambda s: bump_stats(s, org_id, {(t.status, t.priority): 1}))
+    await db.commit()
+    await db.refresh(t)
+    await run_in_threadpool(publish, org_id, _ticket_event("ticket.created", t))
+    return t
+
+
+@router.get("", response_model=List[TicketOut])
+@route_budget(1, auth_lookup=True)
+async def list_tickets(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = 20,
+    offset: int = 0,
+    cursor: str | None = None,
+    filters: TicketListFilters = Depends(ticket_list_filters),
+):
+    _, org_id = await _require_org_user(request, db)
+    limit = min(max(limit, 1), 100)
+
+    items = row_dicts(await db.execute(_list_tickets_query(org_id, limit, offset, cursor, filters)))
+    return LeanJSONResponse(items, headers=_next_cursor_headers(items, limit, filters.sort))
+
+
+@router.get("/{ticket_id}", response_model=TicketDetailOut)
+@route_budget(2, auth_lookup=True)
+async def get_ticket(
+    ticket_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    messages_limit: int | None = None,
+):
+    _, org_id = await _require_org_user(request, db)
+
+    found = row_dicts(await db.execute(_ticket_query(ticket_id, org_id)))
+    if not found:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    ticket = found[0]
+    version = ticket.pop("change_seq")
+    limit = None if messages_limit is None else min(max(messages_limit, 1), MESSAGES_PAGE_MAX)
+
+    etag = detail_etag(ticket_id, version, limit)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return _detail_response(None, etag)
+    cached = await run_in_threadpool(ticket_cache.get, ticket_id, version, limit)
+    if cached is not None:
+        return _detail_response(cached[0], etag, cached[1])
+
+    cursor = None
+    if limit is None:
+        ticket["messages"] = row_dicts(await db.execute(_thread_query(ticket_id, version)))
+    else:
+        rows = row_dicts(await db.execute(_messages_page_query(ticket_id, None, limit, version)))
+        ticket["messages"], cursor = _messages_page(rows, limit)
+    body = dumps(ticket)
+    await run_in_threadpool(ticket_cache.set, ticket_id, version, limit, body, cursor)
+    return _detail_response(body, etag, cursor)
+
+
+@router.get("/{ticket_id}/messages", response_model=List[MessageOut])
+@route_budget(2, auth_lookup=True)
+async def list_messages(
+    ticket_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    before: str | None = None,
+    limit: int = 50,
+):
+    _, org_id = await _require_org_user(request, db)
+    before_id = _decode_before(before)
+
+    if not await db.scalar(select(Ticket.id).where(Ticket.id == ticket_id, Ticket.org_id == org_id)):
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    limit = min(max(limit, 1), MESSAGES_PAGE_MAX)
+    rows = row_dicts(await db.execute(_messages_page_query(ticket_id, before_id, limit)))
+    page, cursor = _messages_page(rows, limit)
+    return LeanJSONResponse(page, headers={"X-Next-Cursor": cursor} if cursor else None)
+
+
+@router.post("/{ticket_id}/messages", response_model=MessageOut)
+@route_budget(6, auth_lookup=True)
+async def add_message(
+    ticket_id: int,
+    payload: AddMessageIn,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    _, org_id = await _require_org_user(request, db)
+
+    t = await db.scalar(select(Ticket).where(Ticket.id == ticket_id, Ticket.org_id == org_id))
+    if not t:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    now = _utcnow()
+    seq = await db.run_sync(lambda s: next_change_seq(s, org_id))
+    msg = TicketMessage(
+        ticket_id=t.id,
+        role=payload.role,
+        content=payload.content,
+        created_at=now,
+        change_seq=seq,
+    )
+    t.updated_at = now
+    t.change_seq = seq
+
+    db.add(msg)
+    await db.commit()
+    await db.refresh(msg)
+    await run_in_threadpool(draft_cache.invalidate_ticket, t.id)
+    ticket_cache.invalidate_ticket(t.id)
+    await run_in_threadpool(publish, org_id, _message_event(org_id, msg))
+    if msg.role == MessageRole.user:
+        await run_in_threadpool(_pregenerate_draft, org_id, t.id)
+    return msg
+
+
+@router.patch("/{ticket_id}", response_model=TicketOut)
+@route_budget(5, auth_lookup=True)
+async def update_ticket(
+    ticket_id: int,
+    payload: TicketUpdateIn,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    _, org_id = await _require_org_user(request, db)
+    query = select(Ticket).where(Ticket.id == ticket_id, Ticket.org_id == org_id)
+
+    if not _update_changes_anything(payload):
+        t = await db.scalar(query)
+        if not t:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        return t
+
+    # org row first, ticket_stats last: the lock order of every other ticket writer
+    seq = await db.run_sync(lambda s: next_change_seq(s, org_id))
+    t = await db.scalar(query.with_for_update())
+    if not t:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    before = _apply_update(t, payload)
+    t.change_seq = seq
+    await db.run_sync(lambda s: bump_stats(s, org_id, ticket_moved(before, (t.status, t.priority))))
+    await db.commit()
+    await db.refresh(t)
+    await run_in_threadpool(draft_cache.invalidate_ticket, t.id)
+    ticket_cache.invalidate_ticket(t.id)
+    await run_in_threadpool(publish, org_id, _ticket_event("ticket.updated", t))
+    return t
+
+
+@router.delete("/{ticket_id}", status_code=204)
+@route_budget(7, auth_lookup=True)
+async def delete_ticket(ticket_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    user, org_id = await _require_org_user(request, db)
+    require_roles(user, roles=["owner", "admin"])
+
+    t = await db.scalar(select(Ticket).where(Ticket.id == ticket_id, Ticket.org_id == org_id))
+    if not t:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    seq = await db.run_sync(lambda s: next_change_seq(s, org_id))
+    db.add(TicketTombstone(org_id=org_id, ticket_id=t.id, change_seq=seq, deleted_at=_utcnow()))
+    await db.run_sync(lambda s: bump_stats(s, org_id, {(t.status, t.priority): -1}))
+    await db.delete(t)
+    await db.commit()
+    await run_in_threadpool(draft_cache.invalidate_ticket, ticket_id)
+    ticket_cache.invalidate_ticket(ticket_id)
+    await run_in_threadpool(publish, org_id, ticket_event("ticket.deleted", org_id, ticket_id, seq))
+    return Response(status_code=204)
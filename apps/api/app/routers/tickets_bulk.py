@@ -0,0 +1,152 @@
+"""
+Bulk ticket / message import (mail gateways, helpdesk migrations).
+
+Body: NDJSON (Content-Type: application/x-ndjson, one item per line) or a JSON
+array / {"items": [...]}. NDJSON is validated as it streams in and written in
+IMPORT_BATCH_SIZE chunks, so a large import never sits in memory as one list.
+
+Items are idempotent on their external_id: re-posting the same file reports
+"exists" for rows that are already there. The response has one result per input
+item (in request order), so a client can retry just the "error" ones.
+
+At most IMPORT_MAX_ITEMS items per request. A JSON body over the limit is
+rejected (413) before anything is written; an NDJSON stream is cut at the limit
+(earlier batches are already committed) and answered with the results so far
+and "truncated": true, so the client resends from the first unreported line.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterator, Callable
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.user_cache import AuthUser
+from app.routers._deps import require_org_user
+from app.schemas.ticket_import import ImportResult, ImportSummary, ImportTicketIn, IngestMessageIn
+from app.services.draft_cache import draft_cache
+from app.services.events import publish
+from app.services.ticket_cache import ticket_cache
+from app.services.ticket_import import import_message_batch, import_ticket_batch
+
+router = APIRouter(prefix="/tickets", tags=["tickets"])
+
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+
+async def _ndjson_items(request: Request) -> AsyncIterator[Any]:
+    buf = b""
+    async for chunk in request.stream():
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buf.strip():
+        yield buf
+
+
+async def _json_items(request: Request) -> AsyncIterator[Any]:
+    try:
+        body = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON")
+    if isinstance(body, dict):
+        body = body.get("items")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail='Expected a JSON array or {"items": [...]}')
+    if len(body) > settings.IMPORT_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.IMPORT_MAX_ITEMS} items per request")
+    for item in body:
+        yield item
+
+
+def _error_detail(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        err = e.errors()[0]
+        loc = ".".join(str(p) for p in err["loc"])
+        return f"{loc}: {err['msg']}" if loc else err["msg"]
+    return "invalid JSON"
+
+
+def _external_id(raw: Any) -> str | None:
+    if isinstance(raw, dict) and isinstance(raw.get("external_id"), str):
+        return raw["external_id"]
+    return None
+
+
+async def _run_import(
+    request: Request,
+    user: AuthUser,
+    model: type[BaseModel],
+    write_batch: Callable[..., tuple[list[ImportResult], list[int]]],
+) -> ImportSummary:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    items = _ndjson_items(request) if content_type in NDJSON_TYPES else _json_items(request)
+
+    results: list[ImportResult] = []
+    batch: list[tuple[int, Any]] = []
+    touched: set[int] = set()
+
+    def _write(rows: list[tuple[int, Any]]) -> tuple[list[ImportResult], list[int]]:
+        with SessionLocal() as db:
+            return write_batch(db, user.org_id, rows)
+
+    async def _flush() -> None:
+        if not batch:
+            return
+        written, ticket_ids = await run_in_threadpool(_write, list(batch))
+        results.extend(written)
+        touched.update(ticket_ids)
+        batch.clear()
+
+    index = 0
+    truncated = False
+    async for raw in items:
+        if index >= settings.IMPORT_MAX_ITEMS:
+            truncated = True  # stop reading; what's committed still gets its results, invalidation and event
+            break
+        try:
+            if isinstance(raw, bytes):
+                raw = json.loads(raw)
+            batch.append((index, model.model_validate(raw)))
+        except (ValueError, ValidationError) as e:
+            results.append(
+                ImportResult(index=index, external_id=_external_id(raw), status="error", error=_error_detail(e))
+            )
+        index += 1
+        if len(batch) >= settings.IMPORT_BATCH_SIZE:
+            await _flush()
+    await _flush()
+
+    # imported threads change what a draft would say
+    for ticket_id in touched:
+        await run_in_threadpool(draft_cache.invalidate_ticket, ticket_id)
+        ticket_cache.invalidate_ticket(ticket_id)
+    if touched:
+        # one event for the whole import; clients pull the rows via /tickets/changes
+        event = {"type": "tickets.bulk", "org_id": user.org_id, "tickets": len(touched)}
+        await run_in_threadpool(publish, user.org_id, event)
+
+    results.sort(key=lambda r: r.index)
+    return ImportSummary(
+        created=sum(r.status == "created" for r in results),
+        exists=sum(r.status == "exists" for r in results),
+        errors=sum(r.status == "error" for r in results),
+        results=results,
+        truncated=truncated,
+    )
+
+
+@router.post("/bulk", response_model=ImportSummary)
+async def import_tickets(request: Request, user: AuthUser = Depends(require_org_user)):
+    return await _run_import(request, user, ImportTicketIn, import_ticket_batch)
+
+
+@router.post("/messages/bulk", response_model=ImportSummary)
+async def import_messages(request: Request, user: AuthUser = Depends(require_org_user)):
+    return await _run_import(request, user, IngestMessageIn, import_message_batch)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.db import get_db
+from app.core.query_budget import route_budget
+from app.core.user_cache import AuthUser
+from app.routers._deps import require_org_user
+from app.routers.tickets import MessageOut, TicketOut
+from app.services.changes import ResyncRequired, list_changes
+from app.utils.cursor import InvalidCursor, decode_int_cursor, encode_cursor
+
+router = APIRouter(prefix="/tickets", tags=["tickets"])
+
+
+class ChangesOut(BaseModel):
+    tickets: List[TicketOut]
+    messages: List[MessageOut]
+    deleted: List[int]  # ticket ids
+    cursor: str
+    has_more: bool
+
+
+@router.get("/changes", response_model=ChangesOut)
+@route_budget(4, auth_lookup=True)
+def ticket_changes(
+    since: str | None = None,
+    limit: int = 200,
+    db: Session = Depends(get_db),
+    user: AuthUser = Depends(require_org_user),
+):
+    """
+    Incremental sync. First call without `since` returns everything (in pages);
+    afterwards pass the previous `cursor` to get only what changed since then.
+    Keep calling while `has_more` is true. Tickets appear with their current
+    state; `messages` holds new messages only; `deleted` lists removed ticket ids.
+    A cursor older than the deletion history (TICKET_TOMBSTONE_RETENTION_DAYS)
+    gets 410: drop the local copy and start over without `since`.
+    """
+    limit = min(max(limit, 1), 1000)
+    if since:
+        try:
+            since_seq = decode_int_cursor(since)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
+        since_seq = 0
+
+    try:
+        page = list_changes(db, user.org_id, since_seq, limit)
+    except ResyncRequired:
+        raise HTTPException(status_code=410, detail="Cursor expired; full resync required (omit since)")
+    return {
+        "tickets": page.tickets,
+        "messages": page.messages,
+        "deleted": page.deleted,
+        "cursor": encode_cursor(page.cursor),
+        "has_more": page.has_more,
+    }
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.core.user_cache import AuthUser
+from app.models.ticket import TicketPriority, TicketStatus
+from app.routers._deps import require_org_user
+from app.services.ticket_export import ExportFilters, iter_export_rows, stream_csv, stream_ndjson
+
+router = APIRouter(prefix="/tickets", tags=["tickets"])
+
+
+@router.get("/export")
+def export_tickets(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    status: TicketStatus | None = None,
+    priority: TicketPriority | None = None,
+    updated_from: datetime | None = None,
+    updated_to: datetime | None = None,
+    user: AuthUser = Depends(require_org_user),
+):
+    """
+    All tickets of the caller's org with their messages, streamed.
+    ndjson: one ticket per line (messages inlined); csv: one row per message.
+    updated_from is inclusive, updated_to exclusive.
+    """
+    filters = ExportFilters(status=status, priority=priority, updated_from=updated_from, updated_to=updated_to)
+    rows = iter_export_rows(user.org_id, filters)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    if format == "csv":
+        body, media_type = stream_csv(rows), "text/csv; charset=utf-8"
+    else:
+        body, media_type = stream_ndjson(rows), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tickets-{user.org_id}-{stamp}.{format}"'},
+    )
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.db import get_db
+from app.core.query_budget import route_budget
+from app.core.user_cache import AuthUser
+from app.routers._deps import require_org_user
+from app.services.ticket_stats import stats_for_org
+from app.utils.fastjson import LeanJSONResponse
+
+router = APIRouter(prefix="/tickets", tags=["tickets"])
+
+
+class TicketStatsOut(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]
+    by_status_priority: Dict[str, Dict[str, int]]
+
+
+@router.get("/stats", response_model=TicketStatsOut)
+@route_budget(1, auth_lookup=True)
+def ticket_stats(db: Session = Depends(get_db), user: AuthUser = Depends(require_org_user)):
+    """Dashboard counters: reads the ticket_stats rows of the org (<= 9), never the tickets table."""
+    return LeanJSONResponse(stats_for_org(db, user.org_id))
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from typing import Annotated, List, Literal, Optional
+
+from pydantic import AfterValidator, BaseModel, Field, model_validator
+
+from app.models.ticket import TicketPriority, TicketStatus
+from app.models.ticket_message import MessageRole
+
+
+def _as_utc(v: Optional[datetime]) -> Optional[datetime]:
+    if v is not None and v.tzinfo is None:
+        return v.replace(tzinfo=timezone.utc)
+    return v
+
+
+# naive timestamps from exports are taken as UTC
+UTCDateTime = Annotated[Optional[datetime], AfterValidator(_as_utc)]
+
+
+class ImportMessageIn(BaseModel):
+    external_id: Optional[str] = Field(default=None, min_length=1, max_length=128)
+    role: MessageRole = MessageRole.user
+    content: str = Field(min_length=1, max_length=20000)
+    created_at: UTCDateTime = None
+
+
+class ImportTicketIn(BaseModel):
+    external_id: str = Field(min_length=1, max_length=128)
+    subject: str = Field(min_length=1, max_length=200)
+    status: TicketStatus = TicketStatus.open
+    priority: TicketPriority = TicketPriority.medium
+    created_at: UTCDateTime = None
+    messages: List[ImportMessageIn] = Field(default_factory=list, max_length=1000)
+
+
+class IngestMessageIn(ImportMessageIn):
+    external_id: str = Field(min_length=1, max_length=128)
+    ticket_id: Optional[int] = None
+    ticket_external_id: Optional[str] = Field(default=None, min_length=1, max_length=128)
+
+    @model_validator(mode="after")
+    def _one_ticket_ref(self):
+        if (self.ticket_id is None) == (self.ticket_external_id is None):
+            raise ValueError("exactly one of ticket_id / ticket_external_id is required")
+        return self
+
+
+class ImportResult(BaseModel):
+    index: int
+    external_id: Optional[str] = None
+    status: Literal["created", "exists", "error"]
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ImportSummary(BaseModel):
+    created: int
+    exists: int
+    errors: int
+    results: List[ImportResult]
+    # NDJSON only: the body had more than IMPORT_MAX_ITEMS items; the rest weren't read
+    truncated: bool = False
@@ -1,4 +1,12 @@
-from dataclasses import dataclass
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Protocol
+
+from app.core.config import settings
+
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
 
 @dataclass
 class DraftContext:
@@ -6,6 +14,18 @@ class DraftContext:
     last_messages: list[str]
     kb_snippets: list[str]
     tone: str
+    kb_article_ids: list[int] = field(default_factory=list)
+
+
+class AIProvider(Protocol):
+    async def draft(self, ctx: DraftContext) -> str:
+        """Whole draft at once."""
+        ...
+
+    def stream_draft(self, ctx: DraftContext) -> AsyncIterator[str]:
+        """Async generator of text tokens; concatenated they equal draft(ctx)."""
+        ...
+
 
 class MockAIProvider:
     def draft_reply(self, ctx: DraftContext) -> str:
@@ -28,3 +48,39 @@ class MockAIProvider:
 
         closing = "\nIf you confirm a couple details, I can help you faster.\n\nBest regards,"
         return body + closing
+
+    async def draft(self, ctx: DraftContext) -> str:
+        return self.draft_reply(ctx)
+
+    async def stream_draft(self, ctx: DraftContext) -> AsyncIterator[str]:
+        for token in _TOKEN_RE.findall(self.draft_reply(ctx)):
+            yield token
+
+
+class FakeStreamingProvider(MockAIProvider):
+    """
+    Mock output with model-like timing, for tests and local UX work:
+    first_token_ms before the first token, token_ms between tokens.
+    """
+
+    def __init__(self, first_token_ms: int = 150, token_ms: int = 20):
+        self.first_token_ms = first_token_ms
+        self.token_ms = token_ms
+
+    async def draft(self, ctx: DraftContext) -> str:
+        return "".join([t async for t in self.stream_draft(ctx)])
+
+    async def stream_draft(self, ctx: DraftContext) -> AsyncIterator[str]:
+        await asyncio.sleep(self.first_token_ms / 1000)
+        first = True
+        for token in _TOKEN_RE.findall(self.draft_reply(ctx)):
+            if not first:
+                await asyncio.sleep(self.token_ms / 1000)
+            first = False
+            yield token
+
+
+def get_ai_provider() -> AIProvider:
+    if settings.AI_PROVIDER == "fake-stream":
+        return FakeStreamingProvider(settings.AI_FAKE_FIRST_TOKEN_MS, settings.AI_FAKE_TOKEN_MS)
+    return MockAIProvider()
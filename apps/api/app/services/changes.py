@@ -0,0 +1,155 @@
+"""
+Per-org change sequence behind GET /tickets/changes.
+
+Every write to a ticket or message reserves numbers from orgs.change_seq with
+UPDATE ... RETURNING and stamps them on the rows it touches. The UPDATE row-locks
+the org until the transaction commits, so sequence numbers become visible in
+order: once a reader sees N, everything <= N is committed. That is what makes
+"since" cursors gap-free (a timestamp index can't promise that).
+
+Invariants the queries rely on:
+- within tickets / ticket_messages / ticket_tombstones a seq is used once per org;
+- a ticket's change_seq >= the change_seq of each of its messages.
+
+Tombstones are kept TICKET_TOMBSTONE_RETENTION_DAYS (sweep_tombstones, run by the
+"sweep_tombstones" job). The sweep raises orgs.tombstones_pruned_seq to the
+highest seq it removed; a cursor below that may have missed a deletion, so
+list_changes refuses it with ResyncRequired.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.org import Org
+from app.models.ticket import Ticket
+from app.models.ticket_message import TicketMessage
+from app.models.ticket_tombstone import TicketTombstone
+
+
+def next_change_seq(db: Session, org_id: int, n: int = 1) -> int:
+    """Reserve n consecutive sequence numbers for org_id. -> the first one."""
+    orgs = Org.__table__
+    last = db.execute(
+        update(orgs).where(orgs.c.id == org_id).values(change_seq=orgs.c.change_seq + n).returning(orgs.c.change_seq)
+    ).scalar_one()
+    return last - n + 1
+
+
+class ResyncRequired(Exception):
+    """The cursor predates pruned tombstones: the client must drop its copy and sync from scratch."""
+
+
+@dataclass
+class ChangesPage:
+    tickets: list[Ticket]
+    messages: list[TicketMessage]
+    deleted: list[int]
+    cursor: int
+    has_more: bool
+
+
+def list_changes(db: Session, org_id: int, since: int, limit: int) -> ChangesPage:
+    """
+    Tickets, messages and deletions with since < change_seq <= cursor, each list
+    at most `limit` long. When a list is cut, cursor stops at its last row and
+    has_more is set; call again with the returned cursor.
+    Raises ResyncRequired for a cursor older than the tombstone retention.
+    """
+    row = db.execute(select(Org.change_seq, Org.tombstones_pruned_seq).where(Org.id == org_id)).first()
+    head, pruned = (row.change_seq, row.tombstones_pruned_seq) if row else (0, 0)
+    if 0 < since < pruned:
+        raise ResyncRequired()
+
+    tickets = list(
+        db.scalars(
+            select(Ticket)
+            .where(Ticket.org_id == org_id, Ticket.change_seq > since, Ticket.change_seq <= head)
+            .order_by(Ticket.change_seq)
+            .limit(limit + 1)
+        )
+    )
+    # driven by the changed tickets (ix_tickets_org_change_seq), then
+    # ix_ticket_messages_ticket_change_seq per ticket
+    messages = list(
+        db.scalars(
+            select(TicketMessage)
+            .join(Ticket, Ticket.id == TicketMessage.ticket_id)
+            .where(
+                Ticket.org_id == org_id,
+                Ticket.change_seq > since,
+                TicketMessage.change_seq > since,
+                TicketMessage.change_seq <= head,
+            )
+            .order_by(TicketMessage.change_seq)
+            .limit(limit + 1)
+        )
+    )
+    tombstones = db.execute(
+        select(TicketTombstone.ticket_id, TicketTombstone.change_seq)
+        .where(
+            TicketTombstone.org_id == org_id,
+            TicketTombstone.change_seq > since,
+            TicketTombstone.change_seq <= head,
+        )
+        .order_by(TicketTombstone.change_seq)
+        .limit(limit + 1)
+    ).all()
+
+    upto, has_more = head, False
+    for rows in (tickets, messages, tombstones):
+        if len(rows) > limit:
+            has_more = True
+            upto = min(upto, rows[limit - 1].change_seq)
+
+    return ChangesPage(
+        tickets=[t for t in tickets if t.change_seq <= upto],
+        messages=[m for m in messages if m.change_seq <= upto],
+        deleted=[r.ticket_id for r in tombstones if r.change_seq <= upto],
+        cursor=max(upto, 0),
+        has_more=has_more,
+    )
+
+
+def sweep_tombstones(db: Session, batch: Optional[int] = None, now: Optional[datetime] = None) -> dict[str, int]:
+    """
+    Delete tombstones older than the retention, committing per batch.
+    -> {"deleted": n, "batches": b}.
+
+    Each batch raises the owning orgs' tombstones_pruned_seq in the same
+    transaction, org rows before tombstones (the lock order of delete_ticket).
+    """
+    batch = batch or settings.TICKET_TOMBSTONE_SWEEP_BATCH
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=settings.TICKET_TOMBSTONE_RETENTION_DAYS)
+    orgs = Org.__table__
+    deleted = batches = 0
+    while True:
+        rows = db.execute(
+            select(TicketTombstone.id, TicketTombstone.org_id, TicketTombstone.change_seq)
+            .where(TicketTombstone.deleted_at < cutoff)
+            .order_by(TicketTombstone.deleted_at)
+            .limit(batch)
+        ).all()
+        if not rows:
+            break
+        floors: dict[int, int] = {}
+        for r in rows:
+            floors[r.org_id] = max(floors.get(r.org_id, 0), r.change_seq)
+        stmt = (
+            update(orgs)
+            .where(orgs.c.id == bindparam("b_id"), orgs.c.tombstones_pruned_seq < bindparam("b_seq"))
+            .values(tombstones_pruned_seq=bindparam("b_seq"))
+        )
+        db.connection().execute(stmt, [{"b_id": org_id, "b_seq": seq} for org_id, seq in sorted(floors.items())])
+        db.execute(delete(TicketTombstone).where(TicketTombstone.id.in_([r.id for r in rows])))
+        db.commit()
+        deleted += len(rows)
+        batches += 1
+        if len(rows) < batch:
+            break
+    return {"deleted": deleted, "batches": batches}
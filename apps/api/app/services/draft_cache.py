@@ -0,0 +1,97 @@
+"""
+Two-tier cache of generated drafts: per-process LRU -> Redis.
+
+Key = (ticket_id, tone, sha256 of subject + last messages + KB snippet ids), so a
+changed ticket can never be served an old draft. add_message / update_ticket also
+call invalidate_ticket() so superseded drafts don't sit in memory until they expire.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.ai_provider import DraftContext
+from app.utils.lru import LRUCache
+
+log = logging.getLogger(__name__)
+
+
+def draft_key(ticket_id: int, ctx: DraftContext) -> str:
+    h = hashlib.sha256()
+    h.update(ctx.subject.encode("utf-8"))
+    for m in ctx.last_messages:
+        h.update(b"\x00")
+        h.update(m.encode("utf-8"))
+    h.update(b"\x01" + ",".join(str(i) for i in ctx.kb_article_ids).encode("ascii"))
+    return f"draft:{ticket_id}:{ctx.tone}:{h.hexdigest()[:32]}"
+
+
+class DraftCache:
+    def __init__(self, local_max: int, ttl_seconds: int, use_redis: bool):
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+        self._local: LRUCache[str, str] = LRUCache(local_max, ttl_seconds)
+        self.hits_local = 0
+        self.hits_redis = 0
+        self.misses = 0
+
+    def get(self, ticket_id: int, key: str) -> str | None:
+        draft = self._local.get(key)
+        if draft is not None:
+            self.hits_local += 1
+            return draft
+
+        if self.use_redis:
+            try:
+                draft = get_redis().get(key)
+            except Exception:
+                log.warning("draft cache: redis get failed", exc_info=True)
+                draft = None
+            if draft is not None:
+                self.hits_redis += 1
+                self._local.set(key, draft)
+                return draft
+
+        self.misses += 1
+        return None
+
+    def set(self, ticket_id: int, key: str, draft: str) -> None:
+        self._local.set(key, draft)
+        if self.use_redis:
+            try:
+                pipe = get_redis().pipeline(transaction=False)
+                pipe.set(key, draft, ex=self.ttl_seconds)
+                pipe.sadd(f"draft:keys:{ticket_id}", key)
+                pipe.expire(f"draft:keys:{ticket_id}", self.ttl_seconds)
+                pipe.execute()
+            except Exception:
+                log.warning("draft cache: redis set failed", exc_info=True)
+
+    def invalidate_ticket(self, ticket_id: int) -> None:
+        self._local.delete_prefix(f"draft:{ticket_id}:")
+
+        if self.use_redis:
+            try:
+                r = get_redis()
+                index = f"draft:keys:{ticket_id}"
+                stale = r.smembers(index)
+                r.delete(index, *stale)
+            except Exception:
+                log.warning("draft cache: redis invalidate failed", exc_info=True)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits_local": self.hits_local,
+            "hits_redis": self.hits_redis,
+            "misses": self.misses,
+            "local_entries": len(self._local),
+        }
+
+
+draft_cache = DraftCache(
+    local_max=settings.DRAFT_CACHE_LOCAL_MAX,
+    ttl_seconds=settings.DRAFT_CACHE_TTL_SECONDS,
+    use_redis=settings.DRAFT_CACHE_BACKEND == "redis",
+)
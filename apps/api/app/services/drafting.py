@@ -0,0 +1,61 @@
+"""
+Draft-reply pipeline shared by the /ai routes and the job worker:
+ticket + last messages + KB snippets -> DraftContext -> cache -> provider.
+"""
+from __future__ import annotations
+
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.ticket import Ticket
+from app.models.ticket_message import MessageRole, TicketMessage
+from app.services.ai_provider import DraftContext, get_ai_provider
+from app.services.draft_cache import draft_cache, draft_key
+from app.services.kb_index import retrieve_snippets
+
+LAST_MESSAGES = 5
+
+
+def build_context(db: Session, ticket_id: int, org_id: int, tone: str) -> DraftContext:
+    ticket = db.scalar(select(Ticket).where(Ticket.id == ticket_id, Ticket.org_id == org_id))
+    if not ticket:
+        raise HTTPException(status_code=404, detail="ticket not found")
+
+    msgs = db.scalars(
+        select(TicketMessage)
+        .where(TicketMessage.ticket_id == ticket_id)
+        .order_by(TicketMessage.id.desc())
+        .limit(LAST_MESSAGES)
+    ).all()
+    last_messages = [m.content for m in reversed(msgs)]
+
+    last_user = next((m.content for m in msgs if m.role == MessageRole.user), "")
+    snippets = retrieve_snippets(db, f"{ticket.subject}\n{last_user}")
+
+    return DraftContext(
+        subject=ticket.subject,
+        last_messages=last_messages,
+        kb_snippets=[text for _, text in snippets],
+        tone=tone,
+        kb_article_ids=[article_id for article_id, _ in snippets],
+    )
+
+
+def prepare_draft(db: Session, ticket_id: int, org_id: int, tone: str) -> tuple[DraftContext, str, str | None]:
+    """-> (context, cache key, cached draft or None)."""
+    ctx = build_context(db, ticket_id, org_id, tone)
+    key = draft_key(ticket_id, ctx)
+    return ctx, key, draft_cache.get(ticket_id, key)
+
+
+def generate_draft(db: Session, ticket_id: int, org_id: int, tone: str) -> dict:
+    """Blocking variant for worker processes (no running event loop there)."""
+    ctx, key, cached = prepare_draft(db, ticket_id, org_id, tone)
+    if cached is not None:
+        return {"draft": cached, "cached": True}
+    draft = asyncio.run(get_ai_provider().draft(ctx))
+    draft_cache.set(ticket_id, key, draft)
+    return {"draft": draft, "cached": False}
@@ -0,0 +1,181 @@
+"""
+Ticket events for real-time clients (/events/stream, /events/ws).
+
+Writers call publish(org_id, event) after commit, from any thread. Backends
+(settings.EVENTS_BACKEND):
+- redis:  PUBLISH events:org:{org_id}; each process keeps ONE pattern
+          subscription and fans messages out to its local connections
+- memory: straight to the local connections (single node / tests)
+
+Each connection gets a bounded queue. A client that falls behind doesn't stall
+the others or grow memory: its backlog is dropped and it receives a single
+"resync" event, after which it should catch up with GET /tickets/changes.
+Events carry the change cursor of the write, so that call costs only the gap.
+
+Delivery is best effort (no replay): /tickets/changes is the source of truth.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.redis import get_async_pubsub_redis, get_redis
+from app.utils.cursor import encode_cursor
+
+log = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "events:org:"
+RESYNC = json.dumps({"type": "resync"})
+
+
+def ticket_event(kind: str, org_id: int, ticket_id: int, seq: Optional[int] = None, **fields: Any) -> dict[str, Any]:
+    """Compact event: ids + what changed; clients fetch bodies if they need them."""
+    event: dict[str, Any] = {"type": kind, "org_id": org_id, "ticket_id": ticket_id, **fields}
+    if seq is not None:
+        event["cursor"] = encode_cursor(seq)
+    return event
+
+
+class Subscription:
+    def __init__(self, org_id: int, maxsize: int):
+        self.org_id = org_id
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize)
+        self._overflowed = False
+
+    def offer(self, data: str) -> None:
+        """Event-loop thread only."""
+        if self._overflowed:
+            return
+        try:
+            self._queue.put_nowait(data)
+        except asyncio.QueueFull:
+            # slow consumer: drop its backlog, tell it to catch up on its own
+            self._overflowed = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESYNC)
+
+    async def get(self) -> str:
+        data = await self._queue.get()
+        if data is RESYNC:
+            self._overflowed = False
+        return data
+
+
+class EventBroker:
+    def __init__(self, use_redis: bool, queue_max: int, max_connections: int):
+        self.use_redis = use_redis
+        self.queue_max = queue_max
+        self.max_connections = max_connections
+        self._subs: dict[int, set[Subscription]] = {}
+        self._count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+    # ---- publishing (any thread) ----
+    def publish(self, org_id: int, event: dict[str, Any]) -> None:
+        data = json.dumps(event, ensure_ascii=False, default=str)
+        if self.use_redis:
+            try:
+                get_redis().publish(f"{CHANNEL_PREFIX}{org_id}", data)
+            except Exception:
+                log.warning("events: redis publish failed", exc_info=True)
+            return
+
+        loop = self._loop
+        if loop is not None and self._subs.get(org_id):
+            loop.call_soon_threadsafe(self._dispatch, org_id, data)
+
+    # ---- subscribing (event loop) ----
+    def subscribe(self, org_id: int) -> Optional[Subscription]:
+        """-> None when this process is at EVENTS_MAX_CONNECTIONS."""
+        with self._lock:
+            if self._count >= self.max_connections:
+                return None
+            self._count += 1
+        self._loop = asyncio.get_running_loop()
+        if self.use_redis and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.create_task(self._listen(), name="events-listener")
+
+        sub = Subscription(org_id, self.queue_max)
+        self._subs.setdefault(org_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subs.get(sub.org_id)
+        if subs is not None and sub in subs:
+            subs.discard(sub)
+            if not subs:
+                del self._subs[sub.org_id]
+            with self._lock:
+                self._count -= 1
+
+    def connections(self) -> int:
+        return self._count
+
+    def _dispatch(self, org_id: int, data: str) -> None:
+        for sub in tuple(self._subs.get(org_id, ())):
+            sub.offer(data)
+
+    def _resync_all(self) -> None:
+        for subs in tuple(self._subs.values()):
+            for sub in tuple(subs):
+                sub.offer(RESYNC)
+
+    async def _listen(self) -> None:
+        """One pattern subscription per process, whatever the number of clients."""
+        delay = 0.5
+        while True:
+            pubsub = get_async_pubsub_redis().pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                delay = 0.5
+                async for msg in pubsub.listen():
+                    if msg.get("type") != "pmessage":
+                        continue
+                    try:
+                        org_id = int(msg["channel"][len(CHANNEL_PREFIX):])
+                    except ValueError:
+                        continue
+                    self._dispatch(org_id, msg["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.warning("events: redis subscription lost, reconnecting", exc_info=True)
+                self._resync_all()  # whatever was published meanwhile is gone
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 10.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+broker = EventBroker(
+    use_redis=settings.EVENTS_BACKEND == "redis",
+    queue_max=settings.EVENTS_QUEUE_MAX,
+    max_connections=settings.EVENTS_MAX_CONNECTIONS,
+)
+
+
+def publish(org_id: int, event: dict[str, Any]) -> None:
+    """Best effort, never raises: a lost event is recovered through /tickets/changes."""
+    try:
+        broker.publish(org_id, event)
+    except Exception:
+        log.warning("events: publish failed", exc_info=True)
@@ -0,0 +1,475 @@
+"""
+Background jobs (AI drafting) with retries, backoff and per-org concurrency caps.
+
+Backends (settings.JOBS_BACKEND):
+- redis:  shared queue; run `python -m app.worker` (separate process pool)
+- memory: per-process queue drained by a local worker thread (tests / single node)
+
+Redis layout:
+    jobs:{id}            JSON job record (TTL JOB_TTL_SECONDS)
+    jobs:queue           list of ready job ids (LPUSH / BLMOVE)
+    jobs:processing:{w}  ids claimed by worker process w until acked (one at a time)
+    jobs:worker:{w}      liveness marker, TTL JOB_TIMEOUT_SECONDS + JOB_LEASE_GRACE_SECONDS
+    jobs:workers         set of worker ids; a worker whose marker expired has its
+                         processing list moved back onto jobs:queue (reap_expired)
+    jobs:delayed         zset job id -> run_at (retries, org-cap deferrals)
+    jobs:running:{org}   in-flight counter per org
+    jobs:periodic:{kind} NX marker: one periodic run per interval across all workers
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Optional, Protocol
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.redis import get_blocking_redis, get_redis
+from app.services.changes import sweep_tombstones
+from app.services.drafting import generate_draft
+from app.services.refresh_tokens import sweep_refresh_tokens
+from app.services.ticket_stats import reconcile_all
+
+log = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+@dataclass
+class Job:
+    kind: str
+    org_id: int
+    payload: dict[str, Any]
+    id: str = field(default_factory=lambda: uuid4().hex)
+    status: str = QUEUED
+    attempts: int = 0
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Job":
+        return cls(**json.loads(raw))
+
+
+class JobQueue(Protocol):
+    def enqueue(self, job: Job) -> Job: ...
+    def get(self, job_id: str) -> Optional[Job]: ...
+    def save(self, job: Job) -> None: ...
+    def claim(self, timeout: float) -> Optional[Job]: ...
+    def ack(self, job_id: str) -> None: ...
+    def reap_expired(self) -> int: ...
+    def schedule(self, job: Job, delay_seconds: float) -> None: ...
+    def promote_due(self) -> int: ...
+    def acquire_org_slot(self, org_id: int) -> bool: ...
+    def release_org_slot(self, org_id: int) -> None: ...
+    def claim_period(self, kind: str, interval_seconds: float) -> bool: ...
+
+
+# ---- Redis ----
+_PROMOTE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, id in ipairs(due) do
+  redis.call('ZREM', KEYS[1], id)
+  redis.call('LPUSH', KEYS[2], id)
+end
+return #due
+"""
+
+_REAP_LUA = """
+local n = 0
+for _, w in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+  if redis.call('EXISTS', 'jobs:worker:' .. w) == 0 then
+    local processing = 'jobs:processing:' .. w
+    while redis.call('LMOVE', processing, KEYS[2], 'RIGHT', 'LEFT') do
+      n = n + 1
+    end
+    redis.call('SREM', KEYS[1], w)
+  end
+end
+return n
+"""
+
+_ACQUIRE_LUA = """
+local n = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+if n > tonumber(ARGV[1]) then
+  redis.call('DECR', KEYS[1])
+  return 0
+end
+return 1
+"""
+
+
+class RedisJobQueue:
+    queue_key = "jobs:queue"
+    delayed_key = "jobs:delayed"
+    workers_key = "jobs:workers"
+
+    def __init__(self):
+        self._promote = None
+        self._acquire = None
+        self._reap = None
+        # one instance per process (workers are spawned), so this names the process
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+        self.processing_key = f"jobs:processing:{self.worker_id}"
+
+    @property
+    def r(self):
+        return get_redis()
+
+    def _job_key(self, job_id: str) -> str:
+        return f"jobs:{job_id}"
+
+    def enqueue(self, job: Job) -> Job:
+        pipe = self.r.pipeline()
+        pipe.set(self._job_key(job.id), job.to_json(), ex=settings.JOB_TTL_SECONDS)
+        pipe.lpush(self.queue_key, job.id)
+        pipe.execute()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raw = self.r.get(self._job_key(job_id))
+        return Job.from_json(raw) if raw else None
+
+    def save(self, job: Job) -> None:
+        job.updated_at = time.time()
+        self.r.set(self._job_key(job.id), job.to_json(), ex=settings.JOB_TTL_SECONDS)
+
+    def claim(self, timeout: float) -> Optional[Job]:
+        # liveness first: if this process dies holding a job, the marker lapses and it's reaped
+        pipe = self.r.pipeline()
+        pipe.sadd(self.workers_key, self.worker_id)
+        pipe.set(
+            f"jobs:worker:{self.worker_id}", "1", ex=settings.JOB_TIMEOUT_SECONDS + settings.JOB_LEASE_GRACE_SECONDS
+        )
+        pipe.execute()
+        # own client: the shared one's socket_timeout is shorter than the block
+        job_id = get_blocking_redis().blmove(
+            self.queue_key, self.processing_key, max(int(timeout), 1), src="RIGHT", dest="LEFT"
+        )
+        if not job_id:
+            return None
+        job = self.get(job_id)
+        if job is None:  # record expired meanwhile
+            self.ack(job_id)
+        return job
+
+    def ack(self, job_id: str) -> None:
+        self.r.lrem(self.processing_key, 1, job_id)
+
+    def reap_expired(self) -> int:
+        if self._reap is None:
+            self._reap = self.r.register_script(_REAP_LUA)
+        return int(self._reap(keys=[self.workers_key, self.queue_key]))
+
+    def schedule(self, job: Job, delay_seconds: float) -> None:
+        self.save(job)
+        self.r.zadd(self.delayed_key, {job.id: time.time() + delay_seconds})
+
+    def promote_due(self) -> int:
+        if self._promote is None:
+            self._promote = self.r.register_script(_PROMOTE_LUA)
+        return int(self._promote(keys=[self.delayed_key, self.queue_key], args=[time.time()]))
+
+    def acquire_org_slot(self, org_id: int) -> bool:
+        if self._acquire is None:
+            self._acquire = self.r.register_script(_ACQUIRE_LUA)
+        # the TTL heals the counter if a worker dies mid-job
+        ttl = settings.JOB_TIMEOUT_SECONDS * 2
+        return bool(self._acquire(keys=[f"jobs:running:{org_id}"], args=[settings.JOBS_PER_ORG_CONCURRENCY, ttl]))
+
+    def release_org_slot(self, org_id: int) -> None:
+        key = f"jobs:running:{org_id}"
+        if self.r.decr(key) < 0:
+            self.r.set(key, 0)
+
+    def claim_period(self, kind: str, interval_seconds: float) -> bool:
+        return bool(self.r.set(f"jobs:periodic:{kind}", "1", nx=True, ex=max(int(interval_seconds), 1)))
+
+
+# ---- Memory ----
+class MemoryJobQueue:
+    def __init__(self):
+        self._jobs: dict[str, Job] = {}
+        self._ready: deque[str] = deque()
+        self._delayed: list[tuple[float, str]] = []
+        self._running: dict[int, int] = {}
+        self._periodic: dict[str, float] = {}
+        self._cond = threading.Condition()
+
+    def enqueue(self, job: Job) -> Job:
+        with self._cond:
+            self._jobs[job.id] = job
+            self._ready.append(job.id)
+            self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return Job(**asdict(job)) if job else None  # callers get a copy, like from Redis
+
+    def save(self, job: Job) -> None:
+        job.updated_at = time.time()
+        with self._cond:
+            self._jobs[job.id] = Job(**asdict(job))
+
+    def claim(self, timeout: float) -> Optional[Job]:
+        with self._cond:
+            if not self._ready:
+                self._cond.wait(timeout)
+            if not self._ready:
+                return None
+            job_id = self._ready.popleft()
+        return self.get(job_id)
+
+    def ack(self, job_id: str) -> None:
+        pass  # claimed jobs live and die with this process
+
+    def reap_expired(self) -> int:
+        return 0
+
+    def schedule(self, job: Job, delay_seconds: float) -> None:
+        self.save(job)
+        with self._cond:
+            heapq.heappush(self._delayed, (time.time() + delay_seconds, job.id))
+
+    def promote_due(self) -> int:
+        now = time.time()
+        n = 0
+        with self._cond:
+            while self._delayed and self._delayed[0][0] <= now:
+                _, job_id = heapq.heappop(self._delayed)
+                self._ready.append(job_id)
+                n += 1
+            if n:
+                self._cond.notify_all()
+        return n
+
+    def acquire_org_slot(self, org_id: int) -> bool:
+        with self._cond:
+            if self._running.get(org_id, 0) >= settings.JOBS_PER_ORG_CONCURRENCY:
+                return False
+            self._running[org_id] = self._running.get(org_id, 0) + 1
+            return True
+
+    def release_org_slot(self, org_id: int) -> None:
+        with self._cond:
+            self._running[org_id] = max(self._running.get(org_id, 0) - 1, 0)
+
+    def claim_period(self, kind: str, interval_seconds: float) -> bool:
+        now = time.time()
+        with self._cond:
+            if self._periodic.get(kind, 0.0) > now:
+                return False
+            self._periodic[kind] = now + interval_seconds
+            return True
+
+
+def _make_queue() -> JobQueue:
+    if settings.JOBS_BACKEND == "memory":
+        return MemoryJobQueue()
+    return RedisJobQueue()
+
+
+job_queue: JobQueue = _make_queue()
+
+
+# ---- handlers ----
+class PermanentJobError(Exception):
+    """Don't retry (bad input, missing ticket...)."""
+
+
+class JobTimeout(Exception):
+    """Attempt ran past JOB_TIMEOUT_SECONDS; retried like any other failure."""
+
+
+@contextmanager
+def _time_limit(seconds: int):
+    """SIGALRM-based, so only in a main thread (worker processes). The in-process
+    memory worker runs on a thread and goes without; a worker stuck past the
+    limit anyway (C code ignoring signals) loses its liveness marker and is reaped."""
+    if seconds <= 0 or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def _raise(signum, frame):
+        raise JobTimeout(f"exceeded {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, _raise)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _handle_draft_reply(job: Job) -> dict[str, Any]:
+    with SessionLocal() as db:
+        try:
+            return generate_draft(db, int(job.payload["ticket_id"]), job.org_id, job.payload.get("tone", "friendly"))
+        except HTTPException as e:
+            raise PermanentJobError(str(e.detail))
+
+
+def _handle_reconcile_stats(job: Job) -> dict[str, Any]:
+    with SessionLocal() as db:
+        return reconcile_all(db)
+
+
+def _handle_sweep_refresh_tokens(job: Job) -> dict[str, Any]:
+    with SessionLocal() as db:
+        return sweep_refresh_tokens(db)
+
+
+def _handle_sweep_tombstones(job: Job) -> dict[str, Any]:
+    with SessionLocal() as db:
+        return sweep_tombstones(db)
+
+
+HANDLERS: dict[str, Callable[[Job], dict[str, Any]]] = {
+    "draft_reply": _handle_draft_reply,
+    "reconcile_stats": _handle_reconcile_stats,
+    "sweep_refresh_tokens": _handle_sweep_refresh_tokens,
+    "sweep_tombstones": _handle_sweep_tombstones,
+}
+
+# system jobs (org_id 0) enqueued by whichever worker gets there first each interval
+PERIODIC: dict[str, Callable[[], float]] = {
+    "reconcile_stats": lambda: settings.STATS_RECONCILE_SECONDS,
+    "sweep_refresh_tokens": lambda: settings.REFRESH_TOKEN_SWEEP_SECONDS,
+    "sweep_tombstones": lambda: settings.TICKET_TOMBSTONE_SWEEP_SECONDS,
+}
+PERIODIC_CHECK_SECONDS = 30.0
+_next_periodic_check = 0.0
+
+
+def enqueue_draft(org_id: int, ticket_id: int, tone: str) -> Job:
+    return job_queue.enqueue(Job(kind="draft_reply", org_id=org_id, payload={"ticket_id": ticket_id, "tone": tone}))
+
+
+def backoff_seconds(attempts: int) -> float:
+    return min(settings.JOB_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), settings.JOB_RETRY_MAX_SECONDS)
+
+
+def enqueue_due_periodic(queue: JobQueue) -> int:
+    """Checked at most every PERIODIC_CHECK_SECONDS per process. -> jobs enqueued."""
+    global _next_periodic_check
+    now = time.time()
+    if now < _next_periodic_check:
+        return 0
+    _next_periodic_check = now + PERIODIC_CHECK_SECONDS
+
+    n = 0
+    for kind, interval in PERIODIC.items():
+        seconds = interval()
+        if seconds > 0 and queue.claim_period(kind, seconds):
+            queue.enqueue(Job(kind=kind, org_id=0, payload={}))
+            n += 1
+    return n
+
+
+def run_one(queue: JobQueue, timeout: float = 1.0) -> bool:
+    """Claim and execute a single job. -> False if nothing was ready."""
+    try:
+        enqueue_due_periodic(queue)
+    except Exception:
+        log.warning("could not schedule periodic jobs", exc_info=True)
+    reaped = queue.reap_expired()
+    if reaped:
+        log.warning("re-queued %d job(s) from dead or stuck workers", reaped)
+    queue.promote_due()
+    job = queue.claim(timeout)
+    if job is None:
+        return False
+
+    if job.status == RUNNING and job.attempts >= settings.JOB_MAX_ATTEMPTS:
+        # reaped after its last attempt never finished: don't hand it another worker
+        job.status = FAILED
+        job.error = job.error or "worker lost or timed out"
+        queue.save(job)
+        queue.ack(job.id)
+        return True
+
+    if not queue.acquire_org_slot(job.org_id):
+        # org at its concurrency cap: park briefly without burning an attempt
+        queue.schedule(job, settings.JOB_ORG_CAP_DEFER_SECONDS)
+        queue.ack(job.id)
+        return True
+
+    try:
+        job.status = RUNNING
+        job.attempts += 1
+        queue.save(job)
+        handler = HANDLERS.get(job.kind)
+        if handler is None:
+            raise PermanentJobError(f"unknown job kind {job.kind!r}")
+        with _time_limit(settings.JOB_TIMEOUT_SECONDS):
+            job.result = handler(job)
+        job.status = SUCCEEDED
+        job.error = None
+        queue.save(job)
+    except PermanentJobError as e:
+        job.status = FAILED
+        job.error = str(e)
+        queue.save(job)
+    except Exception as e:
+        log.warning("job %s (%s) attempt %s failed", job.id, job.kind, job.attempts, exc_info=True)
+        job.error = f"{type(e).__name__}: {e}"
+        if job.attempts >= settings.JOB_MAX_ATTEMPTS:
+            job.status = FAILED
+            queue.save(job)
+        else:
+            job.status = QUEUED
+            queue.schedule(job, backoff_seconds(job.attempts))
+    finally:
+        queue.release_org_slot(job.org_id)
+        queue.ack(job.id)
+    return True
+
+
+# ---- in-process worker (memory backend) ----
+_local_worker: Optional[threading.Thread] = None
+_local_stop = threading.Event()
+
+
+def start_local_worker() -> None:
+    global _local_worker
+    if _local_worker is not None:
+        return
+    _local_stop.clear()
+
+    def _loop() -> None:
+        while not _local_stop.is_set():
+            try:
+                run_one(job_queue, timeout=0.5)
+            except Exception:
+                log.exception("local job worker error")
+                time.sleep(1)
+
+    _local_worker = threading.Thread(target=_loop, name="jobs-local", daemon=True)
+    _local_worker.start()
+
+
+def stop_local_worker() -> None:
+    global _local_worker
+    _local_stop.set()
+    _local_worker = None
@@ -0,0 +1,350 @@
+"""
+Semantic KB retrieval: chunk -> embed -> memory-mapped float32 matrix -> top-k cosine.
+
+Layout under settings.KB_INDEX_PATH:
+    vectors.f32   row-major float32, one L2-normalised row per chunk
+    chunks.i64    int64 pairs (article_id, chunk_no), same row order
+    meta.json     {"embedder", "dim", "articles", "max_id"}: what the files hold
+
+Rows are append-only (create_article adds its chunks), so every worker process can
+memory-map the same files and just remap when they grow. The files are node-local:
+each API / worker process runs a sync thread (start_sync_thread) that checks
+the article count and max id every KB_INDEX_SYNC_SECONDS and appends what other
+nodes created, or rebuilds on a mismatch. Requests only read the index; the
+first build happens in that thread at startup, never inside a request.
+
+    python -m app.services.kb_index rebuild
+"""
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Iterator, Protocol
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.kb import KBArticle
+
+log = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def chunk_text(text: str, max_words: int = 120, overlap: int = 20) -> list[str]:
+    words = (text or "").split()
+    if not words:
+        return []
+    step = max(max_words - overlap, 1)
+    return [" ".join(words[i : i + max_words]) for i in range(0, max(len(words) - overlap, 1), step)]
+
+
+def article_chunks(title: str, body: str) -> list[str]:
+    # title goes into every chunk: short chunks still know what they're about
+    return [f"{title}\n{c}" for c in chunk_text(body)] or [title]
+
+
+class Embedder(Protocol):
+    name: str
+    dim: int
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """-> float32 array (len(texts), dim), rows L2-normalised."""
+        ...
+
+
+class HashingEmbedder:
+    """
+    CPU-only stand-in: signed feature hashing of unigrams + bigrams with log tf.
+    No vocabulary/state, so incremental adds never invalidate earlier rows.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _features(self, text: str) -> Iterator[str]:
+        tokens = [t.lower() for t in _TOKEN_RE.findall(text)]
+        yield from tokens
+        for a, b in zip(tokens, tokens[1:]):
+            yield f"{a} {b}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts: dict[int, float] = {}
+            for feat in self._features(text):
+                h = zlib.crc32(feat.encode("utf-8"))
+                idx = h % self.dim
+                sign = 1.0 if (h >> 31) & 1 else -1.0
+                counts[idx] = counts.get(idx, 0.0) + sign
+            for idx, v in counts.items():
+                out[row, idx] = np.sign(v) * (1.0 + np.log(abs(v))) if v else 0.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+class KBVectorIndex:
+    def __init__(self, path: str, embedder: Embedder):
+        self.path = path
+        self.embedder = embedder
+        self._vec_path = os.path.join(path, "vectors.f32")
+        self._ids_path = os.path.join(path, "chunks.i64")
+        self._meta_path = os.path.join(path, "meta.json")
+        self._lock = threading.Lock()
+        self._vectors: np.ndarray | None = None
+        self._ids: np.ndarray | None = None
+        self._mapped: tuple[int, int, int] | None = None  # (vectors inode, ids inode, rows) currently mapped
+
+    # ---- files ----
+    @property
+    def _row_bytes(self) -> int:
+        return self.embedder.dim * 4
+
+    def _on_disk(self) -> tuple[int, int, int]:
+        """-> (vectors inode, ids inode, complete rows); a rebuild swaps the inodes, an append grows rows."""
+        try:
+            vec_stat = os.stat(self._vec_path)
+            ids_stat = os.stat(self._ids_path)
+        except FileNotFoundError:
+            return 0, 0, 0
+        # a concurrent append may have written only one of the two files so far
+        return vec_stat.st_ino, ids_stat.st_ino, min(vec_stat.st_size // self._row_bytes, ids_stat.st_size // 16)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, ".lock"), "w") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> dict | None:
+        """-> meta if it was written by this embedder, else None (missing / stale -> rebuild)."""
+        try:
+            with open(self._meta_path) as fh:
+                meta = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return None
+        if meta.get("embedder") != self.embedder.name or meta.get("dim") != self.embedder.dim:
+            return None
+        if not isinstance(meta.get("articles"), int) or not isinstance(meta.get("max_id"), int):
+            return None  # written before the sync stamp existed
+        return meta
+
+    def _write_meta(self, articles: int, max_id: int) -> None:
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(
+                {"embedder": self.embedder.name, "dim": self.embedder.dim, "articles": articles, "max_id": max_id}, fh
+            )
+        os.replace(tmp, self._meta_path)
+
+    def _remap(self) -> None:
+        state = self._on_disk()
+        if state == self._mapped:
+            return
+        rows = state[2]
+        if rows == 0:
+            self._vectors = np.zeros((0, self.embedder.dim), dtype=np.float32)
+            self._ids = np.zeros((0, 2), dtype=np.int64)
+        else:
+            self._vectors = np.memmap(self._vec_path, dtype=np.float32, mode="r", shape=(rows, self.embedder.dim))
+            self._ids = np.memmap(self._ids_path, dtype=np.int64, mode="r", shape=(rows, 2))
+        self._mapped = state
+
+    def _append(self, article_id: int, title: str, body: str, vec_path: str = "", ids_path: str = "") -> None:
+        chunks = article_chunks(title, body)
+        vectors = self.embedder.embed(chunks).astype(np.float32, copy=False)
+        ids = np.array([(article_id, i) for i in range(len(chunks))], dtype=np.int64)
+        with open(vec_path or self._vec_path, "ab") as vf, open(ids_path or self._ids_path, "ab") as idf:
+            vf.write(vectors.tobytes())
+            vf.flush()
+            idf.write(ids.tobytes())
+            idf.flush()
+
+    def _db_stamp(self, db: Session) -> tuple[int, int]:
+        """-> (article count, max article id). Articles are insert-only, so this is their version."""
+        count, max_id = db.execute(select(func.count(KBArticle.id), func.max(KBArticle.id))).one()
+        return int(count), int(max_id or 0)
+
+    # ---- public ----
+    def add_article(self, article_id: int, title: str, body: str) -> None:
+        """Incremental: append this article's chunks (called after create_article commits).
+        Other nodes pick it up on their next sync()."""
+        with self._file_lock():
+            meta = self._read_meta()
+            if meta is None or article_id <= meta["max_id"]:
+                return  # not built yet, or a sync already appended it
+            self._append(article_id, title, body)
+            self._write_meta(meta["articles"] + 1, article_id)
+
+    def _rebuild_locked(self, db: Session, batch_size: int) -> int:
+        # build beside the live files and swap them in: readers never map a half-built index
+        vec_tmp, ids_tmp = self._vec_path + ".tmp", self._ids_path + ".tmp"
+        for p in (vec_tmp, ids_tmp):
+            open(p, "wb").close()
+        stmt = select(KBArticle.id, KBArticle.title, KBArticle.body).order_by(KBArticle.id)
+        n = max_id = 0
+        for row in db.execute(stmt.execution_options(yield_per=batch_size)):
+            self._append(row.id, row.title, row.body, vec_tmp, ids_tmp)
+            n += 1
+            max_id = row.id
+        os.replace(vec_tmp, self._vec_path)
+        os.replace(ids_tmp, self._ids_path)
+        self._write_meta(n, max_id)
+        return n
+
+    def rebuild(self, db: Session, batch_size: int = 500) -> int:
+        with self._file_lock():
+            return self._rebuild_locked(db, batch_size)
+
+    def sync(self, db: Session, batch_size: int = 500) -> int:
+        """
+        Bring this node's files in line with kb_articles. -> articles (re)indexed.
+
+        Missing / other-embedder index -> rebuild. Otherwise articles past the
+        indexed max id (created through another node) are appended; if the
+        counts still disagree (an id committed out of order, a row deleted by
+        hand) -> rebuild. One aggregate query when nothing changed.
+        """
+        count, max_id = self._db_stamp(db)
+        with self._file_lock():
+            meta = self._read_meta()
+            if meta is None:
+                return self._rebuild_locked(db, batch_size)
+            if (meta["articles"], meta["max_id"]) == (count, max_id):
+                return 0
+            if meta["max_id"] < max_id:
+                stmt = (
+                    select(KBArticle.id, KBArticle.title, KBArticle.body)
+                    .where(KBArticle.id > meta["max_id"])
+                    .order_by(KBArticle.id)
+                )
+                added = 0
+                for row in db.execute(stmt.execution_options(yield_per=batch_size)):
+                    self._append(row.id, row.title, row.body)
+                    added += 1
+                    meta["max_id"] = row.id
+                meta["articles"] += added
+                self._write_meta(meta["articles"], meta["max_id"])
+                if meta["articles"] == count:
+                    return added
+            return self._rebuild_locked(db, batch_size)
+
+    def search(self, query: str, k: int = 3) -> list[tuple[int, int, float]]:
+        """-> [(article_id, chunk_no, cosine)] best chunk per article, highest first."""
+        with self._lock:
+            self._remap()
+            vectors, ids = self._vectors, self._ids
+        if vectors is None or len(vectors) == 0:
+            return []
+
+        q = self.embedder.embed([query])[0]
+        scores = vectors @ q
+        # over-fetch: several top chunks may belong to the same article
+        take = min(len(scores), k * 4)
+        top = np.argpartition(-scores, take - 1)[:take]
+        top = top[np.argsort(-scores[top])]
+
+        seen: set[int] = set()
+        out: list[tuple[int, int, float]] = []
+        for i in top:
+            article_id = int(ids[i, 0])
+            if article_id in seen:
+                continue
+            seen.add(article_id)
+            out.append((article_id, int(ids[i, 1]), float(scores[i])))
+            if len(out) == k:
+                break
+        return out
+
+
+kb_index = KBVectorIndex(settings.KB_INDEX_PATH, HashingEmbedder(settings.KB_EMBED_DIM))
+
+
+def retrieve_snippets(db: Session, query: str, k: int | None = None) -> list[tuple[int, str]]:
+    """
+    -> [(article_id, "title: chunk")] for DraftContext.kb_snippets.
+    One primary-key IN query for the hit articles; no table scan. Empty until the
+    sync thread has built this node's index.
+    """
+    k = k or settings.KB_RETRIEVAL_TOP_K
+    if not query.strip():
+        return []
+    hits = [h for h in kb_index.search(query, k) if h[2] >= settings.KB_RETRIEVAL_MIN_SCORE]
+    if not hits:
+        return []
+
+    rows = db.execute(
+        select(KBArticle.id, KBArticle.title, KBArticle.body).where(KBArticle.id.in_([h[0] for h in hits]))
+    ).all()
+    by_id = {r.id: r for r in rows}
+
+    out = []
+    for article_id, chunk_no, _ in hits:
+        r = by_id.get(article_id)
+        if not r:
+            continue
+        chunks = chunk_text(r.body) or [""]
+        chunk = chunks[min(chunk_no, len(chunks) - 1)]
+        out.append((article_id, f"{r.title}: {chunk}"))
+    return out
+
+
+_sync_thread: threading.Thread | None = None
+_sync_stop = threading.Event()
+
+
+def start_sync_thread() -> None:
+    """Per process: sync now (off the request path), then every KB_INDEX_SYNC_SECONDS."""
+    global _sync_thread
+    if _sync_thread is not None:
+        return
+    _sync_stop.clear()
+
+    def _loop() -> None:
+        from app.core.db import SessionLocal
+
+        while True:
+            try:
+                with SessionLocal() as db:
+                    n = kb_index.sync(db)
+                if n:
+                    log.info("kb index: indexed %d article(s)", n)
+            except Exception:
+                log.exception("kb index sync failed")
+            if settings.KB_INDEX_SYNC_SECONDS <= 0 or _sync_stop.wait(settings.KB_INDEX_SYNC_SECONDS):
+                return
+
+    _sync_thread = threading.Thread(target=_loop, name="kb-index-sync", daemon=True)
+    _sync_thread.start()
+
+
+def stop_sync_thread() -> None:
+    global _sync_thread
+    _sync_stop.set()
+    _sync_thread = None
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.core.db import SessionLocal
+
+    if sys.argv[1:] != ["rebuild"]:
+        raise SystemExit("usage: python -m app.services.kb_index rebuild")
+    with SessionLocal() as s:
+        print(f"indexed {kb_index.rebuild(s)} articles into {kb_index.path}")
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import html
+import math
+import re
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.orm import Session
+
+from app.models.kb import KBArticle
+from app.utils.tags import csv_to_tags
+
+# ts_headline marks matches with private-use characters; _headline_html escapes the
+# article text and only then turns them into <b></b>
+_MARK_START, _MARK_STOP = "\ue000", "\ue001"
+_HEADLINE_OPTS = (
+    "MaxFragments=2, MaxWords=30, MinWords=10, FragmentDelimiter=' … ', "
+    f'StartSel="{_MARK_START}", StopSel="{_MARK_STOP}"'
+)
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _headline_html(headline: str) -> str:
+    return html.escape(headline or "").replace(_MARK_START, "<b>").replace(_MARK_STOP, "</b>")
+
+
+def search_articles(db: Session, q: str, limit: int = 10) -> list[dict[str, Any]]:
+    """
+    Ranked KB search -> [{id, title, tags, snippet, score}] (no full bodies).
+    snippet is HTML: the article text escaped, matched words in <b></b>.
+    Postgres: search_vector @@ websearch_to_tsquery, GIN index, ts_rank_cd + ts_headline.
+    Anything else (SQLite test runs): in-Python BM25 over all articles.
+    """
+    q = (q or "").strip()
+    if not q:
+        return []
+    limit = min(max(limit, 1), 50)
+
+    if db.get_bind().dialect.name == "postgresql":
+        return _search_postgres(db, q, limit)
+    return _search_bm25(db, q, limit)
+
+
+def _search_postgres(db: Session, q: str, limit: int) -> list[dict[str, Any]]:
+    tsq = func.websearch_to_tsquery("english", q)
+    vec = literal_column("kb_articles.search_vector")
+    rank = func.ts_rank_cd(vec, tsq)
+
+    # rank + limit first, so ts_headline only runs on the rows we return
+    top = (
+        select(KBArticle.id, rank.label("score"))
+        .where(vec.op("@@")(tsq))
+        .order_by(rank.desc(), KBArticle.id.desc())
+        .limit(limit)
+        .subquery()
+    )
+    stmt = (
+        select(
+            KBArticle.id,
+            KBArticle.title,
+            KBArticle.tags_csv,
+            top.c.score,
+            func.ts_headline("english", KBArticle.body, tsq, _HEADLINE_OPTS).label("snippet"),
+        )
+        .join(top, top.c.id == KBArticle.id)
+        .order_by(top.c.score.desc(), KBArticle.id.desc())
+    )
+    return [
+        {
+            "id": r.id,
+            "title": r.title,
+            "tags": csv_to_tags(r.tags_csv),
+            "snippet": _headline_html(r.snippet),
+            "score": float(r.score),
+        }
+        for r in db.execute(stmt)
+    ]
+
+
+# ---- BM25 fallback ----
+def tokenize(text: str) -> list[str]:
+    return [t.lower() for t in _TOKEN_RE.findall(text or "")]
+
+
+def bm25_scores(
+    query_terms: list[str],
+    docs: list[list[str]],
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> list[float]:
+    n = len(docs)
+    if n == 0:
+        return []
+    avgdl = sum(len(d) for d in docs) / n or 1.0
+    terms = set(query_terms)
+    df = Counter(t for d in docs for t in terms.intersection(d))
+    idf = {t: math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in terms}
+
+    scores = []
+    for d in docs:
+        tf = Counter(d)
+        norm = k1 * (1 - b + b * len(d) / avgdl)
+        scores.append(sum(idf[t] * tf[t] * (k1 + 1) / (tf[t] + norm) for t in terms if tf[t]))
+    return scores
+
+
+def _snippet(body: str, terms: set[str], words: int = 30) -> str:
+    tokens = (body or "").split()
+    hit = next((i for i, w in enumerate(tokens) if set(tokenize(w)) & terms), 0)
+    start = max(hit - words // 3, 0)
+    out = []
+    for w in tokens[start : start + words]:
+        out.append(f"<b>{html.escape(w)}</b>" if set(tokenize(w)) & terms else html.escape(w))
+    return " ".join(out)
+
+
+def _search_bm25(db: Session, q: str, limit: int) -> list[dict[str, Any]]:
+    query_terms = tokenize(q)
+    rows = db.execute(select(KBArticle.id, KBArticle.title, KBArticle.body, KBArticle.tags_csv)).all()
+    # title counted twice ~ the 'A' weight on the Postgres side
+    docs = [tokenize(r.title) * 2 + tokenize(r.tags_csv) + tokenize(r.body) for r in rows]
+    scores = bm25_scores(query_terms, docs)
+
+    ranked = sorted(
+        (pair for pair in zip(scores, rows) if pair[0] > 0),
+        key=lambda pair: (pair[0], pair[1].id),
+        reverse=True,
+    )[:limit]
+    terms = set(query_terms)
+    return [
+        {
+            "id": r.id,
+            "title": r.title,
+            "tags": csv_to_tags(r.tags_csv),
+            "snippet": _snippet(r.body, terms),
+            "score": round(score, 6),
+        }
+        for score, r in ranked
+    ]
@@ -0,0 +1,99 @@
+"""
+refresh_tokens housekeeping.
+
+Every login / signup / refresh inserts a row and rotation only marks the old one
+revoked, so without this the table (and its jti_hash index) grows forever.
+
+- issue_refresh_token(): the one place rows are created; also evicts the user's
+  oldest active tokens beyond REFRESH_TOKENS_PER_USER.
+- revoke_family(): kills every live token of a login (reuse detection, logout).
+- sweep_refresh_tokens(): deletes expired / revoked rows in REFRESH_TOKEN_SWEEP_BATCH
+  chunks, one short transaction each; the "sweep_refresh_tokens" job runs it.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import uuid4
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import create_refresh_token, hash_jti
+from app.models.refresh_token import RefreshToken
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def issue_refresh_token(db: Session, user_id: int, family: Optional[str] = None, jti: Optional[str] = None) -> str:
+    """
+    Add a row for a new refresh token (caller commits). -> the encoded token.
+    family: the token family being rotated; None starts a new one (login / signup).
+    jti: the successor_jti() of the rotated token; None = random.
+    """
+    family = family or uuid4().hex
+    token, jti = create_refresh_token({"sub": str(user_id), "fam": family}, jti=jti)
+    db.add(
+        RefreshToken(
+            user_id=user_id,
+            jti_hash=hash_jti(jti),
+            family=family,
+            expires_at=_utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            revoked=False,
+        )
+    )
+    db.flush()
+    evict_excess_tokens(db, user_id)
+    return token
+
+
+def revoke_family(db: Session, family: str) -> int:
+    """Revoke the family's live tokens (caller commits). -> rows revoked."""
+    result = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family == family, RefreshToken.revoked.is_(False))
+        .values(revoked=True)
+    )
+    return result.rowcount
+
+
+def evict_excess_tokens(db: Session, user_id: int, keep: Optional[int] = None) -> int:
+    """Delete the user's oldest active tokens beyond `keep` (caller commits). -> rows deleted."""
+    keep = settings.REFRESH_TOKENS_PER_USER if keep is None else keep
+    if keep <= 0:
+        return 0
+    excess = db.scalars(
+        select(RefreshToken.id)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked.is_(False))
+        .order_by(RefreshToken.id.desc())
+        .offset(keep)
+    ).all()
+    if not excess:
+        return 0
+    db.execute(delete(RefreshToken).where(RefreshToken.id.in_(excess)))
+    return len(excess)
+
+
+def sweep_refresh_tokens(db: Session, batch: Optional[int] = None, now: Optional[datetime] = None) -> dict[str, int]:
+    """Delete expired and revoked rows, committing per batch. -> {"deleted": n, "batches": b}."""
+    batch = batch or settings.REFRESH_TOKEN_SWEEP_BATCH
+    now = now or _utcnow()
+    deleted = batches = 0
+    while True:
+        ids = db.scalars(
+            select(RefreshToken.id)
+            .where(or_(RefreshToken.revoked == True, RefreshToken.expires_at < now))  # noqa: E712
+            .limit(batch)
+        ).all()
+        if not ids:
+            break
+        db.execute(delete(RefreshToken).where(RefreshToken.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
+        batches += 1
+        if len(ids) < batch:
+            break
+    return {"deleted": deleted, "batches": batches}
@@ -0,0 +1,280 @@
+"""
+Refresh-token sessions: where a refresh token's state lives (settings.SESSION_STORE_BACKEND).
+
+- postgres: the refresh_tokens table (app.services.refresh_tokens). Rotation is a
+  SELECT ... FOR UPDATE + UPDATE + INSERT in the request's transaction, plus a
+  users lookup; refresh_tokens.family groups the rows of one login.
+- redis:    one key per live token, TTL = REFRESH_TOKEN_EXPIRE_DAYS. Rotation is a
+  single Lua call (GETDEL the old token + SET the new one), and the access-token
+  claims captured at login ride along, so /auth/refresh never touches Postgres.
+
+Redis layout (the {family} hash tag keeps a family in one cluster slot):
+    session:{family}:{jti_hash}  JSON {"uid", "claims"} of the family's live token
+    session:{family}             jti_hash of the live token
+    session:user:{user_id}       zset family -> last rotation time (per-user cap)
+
+With either store, every login starts a token family ("fam" claim); each refresh
+hands out the next token of the same family. Presenting a token that was already
+rotated away means it leaked: the whole family is revoked, so the attacker's copy
+dies with it. Logout revokes the family too. Exception: within
+REFRESH_TOKEN_REUSE_GRACE_SECONDS of its rotation, and while its successor is still
+the family's live token, the old token gets that same successor back (two tabs
+refreshing at once). The successor's jti is successor_jti(old jti), so it can be
+re-encoded instead of stored. (Postgres tokens issued before the
+family column existed rotate into a new family and can't be traced further back.)
+
+Switching backends logs everyone out once (tokens of the other store are rejected).
+With the redis store, refreshed access tokens reuse the claims captured at login
+(like AUTH_TRUST_TOKEN_CLAIMS does for access tokens); set that flag to False to
+look the user up on every refresh instead.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Optional, Protocol
+from uuid import uuid4
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.security import access_token_claims, create_refresh_token, hash_jti, successor_jti
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.services.refresh_tokens import issue_refresh_token, revoke_family
+
+log = logging.getLogger(__name__)
+
+
+def _rejected() -> HTTPException:
+    return HTTPException(status_code=401, detail="Refresh token revoked/expired")
+
+
+def _aware(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class RefreshedSession:
+    user_id: int
+    token: str  # the new refresh token
+    claims: Optional[dict[str, Any]]  # access-token claims; None = caller loads the user
+
+
+class SessionStore(Protocol):
+    # db is the request's session for stores with uses_db (caller commits); None otherwise
+    uses_db: bool
+
+    def issue(self, db: Optional[Session], user: User) -> str: ...
+    def rotate(self, db: Optional[Session], payload: dict[str, Any]) -> RefreshedSession: ...
+    def revoke(self, db: Optional[Session], payload: dict[str, Any]) -> None: ...
+
+
+# ---- Postgres ----
+class PostgresSessionStore:
+    uses_db = True
+
+    def issue(self, db: Optional[Session], user: User) -> str:
+        return issue_refresh_token(db, user.id)
+
+    def _grace_successor(self, db: Session, payload: dict[str, Any]) -> Optional[RefreshedSession]:
+        """The live successor of a token rotated less than the grace window ago, re-encoded."""
+        grace = settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS
+        if grace <= 0:
+            return None
+        jti = successor_jti(payload["jti"])
+        nxt = db.scalar(select(RefreshToken).where(RefreshToken.jti_hash == hash_jti(jti)))
+        if nxt is None or nxt.revoked:
+            return None
+        if (datetime.now(timezone.utc) - _aware(nxt.created_at)).total_seconds() > grace:
+            return None
+        token, _ = create_refresh_token(
+            {"sub": str(nxt.user_id), "fam": nxt.family}, jti=jti, expires_at=_aware(nxt.expires_at)
+        )
+        return RefreshedSession(user_id=nxt.user_id, token=token, claims=None)
+
+    def rotate(self, db: Optional[Session], payload: dict[str, Any]) -> RefreshedSession:
+        # FOR UPDATE: of two concurrent refreshes with one token, the second waits and sees it revoked
+        rt = db.scalar(
+            select(RefreshToken).where(RefreshToken.jti_hash == hash_jti(payload["jti"])).with_for_update()
+        )
+        if rt is not None and rt.revoked:
+            session = self._grace_successor(db, payload)
+            if session is not None:
+                return session
+        if rt is None or rt.revoked:
+            # already rotated (or rotated and swept): the token leaked, take its family down
+            family = (rt.family if rt is not None else None) or payload.get("fam")
+            if family and revoke_family(db, family):
+                db.commit()
+                log.warning("refresh token reuse for user %s: family %s revoked", payload.get("sub"), family)
+            raise _rejected()
+        if _aware(rt.expires_at) < datetime.now(timezone.utc):
+            raise _rejected()
+        rt.revoked = True
+        token = issue_refresh_token(db, rt.user_id, family=rt.family, jti=successor_jti(payload["jti"]))
+        return RefreshedSession(user_id=rt.user_id, token=token, claims=None)
+
+    def revoke(self, db: Optional[Session], payload: dict[str, Any]) -> None:
+        rt = db.scalar(select(RefreshToken).where(RefreshToken.jti_hash == hash_jti(payload["jti"])))
+        if rt is None:
+            return
+        rt.revoked = True
+        if rt.family:
+            revoke_family(db, rt.family)
+        db.commit()
+
+
+# ---- Redis ----
+# KEYS: old token, family pointer, new token   ARGV: new jti_hash, ttl ms, now ms, grace ms
+# -> the old token's value; "grace:<rotated ms>:<value>" if the old token was rotated
+#    within the grace window and the new token (its successor) is still live; or
+#    "reuse" / "missing" (and the family is gone). A rotated token's key stays
+#    behind as "rotated:<ms>" for the grace window.
+_ROTATE_LUA = """
+local v = redis.call('GET', KEYS[1])
+if v and string.sub(v, 1, 8) ~= 'rotated:' then
+  if tonumber(ARGV[4]) > 0 then
+    redis.call('SET', KEYS[1], 'rotated:' .. ARGV[3], 'PX', ARGV[4])
+  else
+    redis.call('DEL', KEYS[1])
+  end
+  redis.call('SET', KEYS[3], v, 'PX', ARGV[2])
+  redis.call('SET', KEYS[2], ARGV[1], 'PX', ARGV[2])
+  return v
+end
+local live = redis.call('GET', KEYS[2])
+if not live then
+  return 'missing'
+end
+if v and live == ARGV[1] then
+  local nxt = redis.call('GET', KEYS[3])
+  if nxt then
+    return 'grace:' .. string.sub(v, 9) .. ':' .. nxt
+  end
+end
+redis.call('DEL', KEYS[2], KEYS[2] .. ':' .. live)
+return 'reuse'
+"""
+
+# KEYS: family pointer -> 1 if the family existed
+_REVOKE_LUA = """
+local live = redis.call('GET', KEYS[1])
+if not live then
+  return 0
+end
+redis.call('DEL', KEYS[1], KEYS[1] .. ':' .. live)
+return 1
+"""
+
+
+class RedisSessionStore:
+    uses_db = False
+
+    def __init__(self):
+        self._rotate = None
+        self._revoke = None
+
+    @property
+    def r(self):
+        return get_redis()
+
+    @property
+    def ttl_ms(self) -> int:
+        return settings.REFRESH_TOKEN_EXPIRE_DAYS * 86_400_000
+
+    @staticmethod
+    def _family_key(family: str) -> str:
+        return f"session:{{{family}}}"
+
+    @classmethod
+    def _token_key(cls, family: str, jti: str) -> str:
+        return f"{cls._family_key(family)}:{hash_jti(jti)}"
+
+    @staticmethod
+    def _user_key(user_id: int) -> str:
+        return f"session:user:{user_id}"
+
+    def issue(self, db: Optional[Session], user: User) -> str:
+        family = uuid4().hex
+        token, jti = create_refresh_token({"sub": str(user.id), "fam": family})
+        value = json.dumps({"uid": user.id, "claims": access_token_claims(user)})
+
+        pipe = self.r.pipeline(transaction=False)
+        pipe.set(self._token_key(family, jti), value, px=self.ttl_ms)
+        pipe.set(self._family_key(family), hash_jti(jti), px=self.ttl_ms)
+        pipe.execute()
+        self._track(user.id, family)
+        return token
+
+    def _track(self, user_id: int, family: str) -> None:
+        """Record the family under the user and evict the least recently used beyond the cap."""
+        key = self._user_key(user_id)
+        now = time.time()
+        pipe = self.r.pipeline(transaction=False)
+        pipe.zadd(key, {family: now})
+        pipe.zremrangebyscore(key, "-inf", now - self.ttl_ms / 1000)  # families that expired on their own
+        pipe.pexpire(key, self.ttl_ms)
+        pipe.zcard(key)
+        excess = pipe.execute()[-1] - settings.REFRESH_TOKENS_PER_USER
+        if settings.REFRESH_TOKENS_PER_USER > 0 and excess > 0:
+            for old_family, _ in self.r.zpopmin(key, excess):
+                self._revoke_family(old_family)
+
+    def _revoke_family(self, family: str) -> bool:
+        if self._revoke is None:
+            self._revoke = self.r.register_script(_REVOKE_LUA)
+        return bool(self._revoke(keys=[self._family_key(family)]))
+
+    def rotate(self, db: Optional[Session], payload: dict[str, Any]) -> RefreshedSession:
+        family = payload.get("fam")
+        if not family:
+            raise _rejected()  # issued by the postgres store
+        user_id = int(payload["sub"])
+        jti = successor_jti(payload["jti"])
+
+        if self._rotate is None:
+            self._rotate = self.r.register_script(_ROTATE_LUA)
+        now_ms = int(time.time() * 1000)
+        result = self._rotate(
+            keys=[self._token_key(family, payload["jti"]), self._family_key(family), self._token_key(family, jti)],
+            args=[hash_jti(jti), self.ttl_ms, now_ms, settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS * 1000],
+        )
+        if result == "reuse":
+            log.warning("refresh token reuse for user %s: family %s revoked", user_id, family)
+            self.r.zrem(self._user_key(user_id), family)
+        if result in ("reuse", "missing"):
+            raise _rejected()
+
+        rotated_ms = now_ms
+        if result.startswith("grace:"):
+            _, rotated, result = result.split(":", 2)
+            rotated_ms = int(rotated)
+        expires_at = datetime.fromtimestamp(rotated_ms / 1000 + self.ttl_ms / 1000, tz=timezone.utc)
+        token, _ = create_refresh_token({"sub": str(user_id), "fam": family}, jti=jti, expires_at=expires_at)
+
+        self.r.zadd(self._user_key(user_id), {family: time.time()})
+        claims = json.loads(result).get("claims")
+        if not settings.AUTH_TRUST_TOKEN_CLAIMS or not (claims and claims.get("org_id")):
+            claims = None
+        return RefreshedSession(user_id=user_id, token=token, claims=claims)
+
+    def revoke(self, db: Optional[Session], payload: dict[str, Any]) -> None:
+        family = payload.get("fam")
+        if family and self._revoke_family(family):
+            self.r.zrem(self._user_key(int(payload["sub"])), family)
+
+
+def _make_store() -> SessionStore:
+    if settings.SESSION_STORE_BACKEND == "redis":
+        return RedisSessionStore()
+    return PostgresSessionStore()
+
+
+session_store: SessionStore = _make_store()
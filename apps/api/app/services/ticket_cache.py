@@ -0,0 +1,124 @@
+"""
+Two-tier cache of serialized GET /tickets/{id} bodies: per-process LRU -> Redis.
+
+Key = (ticket_id, tickets.change_seq, messages_limit). Every write that changes
+what the detail shows (create, add_message, update_ticket, bulk import) gives
+the ticket a new change_seq in the same transaction, and the route reads the
+current change_seq from Postgres before looking here, so a write makes the old
+entries unreachable at commit and a stale body can't be served, whichever tier
+or process it sits in. The same version is the ETag.
+
+Superseded entries simply age out (Redis TTL, local LRU); writes call
+invalidate_ticket() so they don't sit in this process's memory until then.
+The local tier is bounded by bytes (TICKET_CACHE_LOCAL_MAX_BYTES), not entries:
+one 500-message thread weighs as much as a few hundred short ones.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.utils.lru import LRUCache
+
+log = logging.getLogger(__name__)
+
+# (body, X-Messages-Cursor or None)
+CachedDetail = tuple[bytes, Optional[str]]
+
+
+def detail_key(ticket_id: int, version: int, messages_limit: Optional[int]) -> str:
+    return f"ticketdetail:{ticket_id}:{version}:{messages_limit or 'all'}"
+
+
+def detail_etag(ticket_id: int, version: int, messages_limit: Optional[int]) -> str:
+    tag = f"{ticket_id}.{version}" if messages_limit is None else f"{ticket_id}.{version}.{messages_limit}"
+    return f'"{tag}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored, "*" matches anything."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class TicketDetailCache:
+    def __init__(
+        self, local_max: int, local_max_bytes: int, ttl_seconds: int, use_redis: bool, enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+        self._local: LRUCache[str, CachedDetail] = LRUCache(
+            local_max, ttl_seconds, max_bytes=local_max_bytes, sizeof=lambda v: len(v[0])
+        )
+        self.hits_local = 0
+        self.hits_redis = 0
+        self.misses = 0
+
+    def get(self, ticket_id: int, version: int, messages_limit: Optional[int]) -> Optional[CachedDetail]:
+        if not self.enabled:
+            return None
+        key = detail_key(ticket_id, version, messages_limit)
+        hit = self._local.get(key)
+        if hit is not None:
+            self.hits_local += 1
+            return hit
+
+        if self.use_redis:
+            try:
+                raw = get_redis().get(key)
+            except Exception:
+                log.warning("ticket cache: redis get failed", exc_info=True)
+                raw = None
+            if raw is not None:
+                self.hits_redis += 1
+                cursor, _, body = raw.partition("\n")
+                hit = (body.encode("utf-8"), cursor or None)
+                self._local.set(key, hit)
+                return hit
+
+        self.misses += 1
+        return None
+
+    def set(
+        self, ticket_id: int, version: int, messages_limit: Optional[int], body: bytes, cursor: Optional[str]
+    ) -> None:
+        if not self.enabled:
+            return
+        key = detail_key(ticket_id, version, messages_limit)
+        self._local.set(key, (body, cursor))
+        if self.use_redis:
+            try:
+                # cursors are base64url, never contain "\n"
+                get_redis().set(key, f"{cursor or ''}\n{body.decode('utf-8')}", ex=self.ttl_seconds)
+            except Exception:
+                log.warning("ticket cache: redis set failed", exc_info=True)
+
+    def invalidate_ticket(self, ticket_id: int) -> None:
+        # correctness comes from the version in the key; this only frees local memory
+        self._local.delete_prefix(f"ticketdetail:{ticket_id}:")
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits_local": self.hits_local,
+            "hits_redis": self.hits_redis,
+            "misses": self.misses,
+            "local_entries": len(self._local),
+            "local_bytes": self._local.size_bytes,
+        }
+
+
+ticket_cache = TicketDetailCache(
+    local_max=settings.TICKET_CACHE_LOCAL_MAX,
+    local_max_bytes=settings.TICKET_CACHE_LOCAL_MAX_BYTES,
+    ttl_seconds=settings.TICKET_CACHE_TTL_SECONDS,
+    use_redis=settings.TICKET_CACHE_BACKEND == "redis",
+    enabled=settings.TICKET_CACHE_BACKEND != "off",
+)
@@ -0,0 +1,194 @@
+"""
+Streaming export of an org's tickets + messages (NDJSON / CSV).
+
+One query: tickets LEFT JOIN messages ordered by (ticket id, message id), read
+through a server-side cursor (stream_results + yield_per), so memory stays at
+roughly one fetch batch + one ticket's thread no matter how big the org is.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Row
+
+from app.core.db import SessionLocal
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.models.ticket_message import TicketMessage
+
+FETCH_ROWS = 1000
+FLUSH_EVERY = 200  # records per chunk written to the socket
+
+CSV_COLUMNS = [
+    "ticket_id",
+    "ticket_external_id",
+    "subject",
+    "status",
+    "priority",
+    "ticket_created_at",
+    "ticket_updated_at",
+    "message_id",
+    "message_external_id",
+    "role",
+    "content",
+    "message_created_at",
+]
+
+
+@dataclass(frozen=True)
+class ExportFilters:
+    status: Optional[TicketStatus] = None
+    priority: Optional[TicketPriority] = None
+    updated_from: Optional[datetime] = None
+    updated_to: Optional[datetime] = None
+
+
+def _export_query(org_id: int, f: ExportFilters):
+    t, m = Ticket.__table__, TicketMessage.__table__
+    q = (
+        select(
+            t.c.id,
+            t.c.external_id,
+            t.c.subject,
+            t.c.status,
+            t.c.priority,
+            t.c.created_at,
+            t.c.updated_at,
+            m.c.id.label("message_id"),
+            m.c.external_id.label("message_external_id"),
+            m.c.role,
+            m.c.content,
+            m.c.created_at.label("message_created_at"),
+        )
+        .select_from(t.outerjoin(m, m.c.ticket_id == t.c.id))
+        .where(t.c.org_id == org_id)
+        .order_by(t.c.id, m.c.id)
+    )
+    if f.status is not None:
+        q = q.where(t.c.status == f.status)
+    if f.priority is not None:
+        q = q.where(t.c.priority == f.priority)
+    if f.updated_from is not None:
+        q = q.where(t.c.updated_at >= f.updated_from)
+    if f.updated_to is not None:
+        q = q.where(t.c.updated_at < f.updated_to)
+    return q
+
+
+def iter_export_rows(org_id: int, f: ExportFilters) -> Iterator[Row]:
+    """
+    Own session (the request's session is closed before a StreamingResponse body runs).
+    The cursor stays open until the generator is exhausted or closed.
+    """
+    with SessionLocal() as db:
+        if db.get_bind().dialect.name == "postgresql":
+            # a big export is allowed to outlive DB_STATEMENT_TIMEOUT_MS
+            db.execute(text("SET LOCAL statement_timeout = 0"))
+        result = db.execute(_export_query(org_id, f).execution_options(stream_results=True, yield_per=FETCH_ROWS))
+        yield from result
+
+
+def _iso(v: Optional[datetime]) -> Optional[str]:
+    return v.isoformat() if v is not None else None
+
+
+def _enum(v: Any) -> Any:
+    return getattr(v, "value", v)
+
+
+def _ticket_doc(row: Row) -> dict[str, Any]:
+    return {
+        "id": row.id,
+        "external_id": row.external_id,
+        "subject": row.subject,
+        "status": _enum(row.status),
+        "priority": _enum(row.priority),
+        "created_at": _iso(row.created_at),
+        "updated_at": _iso(row.updated_at),
+        "messages": [],
+    }
+
+
+def stream_ndjson(rows: Iterator[Row]) -> Iterator[str]:
+    """One line per ticket with its messages inlined."""
+    lines: list[str] = []
+    doc: Optional[dict[str, Any]] = None
+    for row in rows:
+        if doc is None or doc["id"] != row.id:
+            if doc is not None:
+                lines.append(json.dumps(doc, ensure_ascii=False))
+                if len(lines) >= FLUSH_EVERY:
+                    yield "\n".join(lines) + "\n"
+                    lines.clear()
+            doc = _ticket_doc(row)
+        if row.message_id is not None:
+            doc["messages"].append(
+                {
+                    "id": row.message_id,
+                    "external_id": row.message_external_id,
+                    "role": _enum(row.role),
+                    "content": row.content,
+                    "created_at": _iso(row.message_created_at),
+                }
+            )
+    if doc is not None:
+        lines.append(json.dumps(doc, ensure_ascii=False))
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+# a spreadsheet evaluates cells starting with these as formulas (CSV injection)
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_safe(value: Optional[str]) -> Optional[str]:
+    """
+    Neutralise user text that a spreadsheet would run as a formula.
+
+    >>> print(_csv_safe('=HYPERLINK("http://evil", "x")'))
+    '=HYPERLINK("http://evil", "x")
+    >>> [_csv_safe(v) for v in ("+1", "-2", "@SUM(A1)", "plain", "", None)]
+    ["'+1", "'-2", "'@SUM(A1)", 'plain', '', None]
+    """
+    if value and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows: Iterator[Row]) -> Iterator[str]:
+    """
+    One line per message (ticket columns repeated); tickets without messages get one line.
+    Free-text columns go through _csv_safe; NDJSON keeps the raw values.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_COLUMNS)
+    n = 0
+    for row in rows:
+        writer.writerow(
+            [
+                row.id,
+                _csv_safe(row.external_id),
+                _csv_safe(row.subject),
+                _enum(row.status),
+                _enum(row.priority),
+                _iso(row.created_at),
+                _iso(row.updated_at),
+                row.message_id,
+                _csv_safe(row.message_external_id),
+                _enum(row.role),
+                _csv_safe(row.content),
+                _iso(row.message_created_at),
+            ]
+        )
+        n += 1
+        if n % FLUSH_EVERY == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+    yield buf.getvalue()
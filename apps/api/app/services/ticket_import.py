@@ -0,0 +1,254 @@
+"""
+Batch ticket / message ingest for email-gateway and helpdesk imports.
+
+One batch = a few multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING statements
+(split to stay under the drivers' bind-parameter limits) in a single transaction.
+Idempotency comes from client external ids: re-sending a batch reports the
+existing rows as "exists" instead of duplicating them.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+from sqlalchemy import bindparam, case, select, update
+from sqlalchemy.orm import Session
+
+from app.models.ticket import Ticket
+from app.models.ticket_message import TicketMessage
+from app.schemas.ticket_import import ImportResult, ImportTicketIn, IngestMessageIn
+from app.services.changes import next_change_seq
+from app.services.ticket_stats import bump_stats, count_keys
+from app.utils.sql import dialect_insert
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# bind parameters per multi-row INSERT: under SQLite's 32766 and Postgres' 65535
+MAX_BIND_PARAMS = 30_000
+
+
+def _param_chunks(rows: list[dict[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+    """Split rows so that no VALUES list needs more than MAX_BIND_PARAMS parameters."""
+    if not rows:
+        return
+    size = max(MAX_BIND_PARAMS // len(rows[0]), 1)
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _insert_tickets(db: Session, rows: list[dict[str, Any]]) -> list[Any]:
+    """-> RETURNING (id, external_id) of the rows actually inserted."""
+    inserted: list[Any] = []
+    for chunk in _param_chunks(rows):
+        stmt = (
+            dialect_insert(db, Ticket)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=["org_id", "external_id"])
+            .returning(Ticket.id, Ticket.external_id)
+        )
+        inserted += db.execute(stmt).all()
+    return inserted
+
+
+def _insert_messages(db: Session, rows: list[dict[str, Any]]) -> list[Any]:
+    """-> RETURNING (id, ticket_id, external_id) of the rows actually inserted."""
+    inserted: list[Any] = []
+    for chunk in _param_chunks(rows):
+        stmt = (
+            dialect_insert(db, TicketMessage)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=["ticket_id", "external_id"])
+            .returning(TicketMessage.id, TicketMessage.ticket_id, TicketMessage.external_id)
+        )
+        inserted += db.execute(stmt).all()
+    return inserted
+
+
+def _bump_tickets(db: Session, latest: dict[int, tuple[datetime, int]]) -> None:
+    """latest: ticket id -> (newest message time, highest message change_seq)."""
+    if not latest:
+        return
+    tickets = Ticket.__table__
+    stmt = (
+        update(tickets)
+        .where(tickets.c.id == bindparam("b_id"))
+        .values(
+            updated_at=case(
+                (tickets.c.updated_at < bindparam("b_ts"), bindparam("b_ts")),
+                else_=tickets.c.updated_at,
+            ),
+            change_seq=bindparam("b_seq"),
+        )
+    )
+    # Core executemany: one round-trip for the whole batch
+    db.connection().execute(
+        stmt, [{"b_id": tid, "b_ts": ts, "b_seq": seq} for tid, (ts, seq) in latest.items()]
+    )
+
+
+def import_ticket_batch(
+    db: Session, org_id: int, items: list[tuple[int, ImportTicketIn]]
+) -> tuple[list[ImportResult], list[int]]:
+    """
+    items: (request index, validated ticket). Commits.
+    -> (per-item results, ids of newly created tickets)
+    """
+    now = _utcnow()
+    results: list[ImportResult] = []
+
+    first: dict[str, tuple[int, ImportTicketIn]] = {}
+    for index, item in items:
+        first.setdefault(item.external_id, (index, item))
+
+    # seqs for every message and then its ticket (ticket >= its messages); the ones
+    # that hit an existing external_id are simply never used
+    seq = next_change_seq(db, org_id, sum(len(item.messages) + 1 for _, item in first.values())) if first else 0
+    msg_seqs: dict[str, int] = {}
+    rows = []
+    for _, item in first.values():
+        created_at = item.created_at or now
+        msg_times = [m.created_at or created_at for m in item.messages]
+        msg_seqs[item.external_id] = seq
+        seq += len(item.messages)
+        rows.append(
+            {
+                "org_id": org_id,
+                "external_id": item.external_id,
+                "subject": item.subject,
+                "status": item.status,
+                "priority": item.priority,
+                "created_at": created_at,
+                "updated_at": max([created_at, *msg_times]),
+                "change_seq": seq,
+            }
+        )
+        seq += 1
+
+    created = {r.external_id: r.id for r in _insert_tickets(db, rows)}
+
+    missing = [ext for ext in first if ext not in created]
+    existing: dict[str, int] = {}
+    if missing:
+        existing = dict(
+            db.execute(
+                select(Ticket.external_id, Ticket.id).where(Ticket.org_id == org_id, Ticket.external_id.in_(missing))
+            ).all()
+        )
+
+    msg_rows = []
+    for ext, (_, item) in first.items():
+        ticket_id = created.get(ext)
+        if ticket_id is None:
+            continue  # existing ticket: its thread was imported with it
+        created_at = item.created_at or now
+        for i, m in enumerate(item.messages):
+            msg_rows.append(
+                {
+                    "ticket_id": ticket_id,
+                    "external_id": m.external_id,
+                    "role": m.role,
+                    "content": m.content,
+                    "created_at": m.created_at or created_at,
+                    "change_seq": msg_seqs[ext] + i,
+                }
+            )
+    _insert_messages(db, msg_rows)
+    new_keys = ((item.status, item.priority) for ext, (_, item) in first.items() if ext in created)
+    bump_stats(db, org_id, count_keys(new_keys))
+    db.commit()
+
+    for index, item in items:
+        ext = item.external_id
+        if ext in created and first[ext][0] == index:
+            results.append(ImportResult(index=index, external_id=ext, status="created", id=created[ext]))
+        else:
+            ticket_id = created.get(ext) or existing.get(ext)
+            results.append(ImportResult(index=index, external_id=ext, status="exists", id=ticket_id))
+    return results, list(created.values())
+
+
+def import_message_batch(
+    db: Session, org_id: int, items: list[tuple[int, IngestMessageIn]]
+) -> tuple[list[ImportResult], list[int]]:
+    """
+    items: (request index, validated message). Commits.
+    -> (per-item results, ids of tickets that received messages)
+    """
+    ids = {m.ticket_id for _, m in items if m.ticket_id is not None}
+    exts = {m.ticket_external_id for _, m in items if m.ticket_external_id is not None}
+
+    by_id: set[int] = set()
+    if ids:
+        by_id = set(db.scalars(select(Ticket.id).where(Ticket.org_id == org_id, Ticket.id.in_(list(ids)))))
+    by_ext: dict[str, int] = {}
+    if exts:
+        by_ext = dict(
+            db.execute(
+                select(Ticket.external_id, Ticket.id).where(Ticket.org_id == org_id, Ticket.external_id.in_(list(exts)))
+            ).all()
+        )
+
+    results: dict[int, ImportResult] = {}
+    resolved: list[tuple[int, int, IngestMessageIn]] = []
+    for index, m in items:
+        ticket_id = m.ticket_id if m.ticket_id in by_id else by_ext.get(m.ticket_external_id or "")
+        if ticket_id is None:
+            results[index] = ImportResult(index=index, external_id=m.external_id, status="error", error="ticket not found")
+        else:
+            resolved.append((index, ticket_id, m))
+
+    now = _utcnow()
+    first: dict[tuple[int, str], tuple[int, IngestMessageIn]] = {}
+    for index, ticket_id, m in resolved:
+        first.setdefault((ticket_id, m.external_id), (index, m))
+
+    seq = next_change_seq(db, org_id, len(first)) if first else 0
+    msg_seqs = {key: seq + i for i, key in enumerate(first)}
+    inserted = _insert_messages(
+        db,
+        [
+            {
+                "ticket_id": ticket_id,
+                "external_id": ext,
+                "role": m.role,
+                "content": m.content,
+                "created_at": m.created_at or now,
+                "change_seq": msg_seqs[(ticket_id, ext)],
+            }
+            for (ticket_id, ext), (_, m) in first.items()
+        ],
+    )
+    created = {(r.ticket_id, r.external_id): r.id for r in inserted}
+
+    missing = [key for key in first if key not in created]
+    existing: dict[tuple[int, str], int] = {}
+    if missing:
+        rows = db.execute(
+            select(TicketMessage.ticket_id, TicketMessage.external_id, TicketMessage.id).where(
+                TicketMessage.ticket_id.in_(list({t for t, _ in missing})),
+                TicketMessage.external_id.in_(list({e for _, e in missing})),
+            )
+        ).all()
+        existing = {(r.ticket_id, r.external_id): r.id for r in rows}
+
+    latest: dict[int, tuple[datetime, int]] = defaultdict(lambda: (datetime.min.replace(tzinfo=timezone.utc), 0))
+    for key, (_, m) in first.items():
+        if key in created:
+            ts, top = latest[key[0]]
+            latest[key[0]] = (max(ts, m.created_at or now), max(top, msg_seqs[key]))
+    _bump_tickets(db, dict(latest))
+    db.commit()
+
+    for index, ticket_id, m in resolved:
+        key = (ticket_id, m.external_id)
+        if key in created and first[key][0] == index:
+            results[index] = ImportResult(index=index, external_id=m.external_id, status="created", id=created[key])
+        else:
+            results[index] = ImportResult(
+                index=index, external_id=m.external_id, status="exists", id=created.get(key) or existing.get(key)
+            )
+    return [results[i] for i, _ in items], list(latest)
@@ -0,0 +1,114 @@
+"""
+Incrementally maintained ticket counts (ticket_stats) for dashboards.
+
+Write paths call bump_stats() in the same transaction as the ticket change, so
+the counts commit or roll back with it. reconcile_org() recounts from tickets
+under the org row lock (the one next_change_seq takes), which serializes it
+with concurrent ticket writes; the "reconcile_stats" job runs it for every org.
+"""
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.org import Org
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.models.ticket_stats import TicketStats
+from app.utils.sql import dialect_insert
+
+log = logging.getLogger(__name__)
+
+Key = tuple[TicketStatus, TicketPriority]
+
+
+def bump_stats(db: Session, org_id: int, deltas: dict[Key, int]) -> None:
+    rows = [
+        {"org_id": org_id, "status": status, "priority": priority, "count": n}
+        for (status, priority), n in deltas.items()
+        if n
+    ]
+    if not rows:
+        return
+    stmt = dialect_insert(db, TicketStats).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["org_id", "status", "priority"],
+        set_={"count": TicketStats.__table__.c["count"] + stmt.excluded["count"]},
+    )
+    db.execute(stmt)
+
+
+def ticket_moved(old: Key, new: Key) -> dict[Key, int]:
+    """Deltas for a status / priority change (empty when nothing moved)."""
+    if old == new:
+        return {}
+    return {old: -1, new: 1}
+
+
+def count_keys(keys: Iterable[Key]) -> dict[Key, int]:
+    return dict(Counter(keys))
+
+
+def stats_for_org(db: Session, org_id: int) -> dict[str, Any]:
+    rows = db.execute(
+        select(TicketStats.status, TicketStats.priority, TicketStats.count).where(TicketStats.org_id == org_id)
+    ).all()
+    return summarize(rows)
+
+
+def summarize(rows: Iterable[tuple[TicketStatus, TicketPriority, int]]) -> dict[str, Any]:
+    matrix = {s.value: {p.value: 0 for p in TicketPriority} for s in TicketStatus}
+    for status, priority, n in rows:
+        matrix[TicketStatus(status).value][TicketPriority(priority).value] = n
+    by_status = {s: sum(ps.values()) for s, ps in matrix.items()}
+    by_priority = {p.value: sum(matrix[s][p.value] for s in matrix) for p in TicketPriority}
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "by_status_priority": matrix,
+    }
+
+
+def _lock_org(db: Session, org_id: int) -> None:
+    orgs = Org.__table__
+    # no-op UPDATE: takes the same row lock as next_change_seq on every backend
+    db.execute(update(orgs).where(orgs.c.id == org_id).values(change_seq=orgs.c.change_seq))
+
+
+def reconcile_org(db: Session, org_id: int) -> int:
+    """Recount one org from tickets and rewrite its rows. Commits. -> number of counters that were off."""
+    _lock_org(db, org_id)
+    actual = {
+        (TicketStatus(s), TicketPriority(p)): n
+        for s, p, n in db.execute(
+            select(Ticket.status, Ticket.priority, func.count())
+            .where(Ticket.org_id == org_id)
+            .group_by(Ticket.status, Ticket.priority)
+        )
+    }
+    stored = {
+        (TicketStatus(s), TicketPriority(p)): n
+        for s, p, n in db.execute(
+            select(TicketStats.status, TicketStats.priority, TicketStats.count).where(TicketStats.org_id == org_id)
+        )
+    }
+    drift = sum(1 for k in actual.keys() | stored.keys() if actual.get(k, 0) != stored.get(k, 0))
+    if drift:
+        log.warning("ticket_stats drift for org %s: %d counter(s) corrected", org_id, drift)
+        db.execute(delete(TicketStats).where(TicketStats.org_id == org_id))
+        bump_stats(db, org_id, actual)
+    db.commit()
+    return drift
+
+
+def reconcile_all(db: Session, org_ids: Optional[Iterable[int]] = None) -> dict[str, int]:
+    """One transaction per org, so ticket writes are only ever blocked for one org's recount."""
+    ids = list(org_ids) if org_ids is not None else list(db.scalars(select(Org.id).order_by(Org.id)))
+    fixed = 0
+    for org_id in ids:
+        fixed += reconcile_org(db, org_id)
+    return {"orgs": len(ids), "fixed": fixed}
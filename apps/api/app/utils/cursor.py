@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Opaque keyset cursor: values (datetime / int / str) -> urlsafe base64 JSON.
+    """
+    data = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(data, list):
+        raise InvalidCursor("Invalid cursor")
+    return data
+
+
+def decode_datetime_id_cursor(cursor: str) -> tuple[datetime, int]:
+    data = decode_cursor(cursor)
+    if len(data) != 2:
+        raise InvalidCursor("Invalid cursor")
+    try:
+        return datetime.fromisoformat(data[0]), int(data[1])
+    except (TypeError, ValueError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def decode_int_cursor(cursor: str) -> int:
+    data = decode_cursor(cursor)
+    if len(data) != 1 or not isinstance(data[0], int) or data[0] < 0:
+        raise InvalidCursor("Invalid cursor")
+    return data[0]
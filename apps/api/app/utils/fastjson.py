@@ -0,0 +1,34 @@
+"""
+Lean read path: column-only rows -> dicts -> orjson.
+
+Skips ORM identity-map objects and the response_model (Pydantic) pass; orjson
+encodes datetimes and str-Enums natively in C. Output matches what FastAPI +
+Pydantic would produce for the same fields (UTC datetimes end in "Z").
+Routes keep their response_model for the OpenAPI schema; returning a Response
+bypasses it at runtime, so the selected columns must line up with the schema.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+from sqlalchemy.engine import Result
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=_OPTIONS)
+
+
+class LeanJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def row_dicts(result: Result) -> list[dict[str, Any]]:
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Thread-safe LRU with optional TTL (ttl_seconds <= 0: no expiry).
+
+    With max_bytes > 0 it is also bounded by the summed size of its values
+    (sizeof, default len()); a value bigger than max_bytes is not stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float = 0,
+        max_bytes: int = 0,
+        sizeof: Optional[Callable[[V], int]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or len
+        self._data: "OrderedDict[K, tuple[float, V, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            expires, value, _ = hit
+            if expires and expires < time.monotonic():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        size = self._sizeof(value) if self.max_bytes > 0 else 0
+        with self._lock:
+            self._pop(key)
+            if self.max_bytes > 0 and size > self.max_bytes:
+                return
+            self._data[key] = (expires, value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes > 0 and self._bytes > self.max_bytes):
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+
+    def _pop(self, key: K) -> None:
+        hit = self._data.pop(key, None)
+        if hit is not None:
+            self._bytes -= hit[2]
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Drop every str key starting with prefix (O(n); meant for small local tiers)."""
+        with self._lock:
+            stale = [k for k in self._data if isinstance(k, str) and k.startswith(prefix)]
+            for k in stale:
+                self._pop(k)
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._data)
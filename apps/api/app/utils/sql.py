@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(db: Session, entity):
+    """INSERT construct with ON CONFLICT support for the session's backend (postgres / sqlite)."""
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        return pg_insert(entity)
+    if name == "sqlite":
+        return sqlite_insert(entity)
+    raise NotImplementedError(f"ON CONFLICT insert not supported for {name}")
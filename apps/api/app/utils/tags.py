@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+
+def tags_to_csv(tags: list[str]) -> str:
+    """KB article tags -> the kb_articles.tags_csv column (blank tags dropped)."""
+    return ",".join(x for x in ((t or "").strip() for t in tags) if x)
+
+
+def csv_to_tags(s: str) -> list[str]:
+    if not s:
+        return []
+    return [x for x in (p.strip() for p in s.split(",")) if x]
@@ -0,0 +1,67 @@
+"""
+Job worker pool (Redis backend):
+
+    python -m app.worker --processes 4
+
+Each process loops over app.services.jobs.run_one; SIGTERM/SIGINT stop them
+after their current job. A process that dies mid-job stops refreshing its
+liveness marker; the next reap (any worker) puts its job back on the queue.
+Needs Redis >= 6.2 (BLMOVE).
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing as mp
+import signal
+import time
+
+log = logging.getLogger("app.worker")
+
+
+def _worker_main(stop) -> None:
+    # import inside the child: fresh engine / redis pools per process
+    from app import models  # noqa: F401
+    from app.services.jobs import job_queue, run_one
+    from app.services.kb_index import start_sync_thread
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent coordinates shutdown
+    start_sync_thread()  # draft jobs read this node's KB index
+    while not stop.is_set():
+        try:
+            run_one(job_queue, timeout=1.0)
+        except Exception:
+            log.exception("worker loop error")
+            time.sleep(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI support job worker")
+    parser.add_argument("--processes", type=int, default=2)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(processName)s] %(message)s")
+
+    ctx = mp.get_context("spawn")
+    stop = ctx.Event()
+    procs = [
+        ctx.Process(target=_worker_main, args=(stop,), name=f"worker-{i}", daemon=False)
+        for i in range(max(args.processes, 1))
+    ]
+    for p in procs:
+        p.start()
+    log.info("started %d worker processes", len(procs))
+
+    def _shutdown(signum, frame):
+        log.info("stopping workers (signal %s)", signum)
+        stop.set()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
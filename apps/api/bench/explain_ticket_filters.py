@@ -0,0 +1,195 @@
+"""
+Checks that every GET /tickets filter / sort combination is served by the index
+meant for it.
+
+    python -m bench.explain_ticket_filters            # throwaway SQLite file
+    DATABASE_URL=postgresql+psycopg://... python -m bench.explain_ticket_filters
+
+Seeds a few thousand tickets with a realistic spread (inside a transaction that is
+rolled back), ANALYZEs, then runs EXPLAIN on the exact query list_tickets builds and
+compares the indexes in the plan with expected_indexes(). Postgres additionally runs
+with enable_seqscan = off, so a missing index shows up as a Seq Scan rather than a
+cheap-looking one. Exits 1 on failure, so CI can run it against the migrated schema.
+
+SQLite can't use an expression index for LIKE, so there subject_prefix is only
+checked for "some index"; Postgres must use ix_tickets_org_subject_lower.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_explain.db')}")
+
+from sqlalchemy import insert, text  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.sql.expression import ClauseElement, Executable  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.db import Base, SessionLocal, engine  # noqa: E402
+from app.models.org import Org  # noqa: E402
+from app.models.ticket import Ticket, TicketPriority, TicketStatus  # noqa: E402
+from app.routers.tickets import TicketListFilters, _list_tickets_query  # noqa: E402
+from app.utils.cursor import encode_cursor  # noqa: E402
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN (FORMAT JSON) " if compiler.dialect.name == "postgresql" else "EXPLAIN QUERY PLAN "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+NOW = datetime.now(timezone.utc)
+FILTERS: dict[str, dict[str, Any]] = {
+    "status": {"status": TicketStatus.open},
+    "priority": {"priority": TicketPriority.high},
+    "created_range": {"created_from": NOW - timedelta(days=7), "created_to": NOW},
+    "updated_range": {"updated_from": NOW - timedelta(days=7), "updated_to": NOW},
+    "subject_prefix": {"subject_prefix": "Refund"},
+}
+SORTS = ["-updated_at", "updated_at", "-created_at", "created_at"]
+
+SORT_INDEX = {"updated_at": "ix_tickets_org_updated_id", "created_at": "ix_tickets_org_created_id"}
+FILTER_INDEXES: dict[str, set[str]] = {
+    "status": {"ix_tickets_org_status_updated_id", "ix_tickets_open_org_updated_id"},
+    "priority": {"ix_tickets_org_priority_updated_id"},
+    "created_range": {"ix_tickets_org_created_id"},
+    # (org_id, <equality>, updated_at, id) indexes serve the range too
+    "updated_range": {
+        "ix_tickets_org_updated_id",
+        "ix_tickets_org_status_updated_id",
+        "ix_tickets_open_org_updated_id",
+        "ix_tickets_org_priority_updated_id",
+    },
+    "subject_prefix": {"ix_tickets_org_subject_lower"},
+}
+# filters narrow enough that their index should drive the plan, whatever the sort
+DRIVING = ("subject_prefix", "created_range", "updated_range")
+
+
+def expected_indexes(names: tuple[str, ...], sort: str, keyset: bool, dialect: str) -> set[str]:
+    """Indexes any one of which may serve the combination."""
+    column = sort.lstrip("-")
+    if dialect == "sqlite":
+        names = tuple(n for n in names if n != "subject_prefix")
+    driving = [n for n in names if n in DRIVING]
+    equality = [n for n in names if n not in DRIVING]
+
+    ok: set[str] = set().union(*(FILTER_INDEXES[n] for n in driving))
+    # a cursor is a range on the sort key, as narrow as a date range (but not a rare prefix)
+    cursor_range = keyset and "subject_prefix" not in driving
+    if not driving or (cursor_range and column == "updated_at"):
+        # status / priority indexes: equality, then (updated_at, id) for the order or the cursor range
+        ok |= set().union(*(FILTER_INDEXES[n] for n in equality))
+    if (not driving and (not equality or column != "updated_at")) or cursor_range:
+        # walk the sort index and filter
+        ok.add(SORT_INDEX[column])
+    return ok
+
+
+def combinations() -> Iterator[tuple[str, tuple[str, ...], TicketListFilters, bool]]:
+    for sort in SORTS:
+        for n in range(0, 3):
+            for names in itertools.combinations(FILTERS, n):
+                kwargs: dict[str, Any] = {"sort": sort}
+                for name in names:
+                    kwargs.update(FILTERS[name])
+                label = "+".join(names) or "no filter"
+                for keyset in (False, True):
+                    yield (
+                        f"{label:<30} sort={sort:<12} {'cursor' if keyset else 'first page'}",
+                        names,
+                        TicketListFilters(**kwargs),
+                        keyset,
+                    )
+
+
+def seed(db, per_org: int = 5000) -> int:
+    """Two orgs of tickets; ~15% open, ~10% high, ~2% created in the last week, ~0.5% "Refund..." -> org id."""
+    rnd = random.Random(42)
+    words = ["Login", "Billing", "Invoice", "Password", "Export", "Crash", "Slow", "Question", "Feature", "Access"]
+    org_ids = [db.scalar(insert(Org).values(name=f"explain-{i}").returning(Org.id)) for i in range(2)]
+    for org_id in org_ids:
+        rows = []
+        for i in range(per_org):
+            created = NOW - timedelta(days=rnd.uniform(0, 365))
+            rows.append(
+                {
+                    "org_id": org_id,
+                    "subject": f"{'Refund' if rnd.random() < 0.005 else rnd.choice(words)} request {i}",
+                    "status": rnd.choices(list(TicketStatus), weights=[15, 15, 70])[0],
+                    "priority": rnd.choices(list(TicketPriority), weights=[30, 60, 10])[0],
+                    "created_at": created,
+                    "updated_at": min(created + timedelta(days=rnd.uniform(0, 30)), NOW),
+                }
+            )
+        db.execute(insert(Ticket), rows)
+    db.execute(text("ANALYZE"))
+    return org_ids[0]
+
+
+def _pg_plan(plan: dict) -> tuple[set[str], list[str]]:
+    """-> (index names used, problems)."""
+    indexes, problems = set(), []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == "tickets":
+        problems.append("Seq Scan on tickets")
+    if plan.get("Index Name"):
+        indexes.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        child_indexes, child_problems = _pg_plan(child)
+        indexes |= child_indexes
+        problems += child_problems
+    return indexes, problems
+
+
+def _sqlite_plan(details: list[str]) -> tuple[set[str], list[str]]:
+    indexes = {m.group(1) for d in details for m in [re.search(r"USING (?:COVERING )?INDEX (\w+)", d)] if m}
+    problems = [d for d in details if d.startswith("SCAN tickets") and "INDEX" not in d]
+    return indexes, problems
+
+
+def main() -> int:
+    Base.metadata.create_all(bind=engine)
+    failures = 0
+    with SessionLocal() as db:
+        dialect = db.get_bind().dialect.name
+        org_id = seed(db)
+        if dialect == "postgresql":
+            db.execute(text("SET LOCAL enable_seqscan = off"))
+
+        cursor = encode_cursor(NOW - timedelta(days=3), 1)
+        for label, names, filters, keyset in combinations():
+            q = _list_tickets_query(org_id, 20, 0, cursor if keyset else None, filters)
+            rows = db.execute(Explain(q)).all()
+            if dialect == "postgresql":
+                plan = rows[0][0] if not isinstance(rows[0][0], str) else json.loads(rows[0][0])
+                used, problems = _pg_plan(plan[0]["Plan"])
+            else:
+                used, problems = _sqlite_plan([r[-1] for r in rows])
+            expected = expected_indexes(names, filters.sort, keyset, dialect)
+            if not used & expected:
+                problems.append(f"uses {sorted(used) or 'no index'}, expected one of {sorted(expected)}")
+            failures += bool(problems)
+            print(f"{'FAIL' if problems else 'ok  '} {label} {', '.join(sorted(used))} {'; '.join(problems)}")
+        db.rollback()
+
+    print(f"\n{failures} combination(s) not served by their index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+"""
+In-process load benchmark for the API hot paths.
+
+    python -m bench.load                                   # small dataset, throwaway SQLite
+    python -m bench.load --tickets-per-org 2000 --concurrency 32 --requests 2000
+    python -m bench.load --save-baseline /tmp/mine.json
+    python -m bench.load --baseline /tmp/mine.json         # exit 1 on regression
+    DATABASE_URL=postgresql+psycopg://.../scratch python -m bench.load
+
+CI (from apps/api, with requirements-dev.txt installed) compares against the
+committed bench/baseline.json, which was recorded with exactly these flags:
+
+    python -m bench.load --orgs 2 --users-per-org 4 --tickets-per-org 200 \
+        --messages-per-ticket 4 --kb-articles 50 --concurrency 8 --requests 200 \
+        --baseline bench/baseline.json --tolerance 0.5 --min-delta-ms 30
+
+Re-record it (same flags, --save-baseline bench/baseline.json instead of
+--baseline) on the CI runner class after an intentional performance change, and
+commit it with that change. A baseline recorded with other flags is an error.
+Shared runners are noisy: this gate catches gross regressions (an N+1, a lost
+index, a blocking call on the event loop); per-route statement budgets
+(app.core.query_budget) are the precise check.
+
+Seeds orgs x users x tickets x messages plus KB articles, then drives the ASGI
+app through httpx's ASGITransport with --concurrency async clients (each logged
+in as a different seeded user) and reports p50/p95/p99 latency and throughput
+per endpoint. No network, so the numbers are app + database cost only.
+
+Baselines are machine-specific: record one on the machine that will compare
+against it. A run regresses when an endpoint's p95 grows, or its throughput
+drops, by more than --tolerance. Redis-backed features run on their in-memory
+backends; BCRYPT_ROUNDS defaults to 4 here so /auth/login measures the request
+path and the hashing pool rather than bcrypt itself (override via env).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
+
+_DEFAULT_DB = os.path.join(tempfile.gettempdir(), "bench_load.db")
+if "DATABASE_URL" not in os.environ:
+    # throwaway SQLite: start empty, so every run (and baseline) sees the same data
+    if os.path.exists(_DEFAULT_DB):
+        os.remove(_DEFAULT_DB)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_DEFAULT_DB}"
+for _name, _value in {
+    "JOBS_BACKEND": "memory",
+    "RATE_LIMIT_ENABLED": "false",
+    "DRAFT_CACHE_BACKEND": "memory",
+    "TICKET_CACHE_BACKEND": "memory",
+    "EVENTS_BACKEND": "memory",
+    "SESSION_STORE_BACKEND": "postgres",
+    "AI_PREGENERATE_ON_MESSAGE": "false",
+    "BCRYPT_ROUNDS": "4",
+    "SLOW_QUERY_MS": "0",
+    "KB_INDEX_PATH": os.path.join(tempfile.gettempdir(), "bench_load_kb"),
+}.items():
+    os.environ.setdefault(_name, _value)
+
+if os.environ["DATABASE_URL"] == f"sqlite:///{_DEFAULT_DB}" and os.path.exists(_DEFAULT_DB):
+    os.remove(_DEFAULT_DB)
+
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.db import Base, SessionLocal, engine  # noqa: E402
+from app.core.hashing import bcrypt_hash  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.kb import KBArticle  # noqa: E402
+from app.models.org import Org  # noqa: E402
+from app.models.ticket import Ticket, TicketPriority, TicketStatus  # noqa: E402
+from app.models.ticket_message import MessageRole, TicketMessage  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.kb_index import kb_index  # noqa: E402
+from app.services.ticket_stats import reconcile_all  # noqa: E402
+
+PASSWORD = "bench-password"
+SUBJECTS = ["Cannot log in after password reset", "Refund for duplicate charge", "Export to CSV fails", "Invite link expired"]
+KB_WORDS = "password reset login refund invoice billing export csv invite team sso account email".split()
+
+
+@dataclass
+class Dataset:
+    users: list[tuple[str, int]]  # (email, org_id)
+    tickets: dict[int, list[int]]  # org_id -> ticket ids
+
+
+def seed(args: argparse.Namespace) -> Dataset:
+    Base.metadata.create_all(bind=engine)
+    run = time.strftime("%Y%m%d%H%M%S")
+    now = datetime.now(timezone.utc)
+    rnd = random.Random(args.seed)
+    password_hash = bcrypt_hash(PASSWORD)
+    users: list[tuple[str, int]] = []
+    tickets: dict[int, list[int]] = {}
+
+    with SessionLocal() as db:
+        for o in range(args.orgs):
+            org_id = db.scalar(insert(Org).values(name=f"bench-{run}-{o}").returning(Org.id))
+            emails = [f"bench-{run}-{o}-{u}@example.com" for u in range(args.users_per_org)]
+            db.execute(
+                insert(User),
+                [{"email": e, "password_hash": password_hash, "role": "owner" if u == 0 else "agent", "org_id": org_id}
+                 for u, e in enumerate(emails)],
+            )
+            users += [(e, org_id) for e in emails]
+
+            ids = list(
+                db.scalars(
+                    insert(Ticket).returning(Ticket.id, sort_by_parameter_order=True),
+                    [
+                        {
+                            "org_id": org_id,
+                            "subject": f"{rnd.choice(SUBJECTS)} #{t}",
+                            "status": rnd.choice(list(TicketStatus)),
+                            "priority": rnd.choice(list(TicketPriority)),
+                            "created_at": now - timedelta(minutes=t * 7),
+                            "updated_at": now - timedelta(minutes=t),
+                        }
+                        for t in range(args.tickets_per_org)
+                    ],
+                )
+            )
+            tickets[org_id] = ids
+            for start in range(0, len(ids), 500):
+                db.execute(
+                    insert(TicketMessage),
+                    [
+                        {
+                            "ticket_id": tid,
+                            "role": MessageRole.user if m % 2 == 0 else MessageRole.agent,
+                            "content": " ".join(rnd.choices(KB_WORDS, k=30)),
+                            "created_at": now - timedelta(minutes=m),
+                        }
+                        for tid in ids[start:start + 500]
+                        for m in range(args.messages_per_ticket)
+                    ],
+                )
+            db.commit()
+
+        if args.kb_articles:
+            db.execute(
+                insert(KBArticle),
+                [
+                    {"title": f"How to {' '.join(rnd.choices(KB_WORDS, k=3))}", "body": " ".join(rnd.choices(KB_WORDS, k=200)),
+                     "tags_csv": ",".join(rnd.sample(KB_WORDS, 2))}
+                    for _ in range(args.kb_articles)
+                ],
+            )
+            db.commit()
+        kb_index.rebuild(db)
+        reconcile_all(db, tickets.keys())  # seeds ticket_stats (logs one "drift" line per org)
+
+    return Dataset(users=users, tickets=tickets)
+
+
+# ---- scenarios: one request each; return the HTTP status ----
+Scenario = Callable[[httpx.AsyncClient, tuple[str, int], Dataset, random.Random], Awaitable[int]]
+
+
+async def login(c: httpx.AsyncClient, user: tuple[str, int], data: Dataset, rnd: random.Random) -> int:
+    return (await c.post("/auth/login", json={"email": user[0], "password": PASSWORD})).status_code
+
+
+async def list_tickets(c: httpx.AsyncClient, user: tuple[str, int], data: Dataset, rnd: random.Random) -> int:
+    return (await c.get("/tickets", params={"limit": 50})).status_code
+
+
+async def list_open_tickets(c: httpx.AsyncClient, user: tuple[str, int], data: Dataset, rnd: random.Random) -> int:
+    return (await c.get("/tickets", params={"limit": 50, "status": "open"})).status_code
+
+
+async def get_ticket(c: httpx.AsyncClient, user: tuple[str, int], data: Dataset, rnd: random.Random) -> int:
+    return (await c.get(f"/tickets/{rnd.choice(data.tickets[user[1]])}")).status_code
+
+
+async def ticket_stats(c: httpx.AsyncClient, user: tuple[str, int], data: Dataset, rnd: random.Random) -> int:
+    return (await c.get("/tickets/stats")).status_code
+
+
+async def kb_search(c: httpx.AsyncClient, user: tuple[str, int], data: Dataset, rnd: random.Random) -> int:
+    return (await c.get("/kb/search", params={"q": rnd.choice(KB_WORDS)})).status_code
+
+
+async def draft_reply(c: httpx.AsyncClient, user: tuple[str, int], data: Dataset, rnd: random.Random) -> int:
+    ticket_id = rnd.choice(data.tickets[user[1]])
+    return (await c.post("/ai/draft-reply", json={"ticket_id": ticket_id, "tone": "friendly"})).status_code
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "POST /auth/login": login,
+    "GET /tickets": list_tickets,
+    "GET /tickets?status=open": list_open_tickets,
+    "GET /tickets/{id}": get_ticket,
+    "GET /tickets/stats": ticket_stats,
+    "GET /kb/search": kb_search,
+    "POST /ai/draft-reply": draft_reply,
+}
+
+
+def _percentile(sorted_ms: list[float], p: float) -> float:
+    if len(sorted_ms) == 1:
+        return sorted_ms[0]
+    return statistics.quantiles(sorted_ms, n=100, method="inclusive")[int(p) - 1]
+
+
+async def run_scenario(
+    name: str, scenario: Scenario, clients: list[tuple[httpx.AsyncClient, tuple[str, int]]], data: Dataset,
+    requests: int, seed: int,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(i: int) -> None:
+        nonlocal remaining, errors
+        c, user = clients[i]
+        rnd = random.Random(seed * 1000 + i)
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            status = await scenario(c, user, data, rnd)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors += 1
+
+    # warm-up: caches, prepared statements, lazy imports
+    for c, user in clients[: min(len(clients), 4)]:
+        await scenario(c, user, data, random.Random(seed))
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(len(clients))))
+    wall = time.perf_counter() - wall
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+    }
+
+
+async def run(args: argparse.Namespace, data: Dataset) -> dict[str, Any]:
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    clients: list[tuple[httpx.AsyncClient, tuple[str, int]]] = []
+    try:
+        for i in range(args.concurrency):
+            user = data.users[i % len(data.users)]
+            c = httpx.AsyncClient(transport=transport, base_url="http://bench")
+            r = await c.post("/auth/login", json={"email": user[0], "password": PASSWORD})
+            r.raise_for_status()
+            clients.append((c, user))
+
+        results = {}
+        for name, scenario in SCENARIOS.items():
+            if args.only and not any(o.lower() in name.lower() for o in args.only):
+                continue
+            results[name] = await run_scenario(name, scenario, clients, data, args.requests, args.seed)
+            _print_row(name, results[name])
+        return results
+    finally:
+        for c, _ in clients:
+            await c.aclose()
+        await app.router.shutdown()
+
+
+def _print_row(name: str, r: dict[str, Any]) -> None:
+    print(
+        f"{name:<26} {r['rps']:>9.1f} req/s  p50 {r['p50_ms']:>8.2f}  p95 {r['p95_ms']:>8.2f}  "
+        f"p99 {r['p99_ms']:>8.2f} ms  errors {r['errors']}",
+        flush=True,
+    )
+
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], tolerance: float, min_delta_ms: float = 0.0
+) -> list[str]:
+    """p95 must grow by more than tolerance AND min_delta_ms (scheduler noise on fast endpoints)."""
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get("endpoints", {}).get(name)
+        if b is None:
+            continue
+        if r["p95_ms"] > max(b["p95_ms"] * (1 + tolerance), b["p95_ms"] + min_delta_ms):
+            regressions.append(f"{name}: p95 {b['p95_ms']:.2f} -> {r['p95_ms']:.2f} ms")
+        if r["rps"] < b["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {b['rps']:.1f} -> {r['rps']:.1f} req/s")
+        if r["errors"] > b.get("errors", 0):
+            regressions.append(f"{name}: errors {b.get('errors', 0)} -> {r['errors']}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orgs", type=int, default=4)
+    parser.add_argument("--users-per-org", type=int, default=4)
+    parser.add_argument("--tickets-per-org", type=int, default=500)
+    parser.add_argument("--messages-per-ticket", type=int, default=6)
+    parser.add_argument("--kb-articles", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="per endpoint")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", nargs="*", help="substring filter on endpoint names")
+    parser.add_argument("--baseline", help="baseline JSON to compare against (exit 1 on regression)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 / throughput drift (0.25 = 25%%)")
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=0.0, help="p95 growth below this many ms never counts as a regression"
+    )
+    parser.add_argument("--save-baseline", help="write this run's results here")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    data = seed(args)
+    print(
+        f"seeded {args.orgs} orgs x {args.users_per_org} users x {args.tickets_per_org} tickets x "
+        f"{args.messages_per_ticket} messages, {args.kb_articles} KB articles in {time.perf_counter() - started:.1f}s "
+        f"({engine.dialect.name})",
+        flush=True,
+    )
+
+    results = asyncio.run(run(args, data))
+    report = {
+        "config": {
+            "database": engine.dialect.name,
+            "db_async": settings.DB_ASYNC,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            **{k: v for k, v in vars(args).items() if k not in ("baseline", "save_baseline", "tolerance", "min_delta_ms", "only")},
+        },
+        "endpoints": results,
+    }
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            diff = {
+                k: (baseline.get("config", {}).get(k), v)
+                for k, v in report["config"].items()
+                if baseline.get("config", {}).get(k) != v
+            }
+            print(f"baseline was recorded with a different config (baseline, this run): {diff}", file=sys.stderr)
+            return 2
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+ORM + Pydantic vs lean (columns + orjson) serialization of the GET /tickets page.
+
+    python -m bench.serialize_list --rows 100 --seconds 3
+
+Defaults to a throwaway SQLite file, so it measures the Python side (row
+materialization + validation + encoding), which is what the lean path changes.
+Set DATABASE_URL to a scratch Postgres to include the driver.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_serialize.db')}")
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import desc, select  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.core.db import Base, SessionLocal, engine  # noqa: E402
+from app.models.org import Org  # noqa: E402
+from app.models.ticket import Ticket, TicketPriority, TicketStatus  # noqa: E402
+from app.routers.tickets import TicketOut, _list_tickets_query  # noqa: E402
+from app.utils.fastjson import dumps, row_dicts  # noqa: E402
+
+TICKETS_ADAPTER = TypeAdapter(List[TicketOut])
+
+
+def _seed(rows: int) -> int:
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        org = Org(name=f"bench-{time.time_ns()}")
+        db.add(org)
+        db.flush()
+        statuses, priorities = list(TicketStatus), list(TicketPriority)
+        db.add_all(
+            Ticket(
+                org_id=org.id,
+                subject=f"Cannot log in after password reset #{i}",
+                status=statuses[i % len(statuses)],
+                priority=priorities[i % len(priorities)],
+                created_at=now - timedelta(minutes=i),
+                updated_at=now - timedelta(seconds=i),
+            )
+            for i in range(rows)
+        )
+        db.commit()
+        return org.id
+
+
+def orm_path(org_id: int, limit: int) -> bytes:
+    """What the route did before: ORM entities -> response_model validation -> JSONResponse."""
+    with SessionLocal() as db:
+        q = (
+            select(Ticket)
+            .where(Ticket.org_id == org_id)
+            .order_by(desc(Ticket.updated_at), desc(Ticket.id))
+            .limit(limit)
+        )
+        items = list(db.scalars(q).all())
+        validated = TICKETS_ADAPTER.validate_python(items, from_attributes=True)
+        content = TICKETS_ADAPTER.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def lean_path(org_id: int, limit: int) -> bytes:
+    with SessionLocal() as db:
+        return dumps(row_dicts(db.execute(_list_tickets_query(org_id, limit, 0, None))))
+
+
+def _rate(fn: Callable[[], bytes], seconds: float) -> float:
+    fn()  # warm up
+    n, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        n += 1
+    return n / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    org_id = _seed(args.rows)
+    assert json.loads(orm_path(org_id, args.rows)) == json.loads(lean_path(org_id, args.rows)), "paths disagree"
+
+    orm = _rate(lambda: orm_path(org_id, args.rows), args.seconds)
+    lean = _rate(lambda: lean_path(org_id, args.rows), args.seconds)
+    print(f"{args.rows}-row page  orm+pydantic: {orm:8.1f} req/s   lean+orjson: {lean:8.1f} req/s   x{lean / orm:.2f}")
+
+
+if __name__ == "__main__":
+    main()